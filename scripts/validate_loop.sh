@@ -4,6 +4,9 @@ set -euo pipefail
 ROOT=${1:-""}
 INTERVAL=${2:-60}
 
+# Background scans share the volume with training data loaders; keep them out of the way.
+THROTTLE=${CKPTKIT_SCAN_THROTTLE-"--io-class idle --nice 19 --latency-target-ms 20 --max-bytes-per-second 209715200"}
+
 if [[ -z "$ROOT" ]]; then
   echo "usage: $0 <checkpoint_root> [interval_seconds]" >&2
   exit 1
@@ -13,7 +16,7 @@ echo "[ckptkit] Starting validation loop for $ROOT every $INTERVAL seconds"
 
 while true; do
   timestamp=$(date -u +"%Y-%m-%dT%H:%M:%SZ")
-  if ckptkit scan "$ROOT" --sample-bytes 65536; then
+  if ckptkit scan "$ROOT" $THROTTLE --sample-bytes 65536; then
     echo "$timestamp validation ok"
   else
     echo "$timestamp validation failed" >&2
@@ -2,27 +2,18 @@
 set -euo pipefail
 
 ROOT=${1:-""}
-INTERVAL=${2:-30}
+RECHECK=${2:-3600}
+
+# Override with CKPTKIT_SCAN_THROTTLE="" to validate at full speed.
+THROTTLE=${CKPTKIT_SCAN_THROTTLE-"--io-class idle --nice 19 --latency-target-ms 20 --max-bytes-per-second 209715200"}
 
 if [[ -z "$ROOT" ]]; then
-  echo "usage: $0 <checkpoint_root> [interval_seconds]" >&2
+  echo "usage: $0 <checkpoint_root> [recheck_interval_seconds]" >&2
   exit 1
 fi
 
-STATE_FILE=$(mktemp)
-trap "rm -f $STATE_FILE" EXIT
-
-echo "[ckptkit] Watching $ROOT for corrupt checkpoints every $INTERVAL seconds"
+echo "[ckptkit] Watching $ROOT for corrupt checkpoints (rechecks every $RECHECK seconds)"
 
-while true; do
-  OUTPUT=$(ckptkit scan "$ROOT" || true)
-  echo "$OUTPUT"
-  NEW_INVALID=$(echo "$OUTPUT" | grep "invalid" | awk '{print $1}')
-  for ckpt in $NEW_INVALID; do
-    if ! grep -Fxq "$ckpt" "$STATE_FILE"; then
-      echo "$(date -u +"%Y-%m-%dT%H:%M:%SZ") ALERT: new corrupt checkpoint detected $ckpt" >&2
-      echo "$ckpt" >> "$STATE_FILE"
-    fi
-  done
-  sleep "$INTERVAL"
-done
+# New checkpoints are validated as soon as they are renamed into place; corruption
+# is reported as a `checkpoint_corrupt_detected` log event and metric.
+exec ckptkit watch "$ROOT" --recheck-interval "$RECHECK" $THROTTLE
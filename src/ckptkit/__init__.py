@@ -5,14 +5,22 @@ Checkpointing & Recovery Toolkit.
 __all__ = [
     "manifest",
     "atomic",
+    "async_writer",
+    "distributed",
+    "tiering",
+    "storage",
     "validate",
     "resume",
     "metrics",
+    "tracing",
     "quarantine",
+    "reaper",
     "logging",
     "config",
     "fs",
     "hashing",
+    "libc",
+    "watch",
 ]
 
 __version__ = "0.1.0"
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import collections
+import contextvars
+import enum
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, List, Optional
+
+from .atomic import atomic_checkpoint_write
+from .config import RetentionConfig
+from .manifest import Manifest
+from .reaper import Reaper
+
+
+class Backpressure(str, enum.Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop-oldest"
+    COALESCE = "coalesce"
+
+
+@dataclass
+class _Job:
+    dest_dir: Path
+    write_fn: Callable[[Path], Manifest]
+    futures: List["Future[Manifest]"] = field(default_factory=list)
+    # Captured at submit so a tracer active in the caller records the background write.
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+class AsyncCheckpointWriter:
+    """Persist checkpoints on a background thread.
+
+    ``write_fn`` runs on the worker, so it must only touch data the caller has
+    already staged (e.g. tensors copied to host memory). Jobs are written one at
+    a time in submission order through ``atomic_checkpoint_write``, which keeps
+    the temp dir + rename guarantees and the ordering of ``latest`` updates.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_pending: int = 1,
+        backpressure: Backpressure | str = Backpressure.BLOCK,
+        update_latest: bool = True,
+        retention: Optional[RetentionConfig] = None,
+        reaper: Optional[Reaper] = None,
+    ):
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        self.max_pending = max_pending
+        self.backpressure = Backpressure(backpressure)
+        self.update_latest = update_latest
+        self.retention = retention
+        self.reaper = reaper
+        self._queue: Deque[_Job] = collections.deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._closed = False
+        self._errors: List[BaseException] = []
+        self._thread = threading.Thread(target=self._run, name="ckptkit-async-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "AsyncCheckpointWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def submit(self, dest_dir: Path, write_fn: Callable[[Path], Manifest]) -> "Future[Manifest]":
+        future: "Future[Manifest]" = Future()
+        job = _Job(dest_dir=dest_dir, write_fn=write_fn, futures=[future])
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AsyncCheckpointWriter is closed")
+            if len(self._queue) >= self.max_pending:
+                if self.backpressure == Backpressure.BLOCK:
+                    while len(self._queue) >= self.max_pending and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        raise RuntimeError("AsyncCheckpointWriter is closed")
+                elif self.backpressure == Backpressure.DROP_OLDEST:
+                    dropped = self._queue.popleft()
+                    for fut in dropped.futures:
+                        fut.cancel()
+                else:
+                    # Coalesce: the newest pending job is superseded; its waiters
+                    # resolve with the result of the job that replaced it.
+                    superseded = self._queue.pop()
+                    job.futures.extend(superseded.futures)
+            self._queue.append(job)
+            self._cond.notify_all()
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        if not self.flush(timeout):
+            raise TimeoutError("timed out waiting for pending checkpoint writes")
+        with self._cond:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self, *, wait: bool = True, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            if not wait:
+                while self._queue:
+                    for fut in self._queue.popleft().futures:
+                        fut.cancel()
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                job = self._queue.popleft()
+                self._in_flight += 1
+                self._cond.notify_all()
+            try:
+                self._execute(job)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _execute(self, job: _Job) -> None:
+        futures = [fut for fut in job.futures if fut.set_running_or_notify_cancel()]
+        if not futures:
+            return
+        try:
+            manifest = job.context.run(
+                atomic_checkpoint_write,
+                job.dest_dir,
+                job.write_fn,
+                update_latest=self.update_latest,
+                retention=self.retention,
+                reaper=self.reaper,
+            )
+        except BaseException as exc:
+            with self._cond:
+                self._errors.append(exc)
+            for fut in futures:
+                fut.set_exception(exc)
+            return
+        for fut in futures:
+            fut.set_result(manifest)
@@ -3,21 +3,32 @@ from __future__ import annotations
 import shutil
 import tempfile
 from pathlib import Path
-from typing import Callable, Iterable, Optional, Set
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set
 
-from .config import RetentionConfig
-from .fs import ensure_dir, fsync_dir, fsync_tree, list_checkpoints, read_step, safe_remove_checkpoint, update_latest_pointer
-from .manifest import MANIFEST_NAME, Manifest, manifest_path, write_manifest
+from .catalog import Catalog
+from .chunkstore import CHUNKS_DIR, ChunkStore
+from .config import DeltaConfig, RetentionConfig
+from .delta import make_delta, select_parent
+from .durability import DurabilityEngine, DurabilityStats
+from .fs import (
+    ensure_dir,
+    find_checkpoint,
+    fsync_dir,
+    list_checkpoints,
+    read_step,
+    safe_remove_checkpoint,
+    update_latest_pointer,
+)
+from .manifest import MANIFEST_NAME, Manifest, manifest_path, read_manifest_header, write_manifest
+from .reaper import TRASH_DIR, Reaper, move_to_trash
+from .tracing import span
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .cache import ValidationCache
 
 
 def atomic_rename(src: Path, dst: Path) -> None:
-    ensure_dir(dst.parent)
-    src_parent = src.parent
-    dst_parent = dst.parent
-    fsync_dir(src_parent)
-    fsync_dir(dst_parent)
-    src.replace(dst)
-    fsync_dir(dst_parent)
+    DurabilityEngine().commit(src, dst)
 
 
 def atomic_checkpoint_write(
@@ -26,44 +37,140 @@ def atomic_checkpoint_write(
     *,
     update_latest: bool = True,
     retention: Optional[RetentionConfig] = None,
+    chunk_store: Optional[ChunkStore] = None,
+    delta: Optional[DeltaConfig] = None,
+    durability: Optional[DurabilityEngine] = None,
+    catalog: Optional[Catalog] = None,
+    reaper: Optional[Reaper] = None,
+    cache: Optional["ValidationCache"] = None,
+    sample_bytes: Optional[int] = 65536,
 ) -> Manifest:
+    # ``cache`` and ``sample_bytes`` (how manifests under the root are hashed) are
+    # used to check that a delta parent validates before anything is chained to it.
+    engine = durability or DurabilityEngine()
+    stats = DurabilityStats()
     parent = dest_dir.parent
     ensure_dir(parent)
-    temp_dir_path = Path(tempfile.mkdtemp(prefix=dest_dir.name + ".tmp-", dir=parent))
-    manifest: Manifest
-    try:
-        manifest = write_fn(temp_dir_path)
-        if not (temp_dir_path / MANIFEST_NAME).exists():
-            # Ensure manifest is written by the writer.
-            write_manifest(manifest_path(temp_dir_path), manifest)
-        fsync_tree(temp_dir_path)
-        fsync_dir(parent)
-        atomic_rename(temp_dir_path, dest_dir)
-    finally:
-        # If rename failed, ensure temp dir is cleaned up.
-        if temp_dir_path.exists() and temp_dir_path != dest_dir:
-            shutil.rmtree(temp_dir_path, ignore_errors=True)
-    if update_latest:
-        update_latest_pointer(parent, dest_dir)
-    if retention:
-        apply_retention(parent, retention, keep_paths={dest_dir})
+    with span("write", checkpoint=dest_dir.name) as total:
+        temp_dir_path = Path(tempfile.mkdtemp(prefix=dest_dir.name + ".tmp-", dir=parent))
+        manifest: Manifest
+        try:
+            with span("write.write_fn") as s:
+                manifest = write_fn(temp_dir_path)
+                if not (temp_dir_path / MANIFEST_NAME).exists():
+                    # Ensure manifest is written by the writer.
+                    write_manifest(manifest_path(temp_dir_path), manifest)
+                s.add_bytes(sum(f.size for f in manifest.files))
+            if delta is not None and delta.enabled:
+                with span("write.delta"):
+                    base = select_parent(
+                        parent,
+                        manifest.step,
+                        run_id=manifest.run_id,
+                        max_chain_length=delta.max_chain_length,
+                        sample_bytes=sample_bytes,
+                        catalog=catalog,
+                        cache=cache,
+                    )
+                    if base is not None:
+                        manifest = make_delta(
+                            temp_dir_path, manifest, base, verify_bytes=delta.verify_bytes, sample_bytes=sample_bytes
+                        )
+            if chunk_store is not None:
+                with span("write.chunk_ingest"):
+                    manifest = chunk_store.ingest(temp_dir_path, manifest)
+            with span("write.persist"):
+                engine.persist_tree(temp_dir_path, stats)
+            with span("write.rename"):
+                engine.commit(temp_dir_path, dest_dir, stats)
+        finally:
+            # If rename failed, ensure temp dir is cleaned up.
+            if temp_dir_path.exists() and temp_dir_path != dest_dir:
+                shutil.rmtree(temp_dir_path, ignore_errors=True)
+        engine.last_stats = stats
+        if catalog is not None:
+            with span("write.catalog"):
+                catalog.add(dest_dir, manifest)
+        if update_latest:
+            with span("write.latest_pointer"):
+                update_latest_pointer(parent, dest_dir)
+        if retention:
+            with span("write.retention"):
+                apply_retention(
+                    parent, retention, keep_paths={dest_dir}, chunk_store=chunk_store, catalog=catalog, reaper=reaper
+                )
+        total.add_bytes(sum(f.size for f in manifest.files))
     return manifest
 
 
-def apply_retention(root: Path, retention: RetentionConfig, *, keep_paths: Optional[Iterable[Path]] = None) -> None:
+def apply_retention(
+    root: Path,
+    retention: RetentionConfig,
+    *,
+    keep_paths: Optional[Iterable[Path]] = None,
+    chunk_store: Optional[ChunkStore] = None,
+    catalog: Optional[Catalog] = None,
+    reaper: Optional[Reaper] = None,
+) -> None:
+    # Victims are chosen synchronously either way. With ``retention.deferred`` they
+    # are renamed into the trash (one rename each) and deleted later by ``reaper``
+    # or the next ``ckptkit reap``; chunk GC is left to the reaper as well.
     keep_set: Set[Path] = set(keep_paths or [])
-    checkpoints = list_checkpoints(root)
-    checkpoints.sort(key=read_step)
+    steps: Dict[Path, int] = {}
+    parents: Dict[Path, Optional[int]] = {}
+    if catalog is not None:
+        # The catalog answers step/parent lookups without parsing manifests.
+        catalog.refresh(persist=True)
+        for entry in catalog.entries():
+            steps[root / entry.location] = entry.step
+            parents[root / entry.location] = entry.parent
+    else:
+        for ckpt in list_checkpoints(root):
+            steps[ckpt] = read_step(ckpt)
+    checkpoints = sorted(steps, key=lambda c: (steps[c], c))
     survivors: Set[Path] = set()
     if retention.keep_last:
         survivors.update(checkpoints[-retention.keep_last :])
     if retention.keep_every:
         for ckpt in checkpoints:
-            step = read_step(ckpt)
+            step = steps[ckpt]
             if step >= 0 and step % retention.keep_every == 0:
                 survivors.add(ckpt)
     survivors.update(keep_set)
-    for ckpt in checkpoints:
-        if ckpt in survivors:
+    # Never drop an ancestor that a surviving delta checkpoint still reads from.
+    by_step = {step: ckpt for ckpt, step in steps.items()}
+    frontier = list(survivors)
+    while frontier:
+        ckpt = frontier.pop()
+        if ckpt in parents:
+            parent_step = parents[ckpt]
+        else:
+            try:
+                parent_step = read_manifest_header(ckpt / MANIFEST_NAME).get("parent")
+            except Exception:
+                continue
+        if parent_step is None:
             continue
-        safe_remove_checkpoint(ckpt)
+        ancestor = by_step.get(parent_step) or find_checkpoint(root, parent_step)
+        if ancestor is not None and ancestor not in survivors:
+            survivors.add(ancestor)
+            frontier.append(ancestor)
+    victims: List[Path] = [ckpt for ckpt in checkpoints if ckpt not in survivors]
+    for ckpt in victims:
+        if retention.deferred:
+            move_to_trash(root, ckpt)
+        else:
+            safe_remove_checkpoint(ckpt)
+        if catalog is not None:
+            catalog.remove(ckpt)
+    if retention.deferred:
+        if victims:
+            fsync_dir(root / TRASH_DIR)
+            fsync_dir(root)
+            if reaper is not None:
+                reaper.wake()
+        return
+    if chunk_store is None and (root / CHUNKS_DIR).is_dir():
+        chunk_store = ChunkStore(root)
+    if chunk_store is not None:
+        chunk_store.collect_garbage()
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import __version__
+from .atomic import apply_retention, atomic_checkpoint_write
+from .config import RetentionConfig
+from .fs import list_checkpoints
+from .hashing import hash_paths
+from .manifest import Manifest, compute_manifest, manifest_path, write_manifest
+from .resume import select_checkpoint
+from .validate import validate_checkpoint, validate_checkpoints
+
+# Bumped when result names or fields change meaning, so stale baselines are rejected.
+RESULTS_VERSION = 1
+
+
+@dataclasses.dataclass
+class Scenario:
+    name: str
+    files: int
+    file_size: int
+    checkpoints: int = 4
+    # Sparse files are truncated to size with only a small written header, which
+    # makes multi-GB files cheap to create; reads of the holes still cost syscalls.
+    sparse: bool = False
+
+
+PRESETS: Dict[str, List[Scenario]] = {
+    "smoke": [
+        Scenario("few-small", files=10, file_size=16 << 10, checkpoints=3),
+    ],
+    "default": [
+        Scenario("few-large", files=10, file_size=64 << 20, checkpoints=4),
+        Scenario("many-small", files=1000, file_size=64 << 10, checkpoints=4),
+        Scenario("many-tiny", files=10_000, file_size=4 << 10, checkpoints=2),
+    ],
+    "large": [
+        Scenario("sparse-huge", files=8, file_size=4 << 30, checkpoints=2, sparse=True),
+        Scenario("many-small", files=100_000, file_size=16 << 10, checkpoints=2),
+        Scenario("deep-root", files=10, file_size=1 << 20, checkpoints=200),
+    ],
+}
+
+
+@dataclasses.dataclass
+class BenchResult:
+    name: str
+    scenario: str
+    seconds: float  # median of ``repeats`` runs
+    min_seconds: float
+    repeats: int
+    files: int
+    bytes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dataclasses.asdict(self)
+        data["mib_per_second"] = round(self.bytes / (1 << 20) / self.seconds, 1) if self.seconds and self.bytes else None
+        return data
+
+
+def _fill(directory: Path, scenario: Scenario, step: int) -> None:
+    header = os.urandom(min(4096, scenario.file_size))
+    for i in range(scenario.files):
+        # Spread files over subdirectories like sharded checkpoints do.
+        path = directory / f"shard-{i // 1000:03d}" / f"part-{i:06d}.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(bytes([step % 256]) + header[1:])
+            if scenario.sparse:
+                f.truncate(scenario.file_size)
+            else:
+                remaining = scenario.file_size - len(header)
+                block = os.urandom(min(1 << 20, max(remaining, 0)))
+                while remaining > 0:
+                    f.write(block[:remaining])
+                    remaining -= len(block)
+
+
+def _writer(scenario: Scenario, step: int) -> Callable[[Path], Manifest]:
+    def writer(tmp: Path) -> Manifest:
+        _fill(tmp, scenario, step)
+        manifest = compute_manifest(tmp, job_id="bench", run_id="bench", step=step, world_size=1)
+        write_manifest(manifest_path(tmp), manifest)
+        return manifest
+
+    return writer
+
+
+def generate_root(root: Path, scenario: Scenario) -> List[Path]:
+    """Populate ``root`` with ``scenario.checkpoints`` committed checkpoints."""
+    for step in range(1, scenario.checkpoints + 1):
+        atomic_checkpoint_write(root / f"step-{step}", _writer(scenario, step))
+    return list_checkpoints(root)
+
+
+def _time(fn: Callable[[], Any], repeats: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    samples: List[float] = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_scenario(
+    scenario: Scenario,
+    workdir: Path,
+    *,
+    repeats: int = 3,
+    threads: Sequence[int] = (1, 4, 16),
+    sample_bytes: Sequence[Optional[int]] = (None, 65536),
+) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    total = scenario.files * scenario.file_size
+
+    def record(name: str, samples: List[float], *, files: int = scenario.files, nbytes: int = total) -> None:
+        results.append(
+            BenchResult(
+                name=name,
+                scenario=scenario.name,
+                seconds=statistics.median(samples),
+                min_seconds=min(samples),
+                repeats=len(samples),
+                files=files,
+                bytes=nbytes,
+            )
+        )
+
+    root = workdir / scenario.name
+    generate_root(root, scenario)
+    checkpoints = list_checkpoints(root)
+    newest = checkpoints[-1]
+    files = sorted(newest.rglob("*.bin"))
+
+    scratch = workdir / f"{scenario.name}-write"
+    counter = iter(range(scenario.checkpoints + 1, sys.maxsize))
+    record(
+        "atomic_checkpoint_write",
+        _time(lambda: atomic_checkpoint_write(scratch / f"step-{next(counter)}", _writer(scenario, 0)), repeats),
+    )
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    for sample in sample_bytes:
+        label = "full" if sample is None else f"sample={sample}"
+        record(
+            f"compute_manifest/{label}",
+            _time(lambda: compute_manifest(newest, "bench", "bench", 0, 1, sample_bytes=sample), repeats),
+        )
+        for n in threads:
+            record(
+                f"hash_paths/threads={n}/{label}",
+                _time(lambda: hash_paths(files, sample_bytes=sample, threads=n), repeats),
+            )
+    record("validate_checkpoint/full", _time(lambda: validate_checkpoint(newest, full_hash=True), repeats))
+    record("validate_checkpoint/sampled", _time(lambda: validate_checkpoint(newest), repeats))
+    for n in threads:
+        # What ``ckptkit scan`` runs: every checkpoint of the root, ``n`` at a time.
+        record(
+            f"validate_checkpoints/workers={n}",
+            _time(lambda: validate_checkpoints(checkpoints, workers=n), repeats),
+            files=scenario.files * len(checkpoints),
+            nbytes=total * len(checkpoints),
+        )
+    # Every candidate but the oldest is corrupted so resume has to walk the whole root. The
+    # first byte is flipped in place so the size check passes and the walk pays for hashing.
+    for ckpt in checkpoints[1:]:
+        with open(next(ckpt.rglob("*.bin")), "r+b") as f:
+            first = f.read(1)
+            f.seek(0)
+            f.write(bytes([first[0] ^ 0xFF]))
+    record(
+        "select_checkpoint/walk",
+        _time(lambda: select_checkpoint(root, repair_latest=False), repeats),
+        files=scenario.files * len(checkpoints),
+        nbytes=total * len(checkpoints),
+    )
+
+    retention_root = workdir / f"{scenario.name}-retention"
+
+    def rebuild() -> None:
+        shutil.rmtree(retention_root, ignore_errors=True)
+        shutil.copytree(root, retention_root, symlinks=True)
+
+    record(
+        "apply_retention/keep_last=1",
+        _time(lambda: apply_retention(retention_root, RetentionConfig(keep_last=1)), repeats, setup=rebuild),
+        files=scenario.files * (len(checkpoints) - 1),
+        nbytes=total * (len(checkpoints) - 1),
+    )
+    shutil.rmtree(retention_root, ignore_errors=True)
+    shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def run(
+    scenarios: List[Scenario],
+    *,
+    workdir: Optional[Path] = None,
+    repeats: int = 3,
+    threads: Sequence[int] = (1, 4, 16),
+) -> Dict[str, Any]:
+    """Run ``scenarios`` under ``workdir`` (a temp dir by default) and return the JSON-ready report.
+
+    Pick ``workdir`` on the storage tier being measured. Timings include the
+    page cache as it is after generation; they compare runs, not disks.
+    """
+    results: List[BenchResult] = []
+    with tempfile.TemporaryDirectory(prefix="ckptkit-bench-", dir=workdir) as tmp:
+        for scenario in scenarios:
+            results.extend(run_scenario(scenario, Path(tmp), repeats=repeats, threads=threads))
+    return {
+        "version": RESULTS_VERSION,
+        "ckptkit": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.time(),
+        "results": [r.to_dict() for r in results],
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], *, threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """Results whose median got slower than ``baseline`` by more than ``threshold`` (0.2 = 20%)."""
+    if baseline.get("version") != current.get("version"):
+        raise ValueError(f"baseline has results version {baseline.get('version')}, expected {current.get('version')}")
+    before = {(r["scenario"], r["name"]): r for r in baseline["results"]}
+    regressions: List[Dict[str, Any]] = []
+    for result in current["results"]:
+        old = before.get((result["scenario"], result["name"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "scenario": result["scenario"],
+                    "name": result["name"],
+                    "baseline_seconds": old["seconds"],
+                    "seconds": result["seconds"],
+                    "slowdown": round(ratio, 3),
+                }
+            )
+    return regressions
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
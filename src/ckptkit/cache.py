@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .chunkstore import ChunkStore
+from .fs import _tmp_name
+from .manifest import MANIFEST_NAME, iter_manifest_entries
+from .validate import Issue, ValidationResult
+
+CACHE_NAME = ".ckptkit-validation-cache.json"
+CACHE_VERSION = 1
+
+
+class ValidationCache:
+    """Persistent cache of validation results stored in the checkpoint root.
+
+    Entries are keyed by checkpoint name and hash mode and are only reused while
+    the fingerprint (inode, size and mtime_ns of every file and of every chunk
+    the manifest references in the root's chunk store, plus the manifest
+    digest) is unchanged. Least recently used entries are evicted beyond
+    ``max_entries``, and entries for checkpoints that no longer exist are dropped
+    on save.
+    """
+
+    def __init__(self, root: Path, *, max_entries: int = 1024, autosave: bool = True):
+        self.root = root
+        self.path = root / CACHE_NAME
+        self.max_entries = max_entries
+        self.autosave = autosave
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return {}
+        entries = data.get("entries", {})
+        return entries if isinstance(entries, dict) else {}
+
+    @staticmethod
+    def _entry_key(checkpoint: Path, mode: str) -> str:
+        return f"{checkpoint.name}|{mode}"
+
+    def fingerprint(self, checkpoint: Path, mode: str) -> Optional[str]:
+        h = hashlib.sha256(mode.encode("utf-8"))
+        try:
+            with open(checkpoint / MANIFEST_NAME, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+            for dirpath, dirnames, filenames in os.walk(checkpoint):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    full = Path(dirpath) / name
+                    st = full.stat()
+                    rel = full.relative_to(checkpoint).as_posix()
+                    h.update(f"{rel}\0{st.st_ino}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+            # Deduplicated files keep their bytes outside the checkpoint directory.
+            digests = sorted(
+                {d for e in iter_manifest_entries(checkpoint / MANIFEST_NAME) if e.chunks for d, _ in e.chunks}
+            )
+            if digests:
+                store = ChunkStore.for_checkpoint(checkpoint)
+                if store is None:
+                    return None
+                for digest in digests:
+                    st = store.chunk_path(digest).stat()
+                    h.update(f"chunk:{digest}\0{st.st_ino}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+        except (OSError, ValueError):
+            return None
+        return h.hexdigest()
+
+    def get(self, checkpoint: Path, mode: str, fingerprint: Optional[str]) -> Optional[ValidationResult]:
+        if fingerprint is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(self._entry_key(checkpoint, mode))
+            if entry is None or entry.get("fingerprint") != fingerprint:
+                return None
+            entry["last_used"] = time.time()
+            self._dirty = True
+        return ValidationResult(
+            checkpoint=checkpoint,
+            valid=bool(entry["valid"]),
+            issues=[Issue.from_dict(i) for i in entry.get("issues", [])],
+        )
+
+    def put(self, result: ValidationResult, mode: str, fingerprint: Optional[str]) -> None:
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._entries[self._entry_key(result.checkpoint, mode)] = {
+                "fingerprint": fingerprint,
+                "valid": result.valid,
+                "issues": [i.to_dict() for i in result.issues],
+                "last_used": time.time(),
+            }
+            self._dirty = True
+        if self.autosave:
+            self.save()
+
+    def invalidate(self, checkpoint: Path) -> None:
+        prefix = f"{checkpoint.name}|"
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+                self._dirty = True
+        if self.autosave:
+            self.save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+        self.path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _evict(self) -> None:
+        for key in list(self._entries):
+            if not (self.root / key.split("|", 1)[0]).is_dir():
+                del self._entries[key]
+        excess = len(self._entries) - self.max_entries
+        if excess > 0:
+            oldest = sorted(self._entries, key=lambda k: self._entries[k].get("last_used", 0.0))
+            for key in oldest[:excess]:
+                del self._entries[key]
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._evict()
+            payload = json.dumps({"version": CACHE_VERSION, "entries": self._entries}, sort_keys=True)
+            self._dirty = False
+        if not self.root.exists():
+            return
+        tmp = self.root / _tmp_name("validation_cache")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+        finally:
+            tmp.unlink(missing_ok=True)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .fs import _tmp_name
+from .manifest import MANIFEST_NAME, Manifest, read_manifest_header
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+CATALOG_NAME = ".ckptkit-catalog.jsonl"
+
+
+@dataclasses.dataclass
+class CatalogEntry:
+    # Path of the checkpoint relative to the root, e.g. "step-10" or "corrupt/step-7-<uuid>".
+    location: str
+    step: int
+    run_id: str
+    created_at: float
+    total_bytes: int
+    manifest_mtime_ns: int
+    parent: Optional[int] = None
+    status: str = "unknown"
+
+    @property
+    def quarantined(self) -> bool:
+        return "/" in self.location
+
+
+def _location(record: Dict[str, Any]) -> str:
+    return record["location"] if record["op"] == "remove" else record["entry"]["location"]
+
+
+class Catalog:
+    """Append-only index of the checkpoints under a root.
+
+    Every change is one fsynced JSON line (``put``/``remove``) appended under a
+    file lock; the log is compacted into a snapshot once it holds more than
+    ``compact_ratio`` records per live entry. ``refresh`` reconciles the index
+    with the directory (one listdir plus a stat per checkpoint) and only parses
+    manifests that are new or changed; it only writes the log with ``persist``.
+    """
+
+    def __init__(self, root: Path, *, compact_ratio: float = 4.0):
+        self.root = root
+        self.path = root / CATALOG_NAME
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._records = 0
+        # Reconciled by read-only refreshes but not in the log; reapplied whenever the log is reloaded.
+        self._unsaved: Dict[str, Dict[str, Any]] = {}
+        self._overlay: List[Dict[str, Any]] = []
+        self._load()
+
+    def _load(self) -> None:
+        self._entries = {}
+        self._records = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append; ignore it.
+                        continue
+                    self._apply(record)
+                    self._records += 1
+        except FileNotFoundError:
+            pass
+        self._overlay = []
+        for location, record in self._unsaved.items():
+            logged = self._entries.get(location)
+            if record["op"] == "remove" or logged is None or (
+                logged.manifest_mtime_ns != record["entry"]["manifest_mtime_ns"]
+            ):
+                self._apply(record)
+                self._overlay.append(record)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record.get("op")
+        if op == "put":
+            entry = CatalogEntry(**record["entry"])
+            self._entries[entry.location] = entry
+        elif op == "remove":
+            self._entries.pop(record["location"], None)
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None or not self.root.is_dir():
+            yield
+            return
+        with open(self.root / (CATALOG_NAME + ".lock"), "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _append(self, build: Callable[[], List[Dict[str, Any]]]) -> None:
+        # ``build`` runs under the locks, against the log as other processes left it.
+        with self._lock, self._file_lock():
+            self._load()
+            records = build()
+            if not records:
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, sort_keys=True) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for record in records:
+                self._apply(record)
+                self._unsaved.pop(_location(record), None)
+            self._records += len(records)
+            if self._records > max(16, self.compact_ratio * len(self._entries)):
+                self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        tmp = self.root / _tmp_name("catalog")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps({"op": "put", "entry": dataclasses.asdict(entry)}, sort_keys=True) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self._records = len(self._entries)
+        self._unsaved.clear()
+        self._overlay = []
+
+    def compact(self) -> None:
+        with self._lock, self._file_lock():
+            self._load()
+            self._compact_locked()
+
+    def _entry_for(self, checkpoint: Path, header: Dict[str, Any], status: str) -> CatalogEntry:
+        return CatalogEntry(
+            location=checkpoint.relative_to(self.root).as_posix(),
+            step=int(header["step"]),
+            run_id=str(header["run_id"]),
+            created_at=float(header["created_at"]),
+            total_bytes=int(header["total_bytes"]),
+            manifest_mtime_ns=(checkpoint / MANIFEST_NAME).stat().st_mtime_ns,
+            parent=header.get("parent"),
+            status=status,
+        )
+
+    def add(self, checkpoint: Path, manifest: Manifest, *, status: str = "unknown") -> None:
+        entry = self._entry_for(checkpoint, manifest.header(), status)
+        self._append(lambda: [{"op": "put", "entry": dataclasses.asdict(entry)}])
+
+    def remove(self, checkpoint: Path) -> None:
+        location = checkpoint.relative_to(self.root).as_posix()
+        with self._lock:
+            if location not in self._entries:
+                return
+        self._append(lambda: [{"op": "remove", "location": location}] if location in self._entries else [])
+
+    def move(self, checkpoint: Path, target: Path, *, status: str) -> None:
+        def build() -> List[Dict[str, Any]]:
+            old = self._entries.get(checkpoint.relative_to(self.root).as_posix())
+            if old is None:
+                return []
+            moved = dataclasses.replace(old, location=target.relative_to(self.root).as_posix(), status=status)
+            return [{"op": "remove", "location": old.location}, {"op": "put", "entry": dataclasses.asdict(moved)}]
+
+        self._append(build)
+
+    def set_status(self, checkpoint: Path, status: str) -> None:
+        location = checkpoint.relative_to(self.root).as_posix()
+
+        def build() -> List[Dict[str, Any]]:
+            entry = self._entries.get(location)
+            if entry is None or entry.status == status:
+                return []
+            return [{"op": "put", "entry": dataclasses.asdict(dataclasses.replace(entry, status=status))}]
+
+        # Skip the file lock and log reload when nothing would change.
+        with self._lock:
+            if not build():
+                return
+        self._append(build)
+
+    def refresh(self, *, persist: bool = False) -> bool:
+        """Reconcile the index with the directory and return whether anything changed.
+
+        Without ``persist`` the changes are only applied in memory, so readers
+        never append to the log or create its lock file.
+        """
+        if persist:
+            changed = False
+
+            def build() -> List[Dict[str, Any]]:
+                nonlocal changed
+                records = self._overlay + self._reconcile(self._entries)
+                changed = bool(records)
+                return records
+
+            self._append(build)
+            return changed
+        with self._lock:
+            known = dict(self._entries)
+        records = self._reconcile(known)
+        with self._lock:
+            for record in records:
+                self._apply(record)
+                self._unsaved[_location(record)] = record
+        return bool(records)
+
+    def _reconcile(self, known: Dict[str, CatalogEntry]) -> List[Dict[str, Any]]:
+        records: List[Dict[str, Any]] = []
+        seen = set()
+        if self.root.exists():
+            for child in self.root.iterdir():
+                # Staging dirs of in-flight writes (<name>.tmp-*) are never catalogued.
+                if child.is_symlink() or not child.is_dir() or ".tmp-" in child.name:
+                    continue
+                try:
+                    mtime_ns = (child / MANIFEST_NAME).stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                seen.add(child.name)
+                entry = known.get(child.name)
+                if entry is not None and entry.manifest_mtime_ns == mtime_ns:
+                    continue
+                try:
+                    header = read_manifest_header(child / MANIFEST_NAME)
+                except Exception:
+                    continue
+                entry = self._entry_for(child, header, "unknown")
+                records.append({"op": "put", "entry": dataclasses.asdict(entry)})
+        for location, entry in list(known.items()):
+            if entry.quarantined:
+                if not (self.root / location).is_dir():
+                    records.append({"op": "remove", "location": location})
+            elif location not in seen:
+                records.append({"op": "remove", "location": location})
+        return records
+
+    def entries(self, *, include_quarantined: bool = False) -> List[CatalogEntry]:
+        with self._lock:
+            entries = [e for e in self._entries.values() if include_quarantined or not e.quarantined]
+        return sorted(entries, key=lambda e: (e.step, e.location))
+
+    def get(self, checkpoint: Path) -> Optional[CatalogEntry]:
+        with self._lock:
+            return self._entries.get(checkpoint.relative_to(self.root).as_posix())
+
+    def checkpoints(self) -> List[Path]:
+        return [self.root / e.location for e in self.entries()]
+
+    def step(self, checkpoint: Path) -> int:
+        entry = self.get(checkpoint)
+        return entry.step if entry is not None else -1
+
+    def find(self, step: int) -> Optional[Path]:
+        for entry in self.entries():
+            if entry.step == step:
+                return self.root / entry.location
+        return None
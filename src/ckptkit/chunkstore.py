@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Optional, Set
+
+from .fs import _tmp_name, fsync_dir, remove_empty_dirs
+from .manifest import MANIFEST_NAME, FileEntry, Manifest, iter_manifest_entries, manifest_path, write_manifest
+
+CHUNKS_DIR = ".chunks"
+DEFAULT_CHUNK_SIZE = 4 << 20
+
+
+class ChunkStore:
+    """Content-addressed chunk storage shared by all checkpoints under a root.
+
+    Chunks live at ``<root>/.chunks/<digest[:2]>/<digest>``. Manifests reference
+    them through ``FileEntry.chunks``; a chunk is garbage once no manifest under
+    the root (including ``corrupt/``) references it. ``ingest`` splits files
+    that were already written in full, so the store saves disk space but not
+    write bandwidth.
+    """
+
+    def __init__(self, root: Path, *, chunk_size: int = DEFAULT_CHUNK_SIZE, gc_grace_seconds: float = 3600.0):
+        self.root = root
+        self.path = root / CHUNKS_DIR
+        self.chunk_size = chunk_size
+        self.gc_grace_seconds = gc_grace_seconds
+        self._dirty_dirs: Set[Path] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def for_checkpoint(checkpoint: Path) -> Optional["ChunkStore"]:
+        # Checkpoints sit directly under the root, quarantined ones under <root>/corrupt.
+        for parent in (checkpoint.parent, checkpoint.parent.parent):
+            if (parent / CHUNKS_DIR).is_dir():
+                return ChunkStore(parent)
+        return None
+
+    def chunk_path(self, digest: str) -> Path:
+        return self.path / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        return self.chunk_path(digest).exists()
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.chunk_path(digest)
+        if target.exists():
+            # Refresh mtime so a concurrent GC treats the chunk as recently referenced.
+            os.utime(target)
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.parent / _tmp_name(digest[:8])
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+        with self._lock:
+            self._dirty_dirs.add(target.parent)
+        return digest
+
+    def _ingest_file(self, source: Path, entry: FileEntry) -> None:
+        chunks: List[List[object]] = []
+        with open(source, "rb") as f:
+            for data in iter(lambda: f.read(self.chunk_size), b""):
+                chunks.append([self.put(data), len(data)])
+        entry.chunks = chunks
+        source.unlink()
+
+    def ingest(self, checkpoint_dir: Path, manifest: Manifest, *, threads: int = 4) -> Manifest:
+        """Move every file of ``manifest`` into the store and rewrite the manifest to reference chunks."""
+        pending = [entry for entry in manifest.files if entry.chunks is None and entry.origin is None]
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            list(executor.map(lambda e: self._ingest_file(checkpoint_dir / e.path, e), pending))
+        self._sync_dirty()
+        remove_empty_dirs(checkpoint_dir)
+        write_manifest(manifest_path(checkpoint_dir), manifest)
+        return manifest
+
+    def import_chunks(self, source: "ChunkStore", digests: Iterable[str], *, threads: int = 4) -> int:
+        """Copy the chunks of ``source`` this store lacks; returns how many were copied."""
+        missing = sorted({d for d in digests if not self.has(d)})
+
+        def copy(digest: str) -> None:
+            if self.put(source.chunk_path(digest).read_bytes()) != digest:
+                raise ValueError(f"chunk {digest} in {source.path} is corrupt")
+
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            list(executor.map(copy, missing))
+        self._sync_dirty()
+        return len(missing)
+
+    def _sync_dirty(self) -> None:
+        with self._lock:
+            dirty, self._dirty_dirs = self._dirty_dirs, set()
+        for directory in sorted(dirty):
+            fsync_dir(directory)
+        if dirty:
+            fsync_dir(self.path)
+
+    def open(self, entry: FileEntry) -> "ChunkedReader":
+        if entry.chunks is None:
+            raise ValueError(f"{entry.path} is not stored in the chunk store")
+        return ChunkedReader(self, entry.chunks)
+
+    def referenced(self, manifests: Iterable[Path]) -> Set[str]:
+        digests: Set[str] = set()
+        for path in manifests:
+            try:
+                for entry in iter_manifest_entries(path):
+                    for digest, _ in entry.chunks or []:
+                        digests.add(digest)
+            except Exception:
+                continue
+        return digests
+
+    def _manifest_paths(self) -> List[Path]:
+        paths: List[Path] = []
+        for parent in (self.root, self.root / "corrupt"):
+            if not parent.is_dir():
+                continue
+            for child in parent.iterdir():
+                candidate = child / MANIFEST_NAME
+                if child.is_dir() and not child.is_symlink() and candidate.exists():
+                    paths.append(candidate)
+        return paths
+
+    def collect_garbage(self) -> int:
+        if not self.path.is_dir():
+            return 0
+        live = self.referenced(self._manifest_paths())
+        cutoff = time.time() - self.gc_grace_seconds
+        removed = 0
+        for bucket in self.path.iterdir():
+            if not bucket.is_dir():
+                continue
+            for chunk in bucket.iterdir():
+                if chunk.name in live or chunk.name.startswith("."):
+                    continue
+                try:
+                    if chunk.stat().st_mtime > cutoff:
+                        continue
+                    chunk.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+
+class ChunkedReader:
+    """Read-only, seekable file object over a list of chunks."""
+
+    def __init__(self, store: ChunkStore, chunks: List[List[object]]):
+        self._store = store
+        self._digests = [str(c[0]) for c in chunks]
+        self._offsets: List[int] = []
+        total = 0
+        for _, size in chunks:
+            self._offsets.append(total)
+            total += int(size)  # type: ignore[arg-type]
+        self.size = total
+        self._pos = 0
+        self._index = -1
+        self._handle: Optional[BinaryIO] = None
+
+    def __enter__(self) -> "ChunkedReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def _chunk(self, index: int) -> BinaryIO:
+        if index != self._index:
+            self.close()
+            self._handle = open(self._store.chunk_path(self._digests[index]), "rb")
+            self._index = index
+        assert self._handle is not None
+        return self._handle
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.size - self._pos
+        parts: List[bytes] = []
+        while n > 0 and self._pos < self.size:
+            index = bisect.bisect_right(self._offsets, self._pos) - 1
+            handle = self._chunk(index)
+            handle.seek(self._pos - self._offsets[index])
+            data = handle.read(n)
+            if not data:
+                break
+            parts.append(data)
+            self._pos += len(data)
+            n -= len(data)
+        return b"".join(parts)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._index = -1
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import dataclasses
 import json
 import os
@@ -9,16 +10,56 @@ import time
 from pathlib import Path
 
 from .atomic import atomic_checkpoint_write
+from .bench import PRESETS, compare as compare_bench, load_results, run as run_bench
+from .cache import ValidationCache
+from .catalog import Catalog
+from .chunkstore import ChunkStore
+from .compression import DEFAULT_FRAME_SIZE, available_codecs, measure_codecs
+from .durability import DurabilityEngine, DurabilityMode
+from .exporter import MetricsServer
 from .config import Config, HashingConfig, RetentionConfig
+from .hashing import HashingSink, available_algorithms
 from .logging import log_event, setup_logging
 from .manifest import compute_manifest, manifest_path, write_manifest
-from .metrics import MetricsEmitter, record_checkpoint_write, record_disk_free, record_resume_plan, record_validation_metrics
+from .metrics import (
+    MetricsEmitter,
+    StatePersister,
+    persisted_counters,
+    record_catalog,
+    record_checkpoint_write,
+    record_disk_free,
+    record_resume_plan,
+    record_trace,
+    record_validation_metrics,
+    state_path,
+)
 from .quarantine import quarantine as quarantine_ckpt
+from .reaper import Reaper
 from .resume import Policy, select_checkpoint
-from .validate import validate_checkpoint
+from .storage import open_backend, write_checkpoint
+from .tiering import TieredStorage
+from .tracing import Tracer, tracing
+from .throttle import IOPRIO_CLASSES, IOBudget
+from .validate import validate_checkpoint, validate_checkpoints
+from .watch import CheckpointWatcher
 from .fs import ensure_dir, list_checkpoints
 
 
+def _add_throttle_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--max-inflight", type=int, default=None, help="Cap on concurrent reads")
+    parser.add_argument("--max-bytes-per-second", type=float, default=None, help="Cap on total read throughput")
+    parser.add_argument("--max-iops", type=float, default=None, help="Cap on total read operations per second")
+    parser.add_argument(
+        "--latency-target-ms", type=float, default=None, help="Back off while reads are slower than this"
+    )
+    parser.add_argument(
+        "--io-class", choices=sorted(IOPRIO_CLASSES), default=None, help="I/O priority class of readers"
+    )
+    parser.add_argument(
+        "--nice", type=int, default=None, help="Niceness of reader threads (needs root or RLIMIT_NICE, else skipped)"
+    )
+
+
 def parse_args(argv: list[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(prog="ckptkit", description="Checkpointing & Recovery Toolkit")
     parser.add_argument("--config", help="YAML config path", default=None)
@@ -37,22 +78,69 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     write.add_argument("--model-name", default=None)
     write.add_argument("--keep-last", type=int, default=None)
     write.add_argument("--keep-every", type=int, default=None)
+    write.add_argument(
+        "--defer-retention", action="store_true", help="Move old checkpoints to the trash for `ckptkit reap`"
+    )
+    write.add_argument("--dedup", action="store_true", help="Store file contents in the root's chunk store")
+    write.add_argument("--delta", action="store_true", help="Write a delta checkpoint against the previous step")
+    write.add_argument(
+        "--durability", choices=[m.value for m in DurabilityMode], default=None, help="How the checkpoint is fsynced"
+    )
+    write.add_argument(
+        "--hash-algorithm",
+        choices=available_algorithms(),
+        default=None,
+        help="Digest recorded in the manifest (validation reads it back from the manifest)",
+    )
+    write.add_argument(
+        "--manifest-format",
+        choices=["auto", "json", "ndjson"],
+        default="auto",
+        help="Manifest encoding (auto picks ndjson for large file counts)",
+    )
+    write.add_argument(
+        "--merkle-chunk-size", type=int, default=None, help="Record per-chunk digests for files larger than this"
+    )
+    write.add_argument(
+        "--stripes", type=int, default=None, help="Record digests of N stripes per large file for sampled validation"
+    )
+    write.add_argument("--stripe-fraction", type=float, default=None, help="Fraction of each file the stripes cover")
+    write.add_argument("--stripe-seed", type=int, default=None, help="Place stripes at seeded-random positions")
+    write.add_argument(
+        "--cold-root", default=None, help="Migrate the checkpoint to this capacity tier after committing it under --root"
+    )
+    write.add_argument("--compress", choices=available_codecs(), default=None, help="Store files compressed")
+    write.add_argument("--compression-level", type=int, default=None)
+    write.add_argument("--trace", default=None, help="Write a Chrome trace of the checkpoint phases to this path")
 
     val = sub.add_parser("validate", help="Validate a single checkpoint")
     val.add_argument("path", help="Path to checkpoint directory")
     val.add_argument("--full", action="store_true", help="Full hash verification")
     val.add_argument("--sample-bytes", type=int, default=65536)
+    val.add_argument("--no-cache", action="store_true", help="Bypass the validation cache")
+    val.add_argument("--trace", default=None, help="Write a Chrome trace of the validation phases to this path")
 
     scan = sub.add_parser("scan", help="Validate all checkpoints under root")
     scan.add_argument("root", help="Checkpoint root")
     scan.add_argument("--full", action="store_true")
     scan.add_argument("--sample-bytes", type=int, default=65536)
+    scan.add_argument("--no-cache", action="store_true", help="Bypass the validation cache")
+    scan.add_argument("--workers", type=int, default=None, help="Checkpoints validated concurrently")
+    _add_throttle_args(scan)
 
     resume_cmd = sub.add_parser("resume", help="Choose checkpoint to resume")
     resume_cmd.add_argument("root", help="Checkpoint root")
     resume_cmd.add_argument("--policy", choices=[p.value for p in Policy], default=Policy.LATEST_VALID.value)
     resume_cmd.add_argument("--before-step", type=int, default=None)
     resume_cmd.add_argument("--full", action="store_true")
+    resume_cmd.add_argument("--no-cache", action="store_true", help="Bypass the validation cache")
+    resume_cmd.add_argument(
+        "--speculate", type=int, default=0, help="Validate up to N older candidates in parallel with the current one"
+    )
+    resume_cmd.add_argument(
+        "--tier", action="append", default=None, help="Slower root also holding checkpoints of this run (repeatable)"
+    )
+    resume_cmd.add_argument("--trace", default=None, help="Write a Chrome trace of the resume phases to this path")
 
     quarantine_cmd = sub.add_parser("quarantine", help="Quarantine a checkpoint")
     quarantine_cmd.add_argument("path", help="Path to checkpoint")
@@ -63,6 +151,50 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     metrics_cmd.add_argument("--textfile", help="Write metrics to textfile for node_exporter")
     metrics_cmd.add_argument("--pushgateway", help="Pushgateway base URL")
     metrics_cmd.add_argument("--job", default="ckptkit")
+    metrics_cmd.add_argument("--no-cache", action="store_true", help="Bypass the validation cache")
+
+    watch_cmd = sub.add_parser("watch", help="Validate new checkpoints as they appear and recheck old ones")
+    watch_cmd.add_argument("root", help="Checkpoint root")
+    watch_cmd.add_argument("--full", action="store_true")
+    watch_cmd.add_argument("--sample-bytes", type=int, default=None)
+    watch_cmd.add_argument("--recheck-interval", type=float, default=None, help="Seconds between rechecks")
+    watch_cmd.add_argument("--poll-interval", type=float, default=None, help="Seconds between polls without inotify")
+    watch_cmd.add_argument("--no-inotify", action="store_true", help="Always poll the root")
+    watch_cmd.add_argument("--textfile", help="Rewrite this node_exporter textfile after each validation")
+    watch_cmd.add_argument("--metrics-port", type=int, default=None, help="Serve /metrics on this port")
+    watch_cmd.add_argument("--metrics-state", default=None, help="Persist counters here across restarts")
+    watch_cmd.add_argument("--no-cache", action="store_true", help="Bypass the validation cache")
+    _add_throttle_args(watch_cmd)
+
+    codecs_cmd = sub.add_parser("measure-compression", help="Report ratio and throughput of each codec on a checkpoint")
+    codecs_cmd.add_argument("path", help="Path to checkpoint directory")
+    codecs_cmd.add_argument("--codec", action="append", choices=available_codecs(), help="Codec to measure (repeatable)")
+    codecs_cmd.add_argument("--level", type=int, default=None)
+    codecs_cmd.add_argument("--frame-size", type=int, default=DEFAULT_FRAME_SIZE)
+    codecs_cmd.add_argument("--threads", type=int, default=4)
+    codecs_cmd.add_argument("--max-bytes", type=int, default=None, help="Only measure the first N bytes")
+
+    bench_cmd = sub.add_parser("bench", help="Time write, hash, validate, resume and retention on synthetic roots")
+    bench_cmd.add_argument("--preset", choices=sorted(PRESETS), default="smoke")
+    bench_cmd.add_argument("--workdir", default=None, help="Where synthetic roots are generated (the tier to measure)")
+    bench_cmd.add_argument("--repeats", type=int, default=3)
+    bench_cmd.add_argument("--threads", type=int, action="append", default=None, help="hash_paths thread counts")
+    bench_cmd.add_argument("--out", default=None, help="Write the JSON results here instead of stdout")
+    bench_cmd.add_argument("--baseline", default=None, help="Fail if slower than these results")
+    bench_cmd.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown against the baseline")
+
+    reap_cmd = sub.add_parser("reap", help="Delete checkpoints that deferred retention moved to the trash")
+    reap_cmd.add_argument("root", help="Checkpoint root")
+    reap_cmd.add_argument("--threads", type=int, default=None, help="Concurrent unlinks")
+    reap_cmd.add_argument("--files-per-second", type=float, default=None, help="Cap on unlinks per second")
+
+    fetch_cmd = sub.add_parser("fetch", help="Download a checkpoint from the configured storage backend")
+    fetch_cmd.add_argument("name", help="Checkpoint name, e.g. step-100")
+    fetch_cmd.add_argument("dest", help="Local directory to download into")
+
+    cache_cmd = sub.add_parser("invalidate-cache", help="Drop cached validation results")
+    cache_cmd.add_argument("root", help="Checkpoint root")
+    cache_cmd.add_argument("--checkpoint", default=None, help="Only drop entries for this checkpoint")
 
     return parser.parse_args(argv)
 
@@ -76,25 +208,38 @@ def main(argv: list[str] | None = None) -> int:
             keep_last=args.keep_last if args.keep_last is not None else 3,
             keep_every=args.keep_every,
         )
+        overrides = {k: v for k, v in dataclasses.asdict(retention).items() if k in ("keep_last", "keep_every")}
         cfg = _load_config(
             args.config,
             {
                 "root": args.root,
                 "job_id": args.job_id,
                 "run_id": args.run_id,
-                "retention": dataclasses.asdict(retention),
+                "retention": overrides,
             },
         )
+        if args.defer_retention:
+            cfg.retention.deferred = True
         root = cfg.root
         ensure_dir(root)
         start = time.time()
+        algorithm = args.hash_algorithm or cfg.hashing.algorithm
+        if args.compress:
+            cfg.compression.codec = args.compress
+        if args.compression_level is not None:
+            cfg.compression.level = args.compression_level
 
         def writer(tmp: Path):
             # Demo checkpoint writer: two shards and metadata.
-            shard1 = tmp / "model.bin"
-            shard1.write_bytes(os.urandom(1024))
-            shard2 = tmp / "optimizer.bin"
-            shard2.write_bytes(os.urandom(512))
+            sink = HashingSink(
+                tmp,
+                sample_bytes=cfg.hashing.sample_bytes,
+                algorithm=algorithm,
+                write_behind_bytes=cfg.durability.write_behind_bytes,
+                compression=cfg.compression,
+            )
+            sink.write_bytes("model.bin", os.urandom(1024))
+            sink.write_bytes("optimizer.bin", os.urandom(512))
             meta = {
                 "step": args.step,
                 "job_id": args.job_id,
@@ -110,22 +255,82 @@ def main(argv: list[str] | None = None) -> int:
                 framework=args.framework,
                 precision=args.precision,
                 model_name=args.model_name,
+                sample_bytes=cfg.hashing.sample_bytes,
+                recorded=sink.records(),
+                merkle_chunk_size=args.merkle_chunk_size or cfg.hashing.merkle_chunk_size,
+                stripes=args.stripes or cfg.hashing.stripes,
+                stripe_fraction=(
+                    args.stripe_fraction if args.stripe_fraction is not None else cfg.hashing.stripe_fraction
+                ),
+                stripe_seed=args.stripe_seed if args.stripe_seed is not None else cfg.hashing.stripe_seed,
+                algorithm=algorithm,
+                compression=sink.compression(),
+            )
+            write_manifest(
+                manifest_path(tmp), manifest, fmt=None if args.manifest_format == "auto" else args.manifest_format
             )
-            write_manifest(manifest_path(tmp), manifest)
             return manifest
 
         dest_dir = root / f"step-{args.step}"
-        manifest = atomic_checkpoint_write(dest_dir, writer, retention=cfg.retention)
+        chunk_store = None
+        if args.dedup or cfg.chunks.enabled:
+            chunk_store = ChunkStore(
+                root, chunk_size=cfg.chunks.chunk_size, gc_grace_seconds=cfg.chunks.gc_grace_seconds
+            )
+        if args.delta:
+            cfg.delta.enabled = True
+        durability = DurabilityEngine(args.durability or cfg.durability.mode, threads=cfg.durability.threads)
+        if args.cold_root:
+            cfg.tiering.cold_root = args.cold_root
+        tracer = Tracer()
+        with tracing(tracer):
+            if cfg.storage.backend != "posix":
+                backend = open_backend(root, cfg.storage)
+                try:
+                    manifest = write_checkpoint(backend, dest_dir.name, writer, retention=cfg.retention)
+                finally:
+                    backend.close()
+            elif cfg.tiering.cold_root:
+                # The demo waits for the migration; a training job keeps going while it runs.
+                with TieredStorage(
+                    root,
+                    Path(cfg.tiering.cold_root),
+                    hot_retention=RetentionConfig(keep_last=cfg.tiering.hot_keep_last),
+                    cold_retention=cfg.retention,
+                    durability=durability,
+                    threads=cfg.tiering.threads,
+                    hot_catalog=_open_catalog(cfg),
+                    sample_bytes=cfg.hashing.sample_bytes,
+                ) as tiered:
+                    tiered.resume()
+                    manifest = tiered.write(dest_dir.name, writer, chunk_store=chunk_store, delta=cfg.delta)
+                    tiered.wait()
+            else:
+                manifest = atomic_checkpoint_write(
+                    dest_dir,
+                    writer,
+                    retention=cfg.retention,
+                    chunk_store=chunk_store,
+                    delta=cfg.delta,
+                    durability=durability,
+                    catalog=_open_catalog(cfg),
+                    cache=_open_cache(cfg, not cfg.delta.enabled),
+                    sample_bytes=cfg.hashing.sample_bytes,
+                )
         duration = time.time() - start
         emitter = MetricsEmitter({"job_id": cfg.job_id, "run_id": cfg.run_id})
         total_bytes = sum(f.size for f in manifest.files)
-        record_checkpoint_write(
-            emitter,
-            checkpoint_path=dest_dir,
-            manifest_step=manifest.step,
-            duration_seconds=duration,
-            total_bytes=float(total_bytes),
-        )
+        with contextlib.ExitStack() as stack:
+            if cfg.metrics.state_file:
+                stack.enter_context(persisted_counters(emitter, state_path(Path(cfg.metrics.state_file), "write")))
+            record_checkpoint_write(
+                emitter,
+                checkpoint_path=dest_dir,
+                manifest_step=manifest.step,
+                duration_seconds=duration,
+                total_bytes=float(total_bytes),
+            )
+            record_trace(emitter, tracer)
         log_event(
             logger,
             event="checkpoint_written",
@@ -134,24 +339,41 @@ def main(argv: list[str] | None = None) -> int:
             step=args.step,
             job_id=cfg.job_id,
             run_id=cfg.run_id,
+            timings=durability.last_stats.timings,
         )
+        tracer.log(logger, checkpoint_path=str(dest_dir), step=args.step, job_id=cfg.job_id, run_id=cfg.run_id)
+        if args.trace:
+            tracer.write_chrome_trace(Path(args.trace))
         print(emitter.text())
         return 0
 
     if args.command == "validate":
-        res = validate_checkpoint(Path(args.path), full_hash=args.full, sample_bytes=args.sample_bytes)
+        ckpt = Path(args.path)
+        cfg = _load_config(args.config, {"root": str(ckpt.parent)})
+        cache = _open_cache(cfg, args.no_cache)
+        tracer = Tracer()
+        with tracing(tracer):
+            res = validate_checkpoint(ckpt, full_hash=args.full, sample_bytes=args.sample_bytes, cache=cache)
+        if args.trace:
+            tracer.write_chrome_trace(Path(args.trace))
         print(res.summary())
         return 0 if res.valid else 1
 
     if args.command == "scan":
         cfg = _load_config(args.config, {"root": args.root})
         root = cfg.root
-        results = [
-            validate_checkpoint(
-                ckpt, full_hash=args.full, sample_bytes=args.sample_bytes if args.sample_bytes else cfg.hashing.sample_bytes
-            )
-            for ckpt in list_checkpoints(root)
-        ]
+        cache = _open_cache(cfg, args.no_cache, autosave=False)
+        _apply_throttle_args(cfg, args)
+        results = validate_checkpoints(
+            _checkpoints(root, _open_catalog(cfg)),
+            full_hash=args.full,
+            sample_bytes=args.sample_bytes if args.sample_bytes else cfg.hashing.sample_bytes,
+            cache=cache,
+            workers=args.workers or cfg.hashing.scan_workers,
+            budget=_io_budget(cfg),
+        )
+        if cache:
+            cache.save()
         for res in results:
             print(res.summary())
         invalid = [r for r in results if not r.valid]
@@ -159,36 +381,60 @@ def main(argv: list[str] | None = None) -> int:
 
     if args.command == "resume":
         cfg = _load_config(args.config, {"root": args.root})
-        plan = select_checkpoint(
-            cfg.root,
-            policy=Policy(args.policy),
-            before_step=args.before_step,
-            full_hash=args.full,
-        )
+        cache = _open_cache(cfg, args.no_cache, autosave=False)
+        tracer = Tracer()
+        with tracing(tracer):
+            plan = select_checkpoint(
+                cfg.root,
+                policy=Policy(args.policy),
+                before_step=args.before_step,
+                full_hash=args.full,
+                cache=cache,
+                catalog=_open_catalog(cfg),
+                speculate=args.speculate,
+                tiers=[Path(t) for t in args.tier or ([cfg.tiering.cold_root] if cfg.tiering.cold_root else [])],
+            )
+        if args.trace:
+            tracer.write_chrome_trace(Path(args.trace))
+        if cache:
+            cache.save()
         print(json.dumps({"checkpoint": str(plan.checkpoint), "step": plan.step, "reason": plan.reason}))
         return 0
 
     if args.command == "quarantine":
         ckpt = Path(args.path)
-        target = quarantine_ckpt(ckpt, root=ckpt.parent, reason=args.reason)
+        cfg = _load_config(args.config, {"root": str(ckpt.parent)})
+        target = quarantine_ckpt(ckpt, root=ckpt.parent, reason=args.reason, catalog=_open_catalog(cfg))
         print(f"quarantined to {target}")
         return 0
 
     if args.command == "emit-metrics":
         cfg = _load_config(args.config, {"root": args.root})
         root = cfg.root
-        results = [validate_checkpoint(ckpt, full_hash=False, sample_bytes=65536) for ckpt in list_checkpoints(root)]
+        cache = _open_cache(cfg, args.no_cache, autosave=False)
+        catalog = _open_catalog(cfg)
+        results = validate_checkpoints(
+            _checkpoints(root, catalog),
+            sample_bytes=65536,
+            cache=cache,
+            workers=cfg.hashing.scan_workers,
+            budget=_io_budget(cfg),
+        )
         plan = None
         if results:
             try:
-                plan = select_checkpoint(root)
+                plan = select_checkpoint(root, cache=cache, catalog=catalog)
             except Exception:
                 plan = None
+        if cache:
+            cache.save()
         emitter = MetricsEmitter()
         record_validation_metrics(emitter, results)
         if plan:
             record_resume_plan(emitter, plan)
         record_disk_free(emitter, root)
+        if catalog:
+            record_catalog(emitter, catalog)
         textfile_path = args.textfile or cfg.metrics.textfile
         pushgateway_url = args.pushgateway or cfg.metrics.pushgateway
         if textfile_path:
@@ -198,14 +444,169 @@ def main(argv: list[str] | None = None) -> int:
         print(emitter.text())
         return 0
 
-    return 1
+    if args.command == "watch":
+        cfg = _load_config(args.config, {"root": args.root})
+        _apply_throttle_args(cfg, args)
+        textfile = args.textfile or cfg.metrics.textfile
+        emitter = MetricsEmitter(cfg.metrics.labels)
+        port = args.metrics_port or cfg.metrics.port
+        state_file = None
+        if args.metrics_state:
+            state_file = Path(args.metrics_state)
+        elif cfg.metrics.state_file:
+            state_file = state_path(Path(cfg.metrics.state_file), "watch")
+        server = None
+        state = None
+        if port:
+            server = MetricsServer(emitter, port=port, state_path=state_file).start()
+        elif state_file is not None:
+            # Without the HTTP server the textfile is the only output, so counters still need restoring.
+            state = StatePersister(emitter, state_file).start()
+        watcher = CheckpointWatcher(
+            cfg.root,
+            full_hash=args.full or cfg.hashing.full,
+            sample_bytes=args.sample_bytes or cfg.hashing.sample_bytes,
+            recheck_interval=args.recheck_interval or cfg.watch.recheck_interval,
+            poll_interval=args.poll_interval or cfg.watch.poll_interval,
+            use_inotify=cfg.watch.inotify and not args.no_inotify,
+            cache=_open_cache(cfg, args.no_cache),
+            budget=_io_budget(cfg),
+            logger=logger,
+            emitter=emitter,
+            textfile=Path(textfile) if textfile else None,
+        )
+        reaper = None
+        if cfg.retention.deferred:
+            reaper = Reaper(
+                cfg.root, threads=cfg.retention.reap_threads, files_per_second=cfg.retention.reap_files_per_second
+            )
+            reaper.start()
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if server is not None:
+                server.stop()
+            if state is not None:
+                state.stop()
+            if reaper is not None:
+                reaper.stop(drain=False)
+        return 0
+
+    if args.command == "bench":
+        report = run_bench(
+            PRESETS[args.preset],
+            workdir=Path(args.workdir) if args.workdir else None,
+            repeats=args.repeats,
+            threads=args.threads or (1, 4, 16),
+        )
+        text = json.dumps(report, indent=2, sort_keys=True)
+        if args.out:
+            Path(args.out).write_text(text + "\n", encoding="utf-8")
+        else:
+            print(text)
+        if args.baseline:
+            regressions = compare_bench(report, load_results(Path(args.baseline)), threshold=args.threshold)
+            for regression in regressions:
+                print(json.dumps(regression, sort_keys=True), file=sys.stderr)
+            return 1 if regressions else 0
+        return 0
 
+    if args.command == "reap":
+        cfg = _load_config(args.config, {"root": args.root})
+        reaper = Reaper(
+            cfg.root,
+            threads=args.threads or cfg.retention.reap_threads,
+            files_per_second=args.files_per_second or cfg.retention.reap_files_per_second,
+        )
+        removed = reaper.reap()
+        print(json.dumps({"root": str(cfg.root), "files_removed": removed}))
+        return 0
 
-if __name__ == "__main__":  # pragma: no cover
-    sys.exit(main())
+    if args.command == "measure-compression":
+        reports = measure_codecs(
+            Path(args.path),
+            codecs=args.codec,
+            level=args.level,
+            frame_size=args.frame_size,
+            threads=args.threads,
+            max_bytes=args.max_bytes,
+        )
+        for report in reports:
+            print(json.dumps(report.to_dict(), sort_keys=True))
+        return 0
+
+    if args.command == "fetch":
+        cfg = _load_config(args.config, {})
+        backend = open_backend(cfg.root, cfg.storage)
+        if args.name not in backend.list_checkpoints():
+            print(f"no committed checkpoint named {args.name}", file=sys.stderr)
+            backend.close()
+            return 1
+        ensure_dir(Path(args.dest))
+        try:
+            backend.fetch(args.name, Path(args.dest))
+        finally:
+            backend.close()
+        print(args.dest)
+        return 0
+
+    if args.command == "invalidate-cache":
+        cache = ValidationCache(Path(args.root))
+        if args.checkpoint:
+            cache.invalidate(Path(args.checkpoint))
+        else:
+            cache.clear()
+        return 0
+
+    return 1
 
 
 def _load_config(config_path: str | None, overrides: dict) -> Config:
     if config_path:
         return Config.load(config_path, overrides)
     return Config.from_dict(overrides)
+
+
+def _open_cache(cfg: Config, disabled: bool, *, autosave: bool = True) -> ValidationCache | None:
+    if disabled or not cfg.cache.enabled or not cfg.root.is_dir():
+        return None
+    return ValidationCache(cfg.root, max_entries=cfg.cache.max_entries, autosave=autosave)
+
+
+def _open_catalog(cfg: Config) -> Catalog | None:
+    if not cfg.catalog.enabled or not cfg.root.is_dir():
+        return None
+    return Catalog(cfg.root, compact_ratio=cfg.catalog.compact_ratio)
+
+
+def _apply_throttle_args(cfg: Config, args: argparse.Namespace) -> None:
+    if args.max_inflight is not None:
+        cfg.hashing.threads = args.max_inflight
+    for name in ("max_bytes_per_second", "max_iops", "latency_target_ms", "io_class", "nice"):
+        if getattr(args, name) is not None:
+            setattr(cfg.hashing, name, getattr(args, name))
+
+
+def _io_budget(cfg: Config) -> IOBudget:
+    hashing = cfg.hashing
+    return IOBudget(
+        max_inflight=hashing.threads,
+        bytes_per_second=hashing.max_bytes_per_second,
+        iops=hashing.max_iops,
+        latency_target=hashing.latency_target_ms / 1000.0 if hashing.latency_target_ms else None,
+        io_class=hashing.io_class,
+        nice=hashing.nice,
+    )
+
+
+def _checkpoints(root: Path, catalog: Catalog | None) -> list[Path]:
+    if catalog is None:
+        return list_checkpoints(root)
+    catalog.refresh()
+    return catalog.checkpoints()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import collections
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Optional, Tuple
+
+# Compressed files are a sequence of independently compressed frames of
+# ``frame_size`` raw bytes, followed by an index of the stored frame lengths and
+# a fixed footer. Frames compress in parallel on write, and a reader seeks by
+# decompressing only the frames a range touches, so sampled hashing of a
+# compressed file still reads just its head and tail.
+MAGIC = b"CKZ1"
+DEFAULT_FRAME_SIZE = 4 << 20
+# index offset, raw size, frame count, frame size, magic
+_FOOTER = struct.Struct("<QQII4s")
+_LENGTH = struct.Struct("<I")
+
+# name -> (compress(data, level), decompress(data, raw_size)). Codecs must be
+# safe to call from several threads at once.
+_CODECS: Dict[str, Tuple[Callable[[bytes, Optional[int]], bytes], Callable[[bytes, int], bytes]]] = {}
+
+
+def register_codec(
+    name: str, compress: Callable[[bytes, Optional[int]], bytes], decompress: Callable[[bytes, int], bytes]
+) -> None:
+    _CODECS[name] = (compress, decompress)
+
+
+def available_codecs() -> List[str]:
+    return sorted(_CODECS)
+
+
+def _codec(name: str) -> Tuple[Callable[[bytes, Optional[int]], bytes], Callable[[bytes, int], bytes]]:
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(f"unknown codec {name!r}; available: {available_codecs()}") from None
+
+
+register_codec(
+    "zlib",
+    lambda data, level: zlib.compress(data, 6 if level is None else level),
+    lambda data, _: zlib.decompress(data),
+)
+try:
+    import zstandard as _zstd  # type: ignore
+
+    register_codec(
+        "zstd",
+        # Compressor objects are not thread-safe; one per frame is cheap next to a multi-MB frame.
+        lambda data, level: _zstd.ZstdCompressor(level=3 if level is None else level).compress(data),
+        lambda data, raw_size: _zstd.ZstdDecompressor().decompress(data, max_output_size=raw_size),
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+try:
+    import lz4.frame as _lz4  # type: ignore
+
+    register_codec(
+        "lz4",
+        lambda data, level: _lz4.compress(data, compression_level=0 if level is None else level),
+        lambda data, _: _lz4.decompress(data),
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+
+
+class FramedWriter:
+    """Write-only file wrapper that compresses ``frame_size`` blocks on a thread pool.
+
+    Frames are written in order; at most ``2 * threads`` are in flight, so
+    memory stays bounded for arbitrarily large files. ``info()`` describes the
+    result once closed.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        codec: str,
+        *,
+        level: Optional[int] = None,
+        frame_size: int = DEFAULT_FRAME_SIZE,
+        threads: int = 4,
+    ):
+        self._compress = _codec(codec)[0]
+        self._raw = raw
+        self.codec = codec
+        self.level = level
+        self.frame_size = frame_size
+        self._buffer = bytearray()
+        self._pending: Deque[Future] = collections.deque()
+        self._window = max(1, threads) * 2
+        self._executor = ThreadPoolExecutor(max_workers=max(1, threads)) if threads > 1 else None
+        self._lengths: List[int] = []
+        self.raw_size = 0
+        self.stored_size = 0
+        self.closed = False
+
+    def __enter__(self) -> "FramedWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def writable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self._raw.fileno()
+
+    def _submit(self, frame: bytes) -> None:
+        if self._executor is None:
+            self._emit(self._compress(frame, self.level))
+            return
+        self._pending.append(self._executor.submit(self._compress, frame, self.level))
+        while len(self._pending) > self._window:
+            self._emit(self._pending.popleft().result())
+
+    def _emit(self, data: bytes) -> None:
+        self._raw.write(data)
+        self._lengths.append(len(data))
+        self.stored_size += len(data)
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast("B")
+        self._buffer += view
+        self.raw_size += len(view)
+        while len(self._buffer) >= self.frame_size:
+            self._submit(bytes(self._buffer[: self.frame_size]))
+            del self._buffer[: self.frame_size]
+        return len(view)
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pending:
+                self._emit(self._pending.popleft().result())
+            index = b"".join(_LENGTH.pack(n) for n in self._lengths)
+            self._raw.write(index)
+            self._raw.write(_FOOTER.pack(self.stored_size, self.raw_size, len(self._lengths), self.frame_size, MAGIC))
+            self.stored_size += len(index) + _FOOTER.size
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+            self._raw.close()
+
+    def info(self) -> Dict[str, Any]:
+        return {"codec": self.codec, "frame_size": self.frame_size, "stored_size": self.stored_size}
+
+
+class FramedReader:
+    """Read-only, seekable view of the raw bytes of a framed file.
+
+    ``raw`` must be seekable (a file, a ``ChunkedReader``, a throttled reader).
+    """
+
+    def __init__(self, raw: BinaryIO, codec: str):
+        self._decompress = _codec(codec)[1]
+        self._raw = raw
+        raw.seek(-_FOOTER.size, os.SEEK_END)
+        footer = raw.read(_FOOTER.size)
+        if len(footer) != _FOOTER.size:
+            raise ValueError("compressed file is truncated")
+        index_offset, self.size, count, self.frame_size, magic = _FOOTER.unpack(footer)
+        if magic != MAGIC:
+            raise ValueError("not a ckptkit compressed file")
+        raw.seek(index_offset)
+        index = raw.read(count * _LENGTH.size)
+        if len(index) != count * _LENGTH.size:
+            raise ValueError("compressed file index is truncated")
+        self._offsets: List[int] = []
+        offset = 0
+        for (length,) in _LENGTH.iter_unpack(index):
+            self._offsets.append(offset)
+            offset += length
+        self._offsets.append(offset)
+        if offset != index_offset:
+            raise ValueError("compressed file index does not match its frames")
+        self._pos = 0
+        self._frame = -1
+        self._data = b""
+
+    def __enter__(self) -> "FramedReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def _load(self, index: int) -> bytes:
+        if index != self._frame:
+            start, end = self._offsets[index], self._offsets[index + 1]
+            self._raw.seek(start)
+            expected = min(self.frame_size, self.size - index * self.frame_size)
+            data = self._decompress(self._raw.read(end - start), expected)
+            if len(data) != expected:
+                raise ValueError(f"frame {index} decompressed to {len(data)} bytes, expected {expected}")
+            self._frame, self._data = index, data
+        return self._data
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.size - self._pos
+        parts: List[bytes] = []
+        while n > 0 and self._pos < self.size:
+            index = self._pos // self.frame_size
+            data = self._load(index)
+            start = self._pos - index * self.frame_size
+            part = data[start : start + n]
+            parts.append(part)
+            self._pos += len(part)
+            n -= len(part)
+        return b"".join(parts)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+def decompressed(raw: BinaryIO, compression: Optional[Dict[str, Any]]) -> BinaryIO:
+    return FramedReader(raw, str(compression["codec"])) if compression else raw  # type: ignore[return-value]
+
+
+@dataclass
+class CodecReport:
+    codec: str
+    level: Optional[int]
+    raw_bytes: int
+    stored_bytes: int
+    compress_seconds: float
+    decompress_seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        mib = float(1 << 20)
+        return {
+            "codec": self.codec,
+            "level": self.level,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "ratio": round(self.ratio, 3),
+            "compress_mib_per_second": round(self.raw_bytes / mib / self.compress_seconds, 1)
+            if self.compress_seconds
+            else None,
+            "decompress_mib_per_second": round(self.raw_bytes / mib / self.decompress_seconds, 1)
+            if self.decompress_seconds
+            else None,
+        }
+
+
+def measure_codecs(
+    checkpoint: Path,
+    *,
+    codecs: Optional[List[str]] = None,
+    level: Optional[int] = None,
+    frame_size: int = DEFAULT_FRAME_SIZE,
+    threads: int = 4,
+    max_bytes: Optional[int] = None,
+) -> List[CodecReport]:
+    """Compress and decompress the files of ``checkpoint`` with each codec and report ratio and throughput.
+
+    Frames are read once into memory (up to ``max_bytes``) so the timings cover
+    the codecs with ``threads`` workers, not the disk. Any checkpoint layout
+    ckptkit reads (plain, deduplicated, delta, already compressed) works.
+    """
+    from .manifest import MANIFEST_NAME, iter_manifest_entries  # local import: manifest -> hashing -> compression
+    from .reader import entry_base, open_entry
+
+    def read_frames() -> List[bytes]:
+        frames: List[bytes] = []
+        total = 0
+        for entry in iter_manifest_entries(checkpoint / MANIFEST_NAME):
+            if entry_base(checkpoint, entry) is None:
+                continue
+            with open_entry(checkpoint, entry) as f:
+                for data in iter(lambda: f.read(frame_size), b""):
+                    if max_bytes is not None and total >= max_bytes:
+                        return frames
+                    frames.append(data)
+                    total += len(data)
+        return frames
+
+    frames = read_frames()
+    raw_bytes = sum(len(data) for data in frames)
+    reports: List[CodecReport] = []
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        for name in codecs or available_codecs():
+            compress, decompress = _codec(name)
+            start = time.perf_counter()
+            stored = list(executor.map(lambda data: compress(data, level), frames))
+            compress_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            list(executor.map(lambda pair: decompress(pair[0], len(pair[1])), zip(stored, frames)))
+            decompress_seconds = time.perf_counter() - start
+            reports.append(
+                CodecReport(
+                    codec=name,
+                    level=level,
+                    raw_bytes=raw_bytes,
+                    stored_bytes=sum(len(s) for s in stored),
+                    compress_seconds=compress_seconds,
+                    decompress_seconds=decompress_seconds,
+                )
+            )
+    return reports
@@ -10,14 +10,35 @@ import yaml
 @dataclasses.dataclass
 class HashingConfig:
     sample_bytes: Optional[int] = 65536
+    # Cap on concurrent reads shared by every checkpoint a scan validates.
     threads: int = 4
     full: bool = False
+    merkle_chunk_size: Optional[int] = None
+    # Record digests of this many stripes per large file; sampled validation then
+    # reads them instead of the head and tail. Together they cover
+    # ``stripe_fraction`` of the file (each at least 4 KiB); with ``stripe_seed``
+    # they sit at seeded-random positions in their strata instead of evenly spaced.
+    stripes: Optional[int] = None
+    stripe_fraction: float = 0.0
+    stripe_seed: Optional[int] = None
+    algorithm: str = "sha256"
+    scan_workers: int = 4
+    max_bytes_per_second: Optional[float] = None
+    max_iops: Optional[float] = None
+    # Back off while reads are slower than this (the disk is busy serving training).
+    latency_target_ms: Optional[float] = None
+    io_class: Optional[str] = None
+    nice: Optional[int] = None
 
 
 @dataclasses.dataclass
 class RetentionConfig:
     keep_last: int = 3
     keep_every: Optional[int] = None
+    # Rename victims into <root>/.trash and let a reaper.Reaper delete them off the write path.
+    deferred: bool = False
+    reap_threads: int = 4
+    reap_files_per_second: Optional[float] = None
 
 
 @dataclasses.dataclass
@@ -25,15 +46,97 @@ class MetricsConfig:
     textfile: Optional[str] = None
     pushgateway: Optional[str] = None
     pushgateway_job: str = "ckptkit"
+    # Serve /metrics from long-running commands (watch) and keep counters across restarts.
+    port: Optional[int] = None
+    state_file: Optional[str] = None
     labels: Dict[str, str] = dataclasses.field(default_factory=dict)
 
 
+@dataclasses.dataclass
+class CacheConfig:
+    enabled: bool = True
+    max_entries: int = 1024
+
+
+@dataclasses.dataclass
+class ChunkStoreConfig:
+    enabled: bool = False
+    chunk_size: int = 4 << 20
+    gc_grace_seconds: float = 3600.0
+
+
+@dataclasses.dataclass
+class DeltaConfig:
+    enabled: bool = False
+    max_chain_length: int = 7
+    verify_bytes: bool = True
+
+
+@dataclasses.dataclass
+class DurabilityConfig:
+    mode: str = "serial"
+    threads: int = 8
+    write_behind_bytes: Optional[int] = None
+
+
+@dataclasses.dataclass
+class CompressionConfig:
+    # zlib is always available; zstd and lz4 with `pip install ckptkit[compression]`.
+    codec: Optional[str] = None
+    level: Optional[int] = None
+    frame_size: int = 4 << 20
+    threads: int = 4
+
+
+@dataclasses.dataclass
+class TieringConfig:
+    # Capacity tier that checkpoints committed under ``root`` migrate to; ``retention`` applies there.
+    cold_root: Optional[str] = None
+    hot_keep_last: int = 2
+    threads: int = 4
+
+
+@dataclasses.dataclass
+class StorageConfig:
+    # posix: directories under ``root``; s3: an S3-compatible bucket (credentials from AWS_* env vars).
+    backend: str = "posix"
+    endpoint: Optional[str] = None
+    bucket: Optional[str] = None
+    prefix: str = ""
+    region: str = "us-east-1"
+    max_connections: int = 16
+    threads: int = 8
+    part_size: int = 64 << 20
+
+
+@dataclasses.dataclass
+class CatalogConfig:
+    enabled: bool = True
+    compact_ratio: float = 4.0
+
+
+@dataclasses.dataclass
+class WatchConfig:
+    recheck_interval: float = 3600.0
+    poll_interval: float = 5.0
+    inotify: bool = True
+
+
 @dataclasses.dataclass
 class Config:
     root: pathlib.Path
     hashing: HashingConfig = dataclasses.field(default_factory=HashingConfig)
     retention: RetentionConfig = dataclasses.field(default_factory=RetentionConfig)
     metrics: MetricsConfig = dataclasses.field(default_factory=MetricsConfig)
+    cache: CacheConfig = dataclasses.field(default_factory=CacheConfig)
+    chunks: ChunkStoreConfig = dataclasses.field(default_factory=ChunkStoreConfig)
+    delta: DeltaConfig = dataclasses.field(default_factory=DeltaConfig)
+    durability: DurabilityConfig = dataclasses.field(default_factory=DurabilityConfig)
+    compression: CompressionConfig = dataclasses.field(default_factory=CompressionConfig)
+    tiering: TieringConfig = dataclasses.field(default_factory=TieringConfig)
+    storage: StorageConfig = dataclasses.field(default_factory=StorageConfig)
+    catalog: CatalogConfig = dataclasses.field(default_factory=CatalogConfig)
+    watch: WatchConfig = dataclasses.field(default_factory=WatchConfig)
     job_id: str = "unknown"
     run_id: str = "unknown"
 
@@ -43,6 +146,15 @@ class Config:
         hashing = HashingConfig(**data.get("hashing", {}))
         retention = RetentionConfig(**data.get("retention", {}))
         metrics = MetricsConfig(**data.get("metrics", {}))
+        cache = CacheConfig(**data.get("cache", {}))
+        chunks = ChunkStoreConfig(**data.get("chunks", {}))
+        delta = DeltaConfig(**data.get("delta", {}))
+        durability = DurabilityConfig(**data.get("durability", {}))
+        compression = CompressionConfig(**data.get("compression", {}))
+        tiering = TieringConfig(**data.get("tiering", {}))
+        storage = StorageConfig(**data.get("storage", {}))
+        catalog = CatalogConfig(**data.get("catalog", {}))
+        watch = WatchConfig(**data.get("watch", {}))
         job_id = data.get("job_id", "unknown")
         run_id = data.get("run_id", "unknown")
         return Config(
@@ -50,6 +162,15 @@ class Config:
             hashing=hashing,
             retention=retention,
             metrics=metrics,
+            cache=cache,
+            chunks=chunks,
+            delta=delta,
+            durability=durability,
+            compression=compression,
+            tiering=tiering,
+            storage=storage,
+            catalog=catalog,
+            watch=watch,
             job_id=job_id,
             run_id=run_id,
         )
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import filecmp
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .fs import find_checkpoint, list_checkpoints, remove_empty_dirs
+from .manifest import (
+    MANIFEST_NAME,
+    FileEntry,
+    Manifest,
+    manifest_path,
+    read_manifest,
+    read_manifest_header,
+    write_manifest,
+)
+from .validate import validate_checkpoint
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .cache import ValidationCache
+    from .catalog import Catalog
+
+# Delta checkpoints store only files whose content changed since ``Manifest.parent``.
+# Unchanged files are dropped from the new directory and their entries point at the
+# ancestor holding the bytes via ``FileEntry.origin``; sub-file deduplication is
+# left to the chunk store.
+
+
+def chain_depth(root: Path, checkpoint: Path) -> int:
+    depth = 0
+    header = read_manifest_header(checkpoint / MANIFEST_NAME)
+    seen = {header["step"]}
+    while header.get("parent") is not None:
+        parent = find_checkpoint(root, header["parent"])
+        if parent is None or header["parent"] in seen:
+            break
+        seen.add(header["parent"])
+        header = read_manifest_header(parent / MANIFEST_NAME)
+        depth += 1
+    return depth
+
+
+def _header(checkpoint: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return read_manifest_header(checkpoint / MANIFEST_NAME)
+    except Exception:
+        return None
+
+
+def select_parent(
+    root: Path,
+    step: int,
+    *,
+    run_id: str,
+    max_chain_length: int,
+    sample_bytes: Optional[int] = 65536,
+    catalog: Optional["Catalog"] = None,
+    cache: Optional["ValidationCache"] = None,
+) -> Optional[Path]:
+    # Newest earlier checkpoint of the same run, unless it does not validate or
+    # extending its chain would exceed the limit (in which case the caller writes
+    # a full checkpoint). A "valid" catalog status is trusted; otherwise the
+    # candidate and its ancestors are validated in the manifests' hash mode
+    # (``sample_bytes``; ``None`` for full digests), through ``cache`` if given.
+    if max_chain_length <= 0:
+        return None
+    earlier = []
+    for ckpt in list_checkpoints(root):
+        header = _header(ckpt)
+        if header is not None and header.get("run_id") == run_id and 0 <= int(header["step"]) < step:
+            earlier.append((int(header["step"]), ckpt))
+    if not earlier:
+        return None
+    _, parent = max(earlier, key=lambda item: item[0])
+    if chain_depth(root, parent) + 1 > max_chain_length:
+        return None
+    entry = catalog.get(parent) if catalog is not None and parent.parent == catalog.root else None
+    if entry is None or entry.status != "valid":
+        result = validate_checkpoint(parent, full_hash=sample_bytes is None, sample_bytes=sample_bytes, cache=cache)
+        if not result.valid:
+            return None
+    return parent
+
+
+def make_delta(
+    checkpoint_dir: Path,
+    manifest: Manifest,
+    parent_dir: Path,
+    *,
+    verify_bytes: bool = True,
+    sample_bytes: Optional[int] = 65536,
+) -> Manifest:
+    # ``verify_bytes`` only reads files back whose digest is sampled (larger than
+    # ``2 * sample_bytes`` and without Merkle chunks); other digests cover every byte.
+    root = parent_dir.parent
+    parent = read_manifest(parent_dir / MANIFEST_NAME)
+    # Digests are only comparable under the same algorithm.
+    same_algorithm = parent.hash_algorithm == manifest.hash_algorithm
+    previous: Dict[str, FileEntry] = {e.path: e for e in parent.files} if same_algorithm else {}
+    holders: Dict[int, Optional[Path]] = {parent.step: parent_dir}
+    for entry in manifest.files:
+        old = previous.get(entry.path)
+        if entry.chunks is not None or old is None or old.chunks is not None:
+            continue
+        if old.size != entry.size or old.sha256 != entry.sha256:
+            continue
+        if (old.compression or {}).get("codec") != (entry.compression or {}).get("codec"):
+            # The ancestor's file is read with its own codec; only share identical encodings.
+            continue
+        holder_step = parent.step if old.origin is None else old.origin
+        if holder_step not in holders:
+            holders[holder_step] = find_checkpoint(root, holder_step)
+        holder = holders[holder_step]
+        if holder is None:
+            continue
+        sampled = entry.merkle is None and sample_bytes is not None and 0 < sample_bytes * 2 < entry.size
+        if verify_bytes and sampled:
+            # Sampled digests can collide on files that changed in the middle.
+            if not filecmp.cmp(checkpoint_dir / entry.path, holder / entry.path, shallow=False):
+                continue
+        (checkpoint_dir / entry.path).unlink()
+        entry.origin = holder_step
+        entry.compression = old.compression
+    manifest.parent = parent.step
+    remove_empty_dirs(checkpoint_dir)
+    write_manifest(manifest_path(checkpoint_dir), manifest)
+    return manifest
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from . import hashing
+from .atomic import apply_retention
+from .catalog import Catalog
+from .config import CompressionConfig, RetentionConfig
+from .durability import DurabilityEngine, DurabilityStats
+from .fs import _tmp_name, ensure_dir, fsync_dir, update_latest_pointer
+from .manifest import Manifest, build_manifest, manifest_path, write_manifest
+
+PARTIALS_DIR = ".ckptkit-partials"
+
+
+class DistributedCommit:
+    """Filesystem two-phase commit of one checkpoint written by ``world_size`` ranks.
+
+    Phase one: every rank calls ``write_shard`` to write and hash its own files
+    into a staging directory shared by all ranks, fsync them, and publish a
+    partial manifest. Phase two: a single coordinator (any process) calls
+    ``commit``, which waits for all partials, checks they agree and cover every
+    rank, writes the merged manifest and renames the staging directory into
+    place. All ranks must construct the object with the same ``dest_dir``,
+    ``step``, ``run_id`` and ``token``.
+
+    ``token`` names the staging directory and must be unique per attempt (for
+    example a UUID broadcast from rank 0, or the job's restart count): a retry
+    of the same step after a crash must not pick up the partials and shard
+    files the failed attempt left behind.
+    """
+
+    def __init__(
+        self,
+        dest_dir: Path,
+        *,
+        world_size: int,
+        step: int,
+        job_id: str,
+        run_id: str,
+        token: str,
+        sample_bytes: Optional[int] = 65536,
+        algorithm: str = hashing.DEFAULT_ALGORITHM,
+        durability: Optional[DurabilityEngine] = None,
+        compression: Optional[CompressionConfig] = None,
+    ):
+        if world_size < 1:
+            raise ValueError("world_size must be at least 1")
+        if not token:
+            raise ValueError("token must identify this attempt")
+        self.dest_dir = dest_dir
+        self.world_size = world_size
+        self.step = step
+        self.job_id = job_id
+        self.run_id = run_id
+        self.sample_bytes = sample_bytes
+        self.algorithm = algorithm
+        self.durability = durability or DurabilityEngine()
+        self.compression = compression
+        # Staging names contain ".tmp-" so listings, the catalog and watchers skip them.
+        self.token = token
+        self.staging = dest_dir.parent / f"{dest_dir.name}.tmp-{token}"
+        self.partials = self.staging / PARTIALS_DIR
+
+    def _partial_path(self, rank: int) -> Path:
+        return self.partials / f"rank-{rank:05d}.json"
+
+    def write_shard(self, rank: int, write_fn: Callable[[hashing.HashingSink], None]) -> Path:
+        if not 0 <= rank < self.world_size:
+            raise ValueError(f"rank {rank} outside world of size {self.world_size}")
+        ensure_dir(self.partials)
+        sink = hashing.HashingSink(
+            self.staging, sample_bytes=self.sample_bytes, algorithm=self.algorithm, compression=self.compression
+        )
+        write_fn(sink)
+        records = sink.records()
+        files = [self.staging / rel for rel in records]
+        dirs: Set[Path] = {self.staging}
+        for rel in records:
+            dirs.update(self.staging / parent for parent in PurePosixPath(rel).parents if str(parent) != ".")
+        self.durability.persist_files(files, dirs)
+        partial = {
+            "rank": rank,
+            "world_size": self.world_size,
+            "step": self.step,
+            "job_id": self.job_id,
+            "run_id": self.run_id,
+            "token": self.token,
+            "hash_algorithm": self.algorithm,
+            "files": {rel: [size, digest] for rel, (size, digest) in sorted(records.items())},
+            "compression": sink.compression(),
+        }
+        target = self._partial_path(rank)
+        tmp = self.partials / _tmp_name(target.stem)
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(partial, f, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+        fsync_dir(self.partials)
+        return target
+
+    def pending_ranks(self) -> List[int]:
+        return [rank for rank in range(self.world_size) if not self._partial_path(rank).exists()]
+
+    def _load_partials(self) -> Tuple[Dict[str, Tuple[int, str]], Dict[str, Dict[str, Any]]]:
+        records: Dict[str, Tuple[int, str]] = {}
+        compression: Dict[str, Dict[str, Any]] = {}
+        owners: Dict[str, int] = {}
+        for rank in range(self.world_size):
+            with open(self._partial_path(rank), "r", encoding="utf-8") as f:
+                partial = json.load(f)
+            expected = {
+                "rank": rank,
+                "world_size": self.world_size,
+                "step": self.step,
+                "run_id": self.run_id,
+                "token": self.token,
+                "hash_algorithm": self.algorithm,
+            }
+            for key, value in expected.items():
+                if partial.get(key) != value:
+                    raise ValueError(f"rank {rank} partial has {key}={partial.get(key)!r}, expected {value!r}")
+            for rel, (size, digest) in partial["files"].items():
+                if rel in owners:
+                    raise ValueError(f"{rel} written by both rank {owners[rel]} and rank {rank}")
+                info = partial.get("compression", {}).get(rel)
+                stored = int(info["stored_size"]) if info else size
+                path = self.staging / rel
+                if not path.is_file() or path.stat().st_size != stored:
+                    raise ValueError(f"rank {rank} file {rel} is missing or has the wrong size")
+                owners[rel] = rank
+                records[rel] = (int(size), str(digest))
+                if info:
+                    compression[rel] = info
+        return records, compression
+
+    def commit(
+        self,
+        *,
+        timeout: float = 600.0,
+        poll_interval: float = 0.5,
+        update_latest: bool = True,
+        retention: Optional[RetentionConfig] = None,
+        catalog: Optional[Catalog] = None,
+        framework: Optional[str] = None,
+        precision: Optional[str] = None,
+        model_name: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> Manifest:
+        deadline = time.monotonic() + timeout
+        while True:
+            pending = self.pending_ranks()
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"ranks {pending} did not publish a partial manifest for {self.dest_dir}")
+            time.sleep(poll_interval)
+        records, compression = self._load_partials()
+        manifest = build_manifest(
+            records,
+            job_id=self.job_id,
+            run_id=self.run_id,
+            step=self.step,
+            world_size=self.world_size,
+            framework=framework,
+            precision=precision,
+            model_name=model_name,
+            extra=extra,
+            algorithm=self.algorithm,
+            compression=compression,
+        )
+        stats = DurabilityStats()
+        # Rank files are already durable; only the manifest and the staging dir remain.
+        shutil.rmtree(self.partials)
+        write_manifest(manifest_path(self.staging), manifest)
+        self.durability.persist_files([], [self.staging], stats)
+        self.durability.commit(self.staging, self.dest_dir, stats)
+        self.durability.last_stats = stats
+        parent = self.dest_dir.parent
+        if catalog is not None:
+            catalog.add(self.dest_dir, manifest)
+        if update_latest:
+            update_latest_pointer(parent, self.dest_dir)
+        # Staging directories of earlier, failed attempts at this checkpoint.
+        for stale in parent.glob(f"{self.dest_dir.name}.tmp-*"):
+            shutil.rmtree(stale, ignore_errors=True)
+        if retention:
+            apply_retention(parent, retention, keep_paths={self.dest_dir}, catalog=catalog)
+        return manifest
+
+    def abort(self) -> None:
+        shutil.rmtree(self.staging, ignore_errors=True)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .metrics import MetricsEmitter, StatePersister
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """Serves ``emitter`` at ``/metrics`` from a background thread.
+
+    A scrape only renders the registry (cached until the next update); nothing
+    is validated or listed. With ``state_path`` the registry is restored on
+    start and saved every ``persist_interval`` seconds and on stop (see
+    ``StatePersister``), so counters and histograms survive restarts.
+    """
+
+    def __init__(
+        self,
+        emitter: MetricsEmitter,
+        *,
+        host: str = "0.0.0.0",
+        port: int = 9108,
+        state_path: Optional[Path] = None,
+        persist_interval: float = 60.0,
+    ):
+        self.emitter = emitter
+        self.state_path = state_path
+        self._state = StatePersister(emitter, state_path, interval=persist_interval) if state_path else None
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._httpd.server_address[:2]  # type: ignore[return-value]
+
+    def _handler(self) -> type:
+        emitter = self.emitter
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = emitter.text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:  # noqa: A002
+                pass
+
+        return Handler
+
+    def persist(self) -> None:
+        if self._state is not None:
+            self._state.persist()
+
+    def start(self) -> "MetricsServer":
+        if self._state is not None:
+            self._state.start()
+        self._threads.append(threading.Thread(target=self._httpd.serve_forever, name="ckptkit-metrics", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._state is not None:
+            self._state.stop()
+
+    def __enter__(self) -> "MetricsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -6,9 +6,9 @@ import random
 import shutil
 import string
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
-from .manifest import MANIFEST_NAME, read_manifest
+from .manifest import MANIFEST_NAME, read_manifest_header
 
 
 def ensure_dir(path: Path) -> None:
@@ -32,6 +32,12 @@ def fsync_tree(path: Path) -> None:
         fsync_dir(Path(root))
 
 
+def remove_empty_dirs(path: Path) -> None:
+    for root, _, _ in os.walk(path, topdown=False):
+        if Path(root) != path and not os.listdir(root):
+            os.rmdir(root)
+
+
 def disk_free_bytes(path: Path) -> int:
     stat = shutil.disk_usage(path)
     return stat.free
@@ -52,12 +58,22 @@ def list_checkpoints(root: Path) -> List[Path]:
 
 def read_step(checkpoint: Path) -> int:
     try:
-        manifest = read_manifest(checkpoint / MANIFEST_NAME)
-        return manifest.step
+        return int(read_manifest_header(checkpoint / MANIFEST_NAME)["step"])
     except Exception:
         return -1
 
 
+def find_checkpoint(root: Path, step: int) -> Optional[Path]:
+    # Fast path for the step-<n> naming convention before falling back to a scan.
+    candidate = root / f"step-{step}"
+    if (candidate / MANIFEST_NAME).exists() and read_step(candidate) == step:
+        return candidate
+    for ckpt in list_checkpoints(root):
+        if read_step(ckpt) == step:
+            return ckpt
+    return None
+
+
 def _tmp_name(prefix: str) -> str:
     rand = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
     return f".{prefix}.{rand}"
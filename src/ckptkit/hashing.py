@@ -1,27 +1,114 @@
 from __future__ import annotations
 
+import functools
 import hashlib
+import os
+import random
+import threading
+import zlib
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from pathlib import Path
-from typing import Dict, Iterable, Optional
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
+from .compression import FramedWriter
+from .config import CompressionConfig
+from .throttle import IOBudget, throttled
+from .tracing import span
 
-def compute_sha256(path: Path, *, sample_bytes: Optional[int] = None, chunk_size: int = 1 << 20) -> str:
-    h = hashlib.sha256()
+DEFAULT_ALGORITHM = "sha256"
+
+# Factories return objects with ``update(data)``, ``hexdigest()`` and ``copy()``.
+# Non-cryptographic checksums detect corruption, not tampering.
+_ALGORITHMS: Dict[str, Callable[[], Any]] = {}
+
+
+class _Crc32:
+    def __init__(self, update_fn: Callable[[bytes, int], int], value: int = 0):
+        self._update_fn = update_fn
+        self._value = value
+
+    def update(self, data) -> None:
+        self._value = self._update_fn(data, self._value)
+
+    def hexdigest(self) -> str:
+        return f"{self._value & 0xFFFFFFFF:08x}"
+
+    def copy(self) -> "_Crc32":
+        return _Crc32(self._update_fn, self._value)
+
+
+def register_algorithm(name: str, factory: Callable[[], Any]) -> None:
+    _ALGORITHMS[name] = factory
+
+
+def available_algorithms() -> List[str]:
+    return sorted(_ALGORITHMS)
+
+
+def new_hasher(algorithm: str = DEFAULT_ALGORITHM) -> Any:
+    try:
+        factory = _ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"unknown hash algorithm {algorithm!r}; available: {available_algorithms()}") from None
+    return factory()
+
+
+register_algorithm("sha256", hashlib.sha256)
+register_algorithm("blake2b", lambda: hashlib.blake2b(digest_size=32))
+register_algorithm("crc32", lambda: _Crc32(zlib.crc32))
+try:
+    import crc32c as _crc32c  # type: ignore
+
+    register_algorithm("crc32c", lambda: _Crc32(lambda data, value: _crc32c.crc32c(data, value)))
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+try:
+    import xxhash as _xxhash  # type: ignore
+
+    register_algorithm("xxh64", _xxhash.xxh64)
+    register_algorithm("xxh3_64", _xxhash.xxh3_64)
+    register_algorithm("xxh3_128", _xxhash.xxh3_128)
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+
+
+def compute_digest(
+    path: Path,
+    *,
+    algorithm: str = DEFAULT_ALGORITHM,
+    sample_bytes: Optional[int] = None,
+    chunk_size: int = 1 << 20,
+    budget: Optional[IOBudget] = None,
+) -> str:
     size = path.stat().st_size
+    with throttled(open(path, "rb"), budget) as f:
+        return hash_stream(f, size, algorithm=algorithm, sample_bytes=sample_bytes, chunk_size=chunk_size)
+
+
+def compute_sha256(path: Path, *, sample_bytes: Optional[int] = None, chunk_size: int = 1 << 20) -> str:
+    return compute_digest(path, algorithm="sha256", sample_bytes=sample_bytes, chunk_size=chunk_size)
+
+
+def hash_stream(
+    f: BinaryIO,
+    size: int,
+    *,
+    algorithm: str = DEFAULT_ALGORITHM,
+    sample_bytes: Optional[int] = None,
+    chunk_size: int = 1 << 20,
+) -> str:
+    h = new_hasher(algorithm)
     if sample_bytes is None or sample_bytes <= 0 or sample_bytes * 2 >= size:
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                h.update(chunk)
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
         return h.hexdigest()
-    with open(path, "rb") as f:
-        head = f.read(sample_bytes)
-        h.update(head)
-        if size > sample_bytes:
-            # Seek to tail chunk for better detection of truncated writes.
-            f.seek(max(size - sample_bytes, sample_bytes))
-            tail = f.read(sample_bytes)
-            h.update(tail)
+    head = f.read(sample_bytes)
+    h.update(head)
+    if size > sample_bytes:
+        # Seek to tail chunk for better detection of truncated writes.
+        f.seek(max(size - sample_bytes, sample_bytes))
+        tail = f.read(sample_bytes)
+        h.update(tail)
     h.update(str(size).encode("utf-8"))
     return h.hexdigest()
 
@@ -31,11 +118,358 @@ def hash_paths(
     *,
     sample_bytes: Optional[int] = None,
     threads: int = 4,
+    algorithm: str = DEFAULT_ALGORITHM,
+    budget: Optional[IOBudget] = None,
 ) -> Dict[Path, str]:
     results: Dict[Path, str] = {}
-    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
-        futures = {executor.submit(compute_sha256, path, sample_bytes=sample_bytes): path for path in paths}
-        for fut in as_completed(futures):
-            path = futures[fut]
-            results[path] = fut.result()
+    with span("hash.paths", threads=threads, sample_bytes=sample_bytes) as s:
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            futures = {
+                executor.submit(
+                    compute_digest, path, algorithm=algorithm, sample_bytes=sample_bytes, budget=budget
+                ): path
+                for path in paths
+            }
+            for fut in as_completed(futures):
+                path = futures[fut]
+                results[path] = fut.result()
+        if s.enabled:
+            # Bytes actually read: sampled files contribute their head and tail only.
+            for path in results:
+                size = path.stat().st_size
+                s.add_bytes(min(size, 2 * sample_bytes) if sample_bytes and sample_bytes > 0 else size)
+            s.set(files=len(results))
+    return results
+
+
+# (opener, offset, length): one byte range to digest. Each task opens its own
+# handle so ranges of one file can be hashed concurrently.
+RangeTask = Tuple[Callable[[], BinaryIO], int, int]
+
+
+def _hash_range(
+    task: RangeTask,
+    algorithm: str = DEFAULT_ALGORITHM,
+    block_size: int = 1 << 20,
+    budget: Optional[IOBudget] = None,
+) -> str:
+    opener, offset, length = task
+    h = new_hasher(algorithm)
+    with throttled(opener(), budget) as f:
+        f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(block_size, remaining))
+            if not data:
+                break
+            h.update(data)
+            remaining -= len(data)
+    return h.hexdigest()
+
+
+def hash_ranges(
+    tasks: Sequence[RangeTask],
+    *,
+    threads: int = 4,
+    algorithm: str = DEFAULT_ALGORITHM,
+    budget: Optional[IOBudget] = None,
+) -> List[str]:
+    with span("hash.ranges", ranges=len(tasks)) as s:
+        s.add_bytes(sum(length for _, _, length in tasks))
+        if len(tasks) <= 1 or threads <= 1:
+            return [_hash_range(t, algorithm, budget=budget) for t in tasks]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(lambda t: _hash_range(t, algorithm, budget=budget), tasks))
+
+
+def chunk_ranges(size: int, chunk_size: int) -> List[Tuple[int, int]]:
+    return [(offset, min(chunk_size, size - offset)) for offset in range(0, size, chunk_size)]
+
+
+def merkle_root(chunk_digests: Iterable[str], *, algorithm: str = DEFAULT_ALGORITHM) -> str:
+    h = new_hasher(algorithm)
+    h.update(b"ckptkit-merkle-v1")
+    for digest in chunk_digests:
+        h.update(bytes.fromhex(digest))
+    return h.hexdigest()
+
+
+def merkle_paths(
+    paths: Iterable[Path], *, chunk_size: int, threads: int = 4, algorithm: str = DEFAULT_ALGORITHM
+) -> Dict[Path, List[str]]:
+    # Chunks of all files share one pool, so a single huge shard uses every worker.
+    tasks: List[RangeTask] = []
+    owners: List[Path] = []
+    results: Dict[Path, List[str]] = {}
+    for path in paths:
+        results[path] = []
+        opener = lambda p=path: open(p, "rb")  # noqa: E731
+        for offset, length in chunk_ranges(path.stat().st_size, chunk_size):
+            tasks.append((opener, offset, length))
+            owners.append(path)
+    for path, digest in zip(owners, hash_ranges(tasks, threads=threads, algorithm=algorithm)):
+        results[path].append(digest)
     return results
+
+
+# Stripes are at least one page and start on page boundaries, except the last
+# evenly spaced stripe, which ends exactly at EOF.
+STRIPE_ALIGN = 4096
+
+
+def stripe_size_for(size: int, count: int, fraction: float = 0.0) -> int:
+    """Bytes per stripe so ``count`` stripes cover ``fraction`` of ``size``, at least ``STRIPE_ALIGN``."""
+    wanted = -(-int(size * fraction) // max(1, count))
+    return max(STRIPE_ALIGN, -(-wanted // STRIPE_ALIGN) * STRIPE_ALIGN)
+
+
+def stripe_ranges(
+    size: int, count: int, stripe_size: int, *, seed: Optional[int] = None, key: str = ""
+) -> List[Tuple[int, int]]:
+    """(offset, length) of ``count`` stripes, one in each of ``count`` equal strata of the file.
+
+    Without ``seed`` the stripes are evenly spaced from the first byte to the
+    last; with it each stripe sits at a position in its stratum drawn from a
+    generator seeded with ``seed``, ``key`` (the file's path) and ``size``, so
+    the layout is reproducible at validation time from the manifest alone.
+    """
+    if count * stripe_size >= size:
+        return chunk_ranges(size, stripe_size)
+    ranges: List[Tuple[int, int]] = []
+    rng = random.Random(f"{seed}:{key}:{size}") if seed is not None else None
+    stratum = size // count
+    for i in range(count):
+        if rng is None:
+            start = i * (size - stripe_size) // max(1, count - 1)
+        else:
+            end = size if i == count - 1 else (i + 1) * stratum
+            start = i * stratum + rng.randrange(max(1, end - i * stratum - stripe_size + 1))
+        if rng is not None or i < count - 1:
+            start -= start % STRIPE_ALIGN
+        ranges.append((min(start, size - stripe_size), stripe_size))
+    return ranges
+
+
+def _hash_pread(fd: int, offset: int, length: int, algorithm: str, budget: Optional[IOBudget]) -> str:
+    h = new_hasher(algorithm)
+    while length > 0:
+        if budget is None:
+            data = os.pread(fd, length, offset)
+        else:
+            with budget.slot():
+                data = os.pread(fd, length, offset)
+            budget.consume(len(data))
+        if not data:
+            break
+        h.update(data)
+        offset += len(data)
+        length -= len(data)
+    return h.hexdigest()
+
+
+StripeSource = Union[Path, Callable[[], BinaryIO]]
+
+
+def hash_stripes(
+    files: Sequence[Tuple[StripeSource, Sequence[Tuple[int, int]]]],
+    *,
+    threads: int = 4,
+    algorithm: str = DEFAULT_ALGORITHM,
+    budget: Optional[IOBudget] = None,
+) -> List[List[str]]:
+    """Digest of every (offset, length) range of every file, in input order.
+
+    Ranges of all files share one pool. A ``Path`` is opened once and its
+    ranges are fetched concurrently with ``os.pread`` on that descriptor; an
+    opener (decompressing or chunk-store streams) gets a handle per range.
+    """
+    fds: List[int] = []
+    tasks: List[Callable[[], str]] = []
+    try:
+        for source, ranges in files:
+            if isinstance(source, Path) and hasattr(os, "pread"):
+                fd = os.open(source, os.O_RDONLY)
+                fds.append(fd)
+                tasks.extend(functools.partial(_hash_pread, fd, off, n, algorithm, budget) for off, n in ranges)
+            else:
+                opener = source if callable(source) else functools.partial(open, source, "rb")
+                tasks.extend(
+                    functools.partial(_hash_range, (opener, off, n), algorithm, budget=budget) for off, n in ranges
+                )
+        with span("hash.stripes", files=len(files), ranges=len(tasks)) as s:
+            s.add_bytes(sum(n for _, ranges in files for _, n in ranges))
+            if len(tasks) <= 1 or threads <= 1:
+                digests = [task() for task in tasks]
+            else:
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    digests = list(executor.map(lambda task: task(), tasks))
+    finally:
+        for fd in fds:
+            os.close(fd)
+    results: List[List[str]] = []
+    index = 0
+    for _, ranges in files:
+        results.append(digests[index : index + len(ranges)])
+        index += len(ranges)
+    return results
+
+
+class HashingWriter:
+    """Binary file wrapper that digests data as it is written.
+
+    The digest matches ``compute_digest(path, sample_bytes=...)`` for the bytes
+    written, so manifests built from it validate exactly like re-hashed ones.
+    Writes must be sequential; seeking is not supported.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        *,
+        sample_bytes: Optional[int] = None,
+        algorithm: str = DEFAULT_ALGORITHM,
+        on_close: Optional[Callable[["HashingWriter"], None]] = None,
+        on_write: Optional[Callable[[int], None]] = None,
+    ):
+        self._raw = raw
+        self._on_write = on_write
+        self.sample_bytes = sample_bytes if sample_bytes and sample_bytes > 0 else None
+        self.algorithm = algorithm
+        self._full: Optional[Any] = new_hasher(algorithm)
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._on_close = on_close
+        self.size = 0
+        self.closed = False
+
+    def __enter__(self) -> "HashingWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self.size
+
+    def fileno(self) -> int:
+        return self._raw.fileno()
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast("B")
+        written = self._raw.write(view)
+        if written is not None and written != len(view):
+            view = view[:written]
+        sb = self.sample_bytes
+        if sb is not None:
+            if len(self._head) < sb:
+                self._head += view[: sb - len(self._head)]
+            self._tail += view[-sb:]
+            del self._tail[:-sb]
+        if self._full is not None:
+            self._full.update(view)
+        self.size += len(view)
+        if sb is not None and self.size > sb * 2:
+            # compute_digest only uses the full digest for files of at most 2 * sample_bytes.
+            self._full = None
+        if self._on_write is not None:
+            self._on_write(self.size)
+        return len(view)
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+    def hexdigest(self) -> str:
+        sb = self.sample_bytes
+        if self._full is not None:
+            return self._full.copy().hexdigest()
+        assert sb is not None
+        h = new_hasher(self.algorithm)
+        h.update(self._head)
+        h.update(self._tail)
+        h.update(str(self.size).encode("utf-8"))
+        return h.hexdigest()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._raw.close()
+        if self._on_close is not None:
+            self._on_close(self)
+
+
+class HashingSink:
+    """Creates files under ``root`` and records their size and digest while they are written.
+
+    With ``compression.codec`` set, files are stored compressed in frames (see
+    ``ckptkit.compression``); sizes and digests still describe the raw bytes and
+    ``compression()`` holds what the manifest needs to read them back.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        sample_bytes: Optional[int] = 65536,
+        algorithm: str = DEFAULT_ALGORITHM,
+        write_behind_bytes: Optional[int] = None,
+        compression: Optional[CompressionConfig] = None,
+    ):
+        self.root = root
+        self.sample_bytes = sample_bytes
+        self.algorithm = algorithm
+        self.write_behind_bytes = write_behind_bytes
+        self.compression_config = compression if compression is not None and compression.codec else None
+        self._records: Dict[str, Tuple[int, str]] = {}
+        self._compression: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def open(self, rel_path: str) -> HashingWriter:
+        rel = PurePosixPath(rel_path)
+        if rel.is_absolute() or ".." in rel.parts:
+            raise ValueError(f"sink path must be relative to the checkpoint: {rel_path}")
+        target = self.root / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        raw = open(target, "wb")
+        framed: Optional[FramedWriter] = None
+        cfg = self.compression_config
+        if cfg is not None:
+            framed = FramedWriter(
+                raw, str(cfg.codec), level=cfg.level, frame_size=cfg.frame_size, threads=cfg.threads
+            )
+
+        def record(writer: HashingWriter) -> None:
+            with self._lock:
+                self._records[str(rel)] = (writer.size, writer.hexdigest())
+                if framed is not None:
+                    self._compression[str(rel)] = framed.info()
+
+        on_write = None
+        if self.write_behind_bytes:
+            from .durability import WriteBehind  # local import: durability -> fs -> manifest -> hashing
+
+            advance = WriteBehind(raw, self.write_behind_bytes).advance
+            # Write-behind tracks bytes on disk, which are the stored bytes when compressing.
+            on_write = advance if framed is None else lambda _: advance(framed.stored_size)  # type: ignore[union-attr]
+        return HashingWriter(
+            framed or raw, sample_bytes=self.sample_bytes, algorithm=self.algorithm, on_close=record, on_write=on_write
+        )
+
+    def write_bytes(self, rel_path: str, data: bytes) -> None:
+        with self.open(rel_path) as f:
+            f.write(data)
+
+    def records(self) -> Dict[str, Tuple[int, str]]:
+        with self._lock:
+            return dict(self._records)
+
+    def compression(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._compression)
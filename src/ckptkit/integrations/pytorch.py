@@ -1,23 +1,279 @@
 from __future__ import annotations
 
+import heapq
+import json
 import logging
-from pathlib import Path
-from typing import Any, Optional
+import re
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import CompressionConfig
+from ..hashing import DEFAULT_ALGORITHM, HashingSink
+from ..manifest import FileEntry, Manifest, compute_manifest, iter_manifest_entries, manifest_path
+from ..reader import open_entry
 
 logger = logging.getLogger(__name__)
 
+SINGLE_FILE_NAMES = ("model.pt", "pytorch_model.bin", "model.bin")
+INDEX_NAMES = ("model.index.json", "pytorch_model.bin.index.json")
+SHARD_PATTERN = re.compile(r"(model|pytorch_model)-\d+-of-\d+\.(pt|bin)")
+
 
-def load_checkpoint(path: Path, *, map_location: Optional[str] = None) -> Any:
+def _import_torch(action: str) -> Any:
     try:
         import torch  # type: ignore
     except ImportError as exc:  # pragma: no cover - import guard
-        raise RuntimeError("PyTorch is not installed; cannot load checkpoint") from exc
-    candidates = [
-        path / "model.pt",
-        path / "pytorch_model.bin",
-        path / "model.bin",
-    ]
-    target = next((p for p in candidates if p.exists()), None)
-    if target is None:
-        raise FileNotFoundError(f"No known PyTorch checkpoint file in {path}")
+        raise RuntimeError(f"PyTorch is not installed; cannot {action} checkpoint") from exc
+    return torch
+
+
+def save_checkpoint(obj: Any, sink: HashingSink, *, name: str = "model.pt") -> None:
+    # Serialize straight into the sink so the manifest can reuse the digest
+    # instead of reading the file back.
+    torch = _import_torch("save")
+    with sink.open(name) as f:
+        torch.save(obj, f)
+
+
+def _nbytes(value: Any) -> int:
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if hasattr(value, "numel") and hasattr(value, "element_size"):
+        return int(value.numel()) * int(value.element_size())
+    return 0
+
+
+def partition_state_dict(state_dict: Mapping, num_shards: int) -> List[List[str]]:
+    """Split the keys of ``state_dict`` into at most ``num_shards`` groups of similar byte size.
+
+    Largest tensors are placed first, each into the currently smallest shard;
+    keys keep their state-dict order within a shard. Empty shards are dropped.
+    """
+    sizes = {key: _nbytes(value) for key, value in state_dict.items()}
+    heap = [(0, index) for index in range(max(1, num_shards))]
+    owner: Dict[str, int] = {}
+    for key in sorted(sizes, key=lambda k: sizes[k], reverse=True):
+        total, index = heapq.heappop(heap)
+        owner[key] = index
+        heapq.heappush(heap, (total + sizes[key], index))
+    groups: Dict[int, List[str]] = {}
+    for key in state_dict:
+        groups.setdefault(owner[key], []).append(key)
+    return [groups[index] for index in sorted(groups)]
+
+
+def save_state_dict(
+    state_dict: Mapping,
+    checkpoint_dir: Path,
+    *,
+    job_id: str,
+    run_id: str,
+    step: int,
+    world_size: int = 1,
+    num_shards: Optional[int] = None,
+    max_shard_bytes: Optional[int] = None,
+    threads: int = 4,
+    sample_bytes: Optional[int] = 65536,
+    algorithm: str = DEFAULT_ALGORITHM,
+    compression: Optional[CompressionConfig] = None,
+    precision: Optional[str] = None,
+    model_name: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    stripes: Optional[int] = None,
+    stripe_fraction: float = 0.0,
+    stripe_seed: Optional[int] = None,
+) -> Manifest:
+    """Write ``state_dict`` as size-balanced shards, ``threads`` at a time, and return its manifest.
+
+    Shards are named ``model-00001-of-0000N.pt`` and listed in
+    ``model.index.json`` (``weight_map`` plus ``metadata.total_size``); a
+    single shard is written as ``model.pt`` without an index. The shard count
+    is ``num_shards``, else enough shards to keep each under ``max_shard_bytes``,
+    else ``threads``. Every file is hashed while it is written, so the returned
+    manifest can be handed straight back from an ``atomic_checkpoint_write``
+    writer without reading anything again. Other files already in
+    ``checkpoint_dir`` are hashed into the manifest as well. With
+    ``compression`` shards are stored compressed as they are serialized.
+    ``stripes`` records stripe digests of large shards for sampled validation
+    (see ``compute_manifest``); only those stripes are read back.
+    """
+    torch = _import_torch("save")
+    total_size = sum(_nbytes(value) for value in state_dict.values())
+    if num_shards is None:
+        num_shards = -(-total_size // max_shard_bytes) if max_shard_bytes else threads
+    groups = partition_state_dict(state_dict, num_shards)
+    if len(groups) <= 1:
+        names = ["model.pt"]
+    else:
+        names = [f"model-{i + 1:05d}-of-{len(groups):05d}.pt" for i in range(len(groups))]
+    sink = HashingSink(checkpoint_dir, sample_bytes=sample_bytes, algorithm=algorithm, compression=compression)
+
+    def write(name: str, keys: List[str]) -> None:
+        with sink.open(name) as f:
+            torch.save({key: state_dict[key] for key in keys}, f)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(names)))) as pool:
+        for future in [pool.submit(write, name, keys) for name, keys in zip(names, groups)]:
+            future.result()
+    if len(names) > 1:
+        index = {
+            "metadata": {"total_size": total_size},
+            "weight_map": {key: name for name, keys in zip(names, groups) for key in keys},
+        }
+        sink.write_bytes("model.index.json", json.dumps(index, indent=2, sort_keys=True).encode("utf-8"))
+    return compute_manifest(
+        checkpoint_dir,
+        job_id=job_id,
+        run_id=run_id,
+        step=step,
+        world_size=world_size,
+        framework="pytorch",
+        precision=precision,
+        model_name=model_name,
+        sample_bytes=sample_bytes,
+        threads=threads,
+        extra=extra,
+        recorded=sink.records(),
+        algorithm=algorithm,
+        compression=sink.compression(),
+        stripes=stripes,
+        stripe_fraction=stripe_fraction,
+        stripe_seed=stripe_seed,
+    )
+
+
+def _load_file(torch: Any, target: Path, *, map_location: Optional[str], mmap: bool) -> Any:
+    if mmap:
+        try:
+            # Tensor storages stay backed by the page cache and are only read when touched.
+            return torch.load(target, map_location=map_location, mmap=True)
+        except TypeError:  # pragma: no cover - torch < 2.1 has no mmap support
+            logger.debug("torch.load(mmap=True) unsupported; loading %s eagerly", target)
+        except RuntimeError as exc:  # pragma: no cover - legacy (non-zip) serialization
+            logger.debug("cannot mmap %s (%s); loading eagerly", target, exc)
     return torch.load(target, map_location=map_location)
+
+
+def _load_entry(torch: Any, path: Path, entry: FileEntry, *, map_location: Optional[str], mmap: bool) -> Any:
+    if entry.chunks is None and entry.origin is None and entry.compression is None:
+        return _load_file(torch, path / entry.path, map_location=map_location, mmap=mmap)
+    # Deduplicated, delta and compressed entries are not one raw file on disk, so they cannot be mapped.
+    with open_entry(path, entry) as f:
+        return torch.load(f, map_location=map_location)
+
+
+def _entries(path: Path) -> Dict[str, FileEntry]:
+    if manifest_path(path).exists():
+        return {e.path: e for e in iter_manifest_entries(manifest_path(path))}
+    return {
+        p.relative_to(path).as_posix(): FileEntry(path=p.relative_to(path).as_posix(), size=0, sha256="")
+        for p in path.rglob("*")
+        if p.is_file()
+    }
+
+
+def _read_index(path: Path, entries: Dict[str, FileEntry]) -> Optional[Dict[str, str]]:
+    name = next((n for n in INDEX_NAMES if n in entries), None)
+    if name is None:
+        return None
+    with open_entry(path, entries[name]) as f:
+        index = json.load(f)
+    return {str(k): str(v) for k, v in index["weight_map"].items()}
+
+
+def discover_shards(path: Path) -> Tuple[List[str], Optional[Dict[str, str]]]:
+    """Return the state-dict files of a checkpoint and, when an index exists, its tensor -> file map.
+
+    A checkpoint is either a single file (``model.pt`` and friends), shards named
+    by an index (``model.index.json`` or Hugging Face's
+    ``pytorch_model.bin.index.json``), or numbered shards (``model-00001-of-00004.pt``).
+    """
+    return _discover(path, _entries(path))
+
+
+def _discover(path: Path, entries: Dict[str, FileEntry]) -> Tuple[List[str], Optional[Dict[str, str]]]:
+    weight_map = _read_index(path, entries)
+    if weight_map is not None:
+        return sorted(set(weight_map.values())), weight_map
+    single = next((n for n in SINGLE_FILE_NAMES if n in entries), None)
+    if single is not None:
+        return [single], None
+    shards = sorted(n for n in entries if SHARD_PATTERN.fullmatch(PurePosixPath(n).name))
+    return shards, None
+
+
+def load_checkpoint(
+    path: Path, *, map_location: Optional[str] = None, mmap: bool = True, threads: int = 4
+) -> Any:
+    """Load a checkpoint written as one file or as shards.
+
+    With ``mmap`` (the default) files are memory-mapped, so tensors are paged in
+    from the page cache instead of being copied into private memory up front.
+    Shards are loaded ``threads`` at a time and merged into one state dict.
+    """
+    torch = _import_torch("load")
+    entries = _entries(path)
+    shards, _ = _discover(path, entries)
+    if not shards:
+        raise FileNotFoundError(f"No known PyTorch checkpoint file in {path}")
+    if len(shards) == 1:
+        return _load_entry(torch, path, entries[shards[0]], map_location=map_location, mmap=mmap)
+    merged: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(shards)))) as pool:
+        parts = pool.map(
+            lambda shard: _load_entry(torch, path, entries[shard], map_location=map_location, mmap=mmap), shards
+        )
+        for part in parts:
+            merged.update(part)
+    return merged
+
+
+class LazyStateDict(Mapping):
+    """Read-only state dict view that maps a shard only when one of its tensors is requested.
+
+    Shards are memory-mapped, so only the pages of tensors that are actually
+    accessed are read. With an index file, listing keys does not touch any shard.
+    """
+
+    def __init__(self, path: Path, *, map_location: Optional[str] = None):
+        self._torch = _import_torch("load")
+        self.path = path
+        self.map_location = map_location
+        self._entries = _entries(path)
+        self.shards, weight_map = _discover(path, self._entries)
+        if not self.shards:
+            raise FileNotFoundError(f"No known PyTorch checkpoint file in {path}")
+        self._loaded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if weight_map is None:
+            weight_map = {key: shard for shard in self.shards for key in self._shard(shard)}
+        self.weight_map = weight_map
+
+    def _shard(self, shard: str) -> Any:
+        with self._lock:
+            if shard not in self._loaded:
+                self._loaded[shard] = _load_entry(
+                    self._torch, self.path, self._entries[shard], map_location=self.map_location, mmap=True
+                )
+            return self._loaded[shard]
+
+    def __getitem__(self, key: str) -> Any:
+        return self._shard(self.weight_map[key])[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.weight_map)
+
+    def __len__(self) -> int:
+        return len(self.weight_map)
+
+    def loaded_shards(self) -> List[str]:
+        with self._lock:
+            return sorted(self._loaded)
+
+
+def lazy_state_dict(path: Path, *, map_location: Optional[str] = None) -> LazyStateDict:
+    return LazyStateDict(path, map_location=map_location)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import functools
+from typing import Optional
+
+
+@functools.lru_cache(maxsize=None)
+def load_libc() -> Optional[ctypes.CDLL]:
+    """Return the C library (with ``use_errno``) for syscalls ctypes has no wrapper for, or None."""
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+    except OSError:  # pragma: no cover - platform guard
+        return None
@@ -25,7 +25,7 @@ class _JsonFormatter(logging.Formatter):
         }
         if isinstance(record.args, dict):
             payload.update(record.args)
-        for key in ("run_id", "job_id", "step", "checkpoint_path", "event", "reason"):
+        for key in ("run_id", "job_id", "step", "checkpoint_path", "event", "reason", "timings", "phases"):
             if hasattr(record, key):
                 payload[key] = getattr(record, key)
         return json.dumps(payload, sort_keys=True)
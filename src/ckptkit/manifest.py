@@ -6,19 +6,61 @@ import os
 import socket
 import time
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 from . import hashing
+from .compression import decompressed
+from .tracing import span
 
 MANIFEST_NAME = "manifest.json"
 MANIFEST_VERSION = "1"
+# Newline-delimited manifests: one header object, then one compact array per file.
+NDJSON_FORMAT = "ckptkit-ndjson"
+# ``write_manifest`` switches to the NDJSON encoding at this many files unless told otherwise.
+NDJSON_MIN_ENTRIES = 1024
+_OPTIONAL_FIELDS = ("chunks", "origin", "merkle", "compression", "stripes")
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class FileEntry:
     path: str
     size: int
+    # Digest under the manifest's ``hash_algorithm``; the key keeps its historical name.
     sha256: str
+    # [[chunk sha256, chunk size], ...] when the content lives in the root's chunk store.
+    chunks: Optional[List[List[Any]]] = None
+    # Step of the ancestor checkpoint that physically holds an unchanged file in a delta checkpoint.
+    origin: Optional[int] = None
+    # {"chunk_size": n, "chunks": [sha256, ...]}; ``sha256`` then holds the Merkle root.
+    merkle: Optional[Dict[str, Any]] = None
+    # {"codec": name, "frame_size": n, "stored_size": n} when stored framed-compressed;
+    # ``size`` and ``sha256`` always describe the raw bytes.
+    compression: Optional[Dict[str, Any]] = None
+    # {"count": k, "size": n, "digests": [...], "seed": s?}: digests of k stripes of
+    # the raw bytes laid out by hashing.stripe_ranges; sampled validation reads these.
+    stripes: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Optional fields are omitted when unset so plain manifests keep the original layout.
+        return {k: v for k, v in dataclasses.asdict(self).items() if v is not None}
+
+    def to_record(self) -> List[Any]:
+        record: List[Any] = [self.path, self.size, self.sha256]
+        optional = {k: getattr(self, k) for k in _OPTIONAL_FIELDS if getattr(self, k) is not None}
+        if optional:
+            record.append(optional)
+        return record
+
+    @staticmethod
+    def from_record(record: List[Any]) -> "FileEntry":
+        if not isinstance(record, list) or len(record) < 3:
+            raise ValueError(f"malformed manifest record: {record!r}")
+        entry = FileEntry(path=str(record[0]), size=int(record[1]), sha256=str(record[2]))
+        if len(record) > 3:
+            for key, value in record[3].items():
+                if key in _OPTIONAL_FIELDS:
+                    setattr(entry, key, value)
+        return entry
 
 
 @dataclasses.dataclass
@@ -35,6 +77,27 @@ class Manifest:
     precision: Optional[str] = None
     model_name: Optional[str] = None
     extra: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    parent: Optional[int] = None
+    hash_algorithm: str = hashing.DEFAULT_ALGORITHM
+
+    def header(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "created_at": self.created_at,
+            "job_id": self.job_id,
+            "run_id": self.run_id,
+            "step": self.step,
+            "host": self.host,
+            "world_size": self.world_size,
+            "file_count": len(self.files),
+            "total_bytes": sum(f.size for f in self.files),
+            "framework": self.framework,
+            "precision": self.precision,
+            "model_name": self.model_name,
+            "extra": self.extra,
+            "parent": self.parent,
+            "hash_algorithm": self.hash_algorithm,
+        }
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -45,16 +108,19 @@ class Manifest:
             "step": self.step,
             "host": self.host,
             "world_size": self.world_size,
-            "files": [dataclasses.asdict(f) for f in self.files],
+            "files": [f.to_dict() for f in self.files],
             "framework": self.framework,
             "precision": self.precision,
             "model_name": self.model_name,
             "extra": self.extra,
+            "parent": self.parent,
+            "hash_algorithm": self.hash_algorithm,
         }
 
     @staticmethod
-    def from_dict(data: Dict[str, Any]) -> "Manifest":
-        files = [FileEntry(**f) for f in data.get("files", [])]
+    def from_dict(data: Dict[str, Any], files: Optional[List[FileEntry]] = None) -> "Manifest":
+        if files is None:
+            files = [FileEntry(**f) for f in data.get("files", [])]
         return Manifest(
             version=str(data["version"]),
             created_at=float(data["created_at"]),
@@ -68,6 +134,8 @@ class Manifest:
             precision=data.get("precision"),
             model_name=data.get("model_name"),
             extra=data.get("extra", {}),
+            parent=data.get("parent"),
+            hash_algorithm=str(data.get("hash_algorithm", hashing.DEFAULT_ALGORITHM)),
         )
 
 
@@ -75,20 +143,131 @@ def manifest_path(checkpoint_dir: Path) -> Path:
     return checkpoint_dir / MANIFEST_NAME
 
 
-def write_manifest(path: Path, manifest: Manifest) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(manifest.to_dict(), f, sort_keys=True, indent=2)
+def write_manifest(path: Path, manifest: Manifest, *, fmt: Optional[str] = None) -> None:
+    """Write ``manifest`` as indented JSON (``fmt="json"``) or NDJSON (``fmt="ndjson"``).
+
+    Without ``fmt`` a rewritten manifest keeps its current encoding and a new
+    one uses NDJSON from ``NDJSON_MIN_ENTRIES`` files on.
+    """
+    if fmt is None and path.exists():
+        fmt = manifest_format(path)
+    if fmt is None:
+        fmt = "ndjson" if len(manifest.files) >= NDJSON_MIN_ENTRIES else "json"
+    with span("manifest.write", format=fmt, files=len(manifest.files)) as s, open(path, "w", encoding="utf-8") as f:
+        if fmt == "json":
+            json.dump(manifest.to_dict(), f, sort_keys=True, indent=2)
+        elif fmt == "ndjson":
+            header = {"format": NDJSON_FORMAT, **manifest.header()}
+            f.write(json.dumps(header, sort_keys=True, separators=(",", ":")) + "\n")
+            for entry in manifest.files:
+                f.write(json.dumps(entry.to_record(), separators=(",", ":")) + "\n")
+        else:
+            raise ValueError(f"unknown manifest format {fmt!r}")
         f.flush()
         os.fsync(f.fileno())
+        s.add_bytes(f.tell())
+
+
+def _read_header_line(f) -> Optional[Dict[str, Any]]:
+    # NDJSON manifests announce themselves on the first line; indented JSON
+    # manifests start with a bare "{" that does not parse on its own.
+    first = f.readline()
+    try:
+        data = json.loads(first)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and data.get("format") == NDJSON_FORMAT:
+        return data
+    return None
+
+
+def manifest_format(path: Path) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return "ndjson" if _read_header_line(f) is not None else "json"
+
+
+def read_manifest_header(path: Path) -> Dict[str, Any]:
+    """Manifest fields without the file list; NDJSON manifests only read their first line."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = _read_header_line(f)
+        if header is not None:
+            _validate_manifest_schema({**header, "files": []})
+            return header
+        f.seek(0)
+        data = json.load(f)
+    _validate_manifest_schema(data)
+    files = data.pop("files")
+    data["file_count"] = len(files)
+    data["total_bytes"] = sum(int(e["size"]) for e in files)
+    return data
+
+
+def iter_manifest_entries(path: Path) -> Iterator[FileEntry]:
+    with open(path, "r", encoding="utf-8") as f:
+        if _read_header_line(f) is None:
+            f.seek(0)
+            data = json.load(f)
+            _validate_manifest_schema(data)
+            for item in data["files"]:
+                yield FileEntry(**item)
+            return
+        for line in f:
+            if line.strip():
+                yield FileEntry.from_record(json.loads(line))
 
 
 def read_manifest(path: Path) -> Manifest:
     with open(path, "r", encoding="utf-8") as f:
+        header = _read_header_line(f)
+        if header is not None:
+            files = [FileEntry.from_record(json.loads(line)) for line in f if line.strip()]
+            _validate_manifest_schema({**header, "files": []})
+            if "file_count" in header and len(files) != header["file_count"]:
+                raise ValueError(f"manifest lists {len(files)} files, header says {header['file_count']}")
+            return Manifest.from_dict(header, files)
+        f.seek(0)
         data = json.load(f)
     _validate_manifest_schema(data)
     return Manifest.from_dict(data)
 
 
+def build_manifest(
+    files: Mapping[str, Tuple[int, str]],
+    job_id: str,
+    run_id: str,
+    step: int,
+    world_size: int,
+    *,
+    framework: Optional[str] = None,
+    precision: Optional[str] = None,
+    model_name: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    algorithm: str = hashing.DEFAULT_ALGORITHM,
+    compression: Optional[Mapping[str, Dict[str, Any]]] = None,
+) -> Manifest:
+    compression = compression or {}
+    entries = [
+        FileEntry(path=path, size=size, sha256=digest, compression=compression.get(path))
+        for path, (size, digest) in files.items()
+    ]
+    entries.sort(key=lambda f: f.path)
+    return Manifest(
+        version=MANIFEST_VERSION,
+        created_at=time.time(),
+        job_id=job_id,
+        run_id=run_id,
+        step=step,
+        host=socket.gethostname(),
+        world_size=world_size,
+        files=entries,
+        framework=framework,
+        precision=precision,
+        model_name=model_name,
+        extra=extra or {},
+        hash_algorithm=algorithm,
+    )
+
+
 def compute_manifest(
     checkpoint_dir: Path,
     job_id: str,
@@ -103,7 +282,22 @@ def compute_manifest(
     threads: int = 4,
     extra: Optional[Dict[str, Any]] = None,
     ignore: Optional[Iterable[str]] = None,
+    recorded: Optional[Mapping[str, Tuple[int, str]]] = None,
+    merkle_chunk_size: Optional[int] = None,
+    algorithm: str = hashing.DEFAULT_ALGORITHM,
+    compression: Optional[Mapping[str, Dict[str, Any]]] = None,
+    stripes: Optional[int] = None,
+    stripe_fraction: float = 0.0,
+    stripe_seed: Optional[int] = None,
 ) -> Manifest:
+    # ``recorded`` holds digests captured while writing (see hashing.HashingSink);
+    # those files are not read back, and ``compression`` describes the recorded
+    # files the sink stored compressed. Files larger than ``merkle_chunk_size`` get
+    # per-chunk digests hashed in parallel instead of a single sequential digest.
+    # With ``stripes`` set, every other file too large to be covered by them gets
+    # the digests of ``stripes`` stripes (see hashing.stripe_ranges); those are
+    # read back for recorded files as well, while they are still in the page cache.
+    recorded = recorded or {}
     ignore_names = set(ignore or [])
     ignore_names.add(MANIFEST_NAME)
     files: List[Path] = []
@@ -112,34 +306,91 @@ def compute_manifest(
             if name in ignore_names:
                 continue
             path = Path(root) / name
+            if path.relative_to(checkpoint_dir).as_posix() in recorded:
+                continue
             files.append(path)
-    rel_files = [f.relative_to(checkpoint_dir) for f in files]
+    rel_files = [f.relative_to(checkpoint_dir).as_posix() for f in files]
     sizes = {rel: f.stat().st_size for rel, f in zip(rel_files, files)}
-    hashes = hashing.hash_paths(
-        files,
-        sample_bytes=sample_bytes,
-        threads=threads,
-    )
-    entries = [
-        FileEntry(path=str(rel), size=sizes[rel], sha256=hashes[path])
-        for rel, path in zip(rel_files, files)
-    ]
-    entries.sort(key=lambda f: f.path)
-    manifest_obj = Manifest(
-        version=MANIFEST_VERSION,
-        created_at=time.time(),
+    chunked: Dict[Path, List[str]] = {}
+    with span("manifest.hash", files=len(files), recorded=len(recorded)) as s:
+        s.add_bytes(sum(sizes.values()))
+        if merkle_chunk_size:
+            large = [f for rel, f in zip(rel_files, files) if sizes[rel] > merkle_chunk_size]
+            chunked = hashing.merkle_paths(large, chunk_size=merkle_chunk_size, threads=threads, algorithm=algorithm)
+        hashes = hashing.hash_paths(
+            [f for f in files if f not in chunked],
+            sample_bytes=sample_bytes,
+            threads=threads,
+            algorithm=algorithm,
+        )
+    hashes.update({path: hashing.merkle_root(digests, algorithm=algorithm) for path, digests in chunked.items()})
+    records: Dict[str, Tuple[int, str]] = dict(recorded)
+    for rel, path in zip(rel_files, files):
+        records[rel] = (sizes[rel], hashes[path])
+    manifest = build_manifest(
+        records,
         job_id=job_id,
         run_id=run_id,
         step=step,
-        host=socket.gethostname(),
         world_size=world_size,
-        files=entries,
         framework=framework,
         precision=precision,
         model_name=model_name,
-        extra=extra or {},
+        extra=extra,
+        algorithm=algorithm,
+        compression=compression,
+    )
+    if chunked:
+        by_rel = {rel: path for rel, path in zip(rel_files, files)}
+        for entry in manifest.files:
+            path = by_rel.get(entry.path)
+            if path in chunked:
+                entry.merkle = {"chunk_size": merkle_chunk_size, "chunks": chunked[path]}
+    if stripes:
+        _record_stripes(
+            checkpoint_dir,
+            manifest,
+            count=stripes,
+            fraction=stripe_fraction,
+            seed=stripe_seed,
+            threads=threads,
+            algorithm=algorithm,
+        )
+    return manifest
+
+
+def _record_stripes(
+    checkpoint_dir: Path,
+    manifest: Manifest,
+    *,
+    count: int,
+    fraction: float,
+    seed: Optional[int],
+    threads: int,
+    algorithm: str,
+) -> None:
+    planned: List[Tuple[FileEntry, int, hashing.StripeSource, List[Tuple[int, int]]]] = []
+    for entry in manifest.files:
+        if entry.merkle is not None:
+            continue
+        stripe_size = hashing.stripe_size_for(entry.size, count, fraction)
+        if count * stripe_size >= entry.size:
+            continue
+        path = checkpoint_dir / entry.path
+        source: hashing.StripeSource = path
+        if entry.compression is not None:
+            source = lambda p=path, c=entry.compression: decompressed(open(p, "rb"), c)  # noqa: E731
+        ranges = hashing.stripe_ranges(entry.size, count, stripe_size, seed=seed, key=entry.path)
+        planned.append((entry, stripe_size, source, ranges))
+    if not planned:
+        return
+    digests = hashing.hash_stripes(
+        [(source, ranges) for _, _, source, ranges in planned], threads=threads, algorithm=algorithm
     )
-    return manifest_obj
+    for (entry, stripe_size, _, _), file_digests in zip(planned, digests):
+        entry.stripes = {"count": count, "size": stripe_size, "digests": file_digests}
+        if seed is not None:
+            entry.stripes["seed"] = seed
 
 
 def _validate_manifest_schema(data: Dict[str, Any]) -> None:
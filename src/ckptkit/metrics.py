@@ -1,21 +1,45 @@
 from __future__ import annotations
 
+import contextlib
+import dataclasses
 import datetime
+import json
 import os
 import tempfile
+import threading
 import urllib.error
 import urllib.request
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, Mapping, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
-from .fs import disk_free_bytes
+from .catalog import Catalog
+from .fs import _tmp_name, disk_free_bytes
 from .validate import ValidationResult, Reason
 from .resume import ResumePlan
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+from .tracing import Tracer
+
 LabelMap = Mapping[str, str]
 
 
+DURATION_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1200, 3600)
+# Phases such as the rename or the latest-pointer swap take milliseconds.
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1200)
+STATE_VERSION = 1
+
+
+def _label_str(labels: Mapping[str, str], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in sorted(labels.items())]
+    if extra:
+        parts.append(extra)
+    return f"{{{','.join(parts)}}}" if parts else ""
+
+
 @dataclass
 class MetricSample:
     name: str
@@ -24,17 +48,55 @@ class MetricSample:
     metric_type: str = "gauge"
 
     def render(self) -> str:
-        label_str = ""
-        if self.labels:
-            joined = ",".join(f'{k}="{v}"' for k, v in sorted(self.labels.items()))
-            label_str = f"{{{joined}}}"
-        return f"{self.name}{label_str} {self.value}"
+        return f"{self.name}{_label_str(self.labels)} {self.value}"
+
+
+@dataclass
+class HistogramSample:
+    name: str
+    buckets: List[float]
+    counts: List[int]
+    labels: Dict[str, str] = field(default_factory=dict)
+    total: float = 0.0
+    count: int = 0
+    metric_type: str = "histogram"
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self) -> str:
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        cumulative = [*self.counts, self.count]
+        lines = [
+            f"{self.name}_bucket{_label_str(self.labels, 'le=' + json.dumps(le))} {count}"
+            for le, count in zip(bounds, cumulative)
+        ]
+        lines.append(f"{self.name}_sum{_label_str(self.labels)} {self.total}")
+        lines.append(f"{self.name}_count{_label_str(self.labels)} {self.count}")
+        return "\n".join(lines)
 
 
 class MetricsEmitter:
+    """In-process metric registry.
+
+    Counters and histograms accumulate for the lifetime of the emitter (and
+    across restarts with ``save_state``/``load_state``, which keep only those;
+    gauges describe the current state and are recomputed), so a long-lived
+    emitter can back an HTTP exporter. ``text()`` renders the Prometheus text
+    format with ``# TYPE`` lines and is cached until the next update.
+    """
+
     def __init__(self, base_labels: LabelMap | None = None):
         self.samples: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], MetricSample] = {}
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], HistogramSample] = {}
         self.base_labels = dict(base_labels or {})
+        self.version = 0
+        self._lock = threading.RLock()
+        self._rendered: Tuple[int, str] = (-1, "")
 
     def _key(self, name: str, labels: LabelMap) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
         merged = {**self.base_labels, **labels}
@@ -44,22 +106,103 @@ class MetricsEmitter:
         labels = labels or {}
         key = self._key(name, labels)
         merged_labels = {**self.base_labels, **labels}
-        self.samples[key] = MetricSample(name=name, value=value, labels=merged_labels, metric_type="gauge")
+        with self._lock:
+            self.samples[key] = MetricSample(name=name, value=value, labels=merged_labels, metric_type="gauge")
+            self.version += 1
 
     def counter(self, name: str, value: float, labels: LabelMap | None = None) -> None:
         labels = labels or {}
         key = self._key(name, labels)
         merged_labels = {**self.base_labels, **labels}
-        if key in self.samples:
-            self.samples[key].value += value
-        else:
-            self.samples[key] = MetricSample(name=name, value=value, labels=merged_labels, metric_type="counter")
+        with self._lock:
+            if key in self.samples:
+                self.samples[key].value += value
+            else:
+                self.samples[key] = MetricSample(name=name, value=value, labels=merged_labels, metric_type="counter")
+            self.version += 1
+
+    def histogram(
+        self,
+        name: str,
+        value: float,
+        labels: LabelMap | None = None,
+        *,
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> None:
+        labels = labels or {}
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = HistogramSample(
+                    name=name,
+                    buckets=[float(b) for b in buckets],
+                    counts=[0] * len(buckets),
+                    labels={**self.base_labels, **labels},
+                )
+                self.histograms[key] = hist
+            hist.observe(value)
+            self.version += 1
+
+    def remove(self, name: str, labels: LabelMap | None = None) -> None:
+        with self._lock:
+            if self.samples.pop(self._key(name, labels or {}), None) is not None:
+                self.version += 1
 
     def text(self) -> str:
-        lines = []
-        for sample in sorted(self.samples.values(), key=lambda s: (s.name, sorted(s.labels.items()))):
-            lines.append(sample.render())
-        return "\n".join(lines) + "\n"
+        with self._lock:
+            if self._rendered[0] == self.version:
+                return self._rendered[1]
+            families: Dict[str, Tuple[str, List[str]]] = {}
+            series: List[Any] = [*self.samples.values(), *self.histograms.values()]
+            for sample in sorted(series, key=lambda s: (s.name, sorted(s.labels.items()))):
+                family = families.setdefault(sample.name, (sample.metric_type, []))
+                family[1].append(sample.render())
+            lines = []
+            for name, (metric_type, rendered) in families.items():
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(rendered)
+            text = "\n".join(lines) + "\n"
+            self._rendered = (self.version, text)
+            return text
+
+    def save_state(self, path: Path) -> None:
+        with self._lock:
+            payload = {
+                "version": STATE_VERSION,
+                "samples": [dataclasses.asdict(s) for s in self.samples.values() if s.metric_type == "counter"],
+                "histograms": [dataclasses.asdict(h) for h in self.histograms.values()],
+            }
+        tmp = path.parent / _tmp_name("metrics_state")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def load_state(self, path: Path) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(payload, dict) or payload.get("version") != STATE_VERSION:
+            return False
+        with self._lock:
+            for data in payload.get("samples", []):
+                sample = MetricSample(**data)
+                if sample.metric_type != "counter":
+                    # Older state files also held gauges, e.g. for checkpoints that are long gone.
+                    continue
+                self.samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample
+            for data in payload.get("histograms", []):
+                hist = HistogramSample(**data)
+                self.histograms[(hist.name, tuple(sorted(hist.labels.items())))] = hist
+            self.version += 1
+        return True
 
     def write_textfile(self, path: Path) -> None:
         tmp = Path(tempfile.mkstemp(prefix=".ckptkit", dir=path.parent)[1])
@@ -84,10 +227,79 @@ class MetricsEmitter:
             raise RuntimeError(f"pushgateway push failed: {exc}") from exc
 
 
+def state_path(path: Path, role: str) -> Path:
+    """The state file of one kind of writer (``write``, ``watch``), so writers that run at once never share one."""
+    return path.with_name(f"{path.stem}.{role}{path.suffix}")
+
+
+@contextlib.contextmanager
+def persisted_counters(emitter: MetricsEmitter, path: Path) -> Iterator[MetricsEmitter]:
+    """Load ``path`` into ``emitter``, let the caller record, then save it, all under an exclusive file lock.
+
+    For short-lived processes (``ckptkit write`` on several hosts or ranks)
+    that share a state file: their increments add up instead of the last
+    writer's totals winning.
+    """
+    lock_path = path.with_name(path.name + ".lock")
+    with open(lock_path, "a+") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            emitter.load_state(path)
+            yield emitter
+            emitter.save_state(path)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+class StatePersister:
+    """Restores ``emitter`` from ``path`` on start, then saves it every ``interval`` seconds (when it changed) and on stop.
+
+    For long-running processes such as ``ckptkit watch``, whether or not they
+    also serve ``/metrics``.
+    """
+
+    def __init__(self, emitter: MetricsEmitter, path: Path, *, interval: float = 60.0):
+        self.emitter = emitter
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._saved_version = -1
+
+    def persist(self) -> None:
+        if self.emitter.version == self._saved_version:
+            return
+        version = self.emitter.version
+        self.emitter.save_state(self.path)
+        self._saved_version = version
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.persist()
+
+    def start(self) -> "StatePersister":
+        if self.emitter.load_state(self.path):
+            self._saved_version = self.emitter.version
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ckptkit-metrics-state", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.persist()
+
+
 def record_validation_metrics(emitter: MetricsEmitter, results: Iterable[ValidationResult]) -> None:
     failure_reasons: Dict[str, int] = {}
     total_failures = 0
     for res in results:
+        emitter.counter("checkpoint_validations_total", 1.0, labels={"result": "valid" if res.valid else "invalid"})
         if res.valid:
             continue
         total_failures += 1
@@ -119,18 +331,27 @@ def record_checkpoint_write(
     emitter.gauge("checkpoint_last_success_timestamp", datetime.datetime.utcnow().timestamp())
     emitter.gauge("checkpoint_last_duration_seconds", duration_seconds)
     emitter.counter("checkpoint_write_bytes_total", total_bytes)
-    # Emit histogram-style buckets for duration.
-    buckets = [0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1200, 3600]
-    for b in buckets:
-        emitter.counter(
-            "checkpoint_last_duration_seconds_bucket",
-            1.0 if duration_seconds <= b else 0.0,
-            labels={"le": str(b)},
+    emitter.counter("checkpoint_writes_total", 1.0)
+    emitter.histogram("checkpoint_write_duration_seconds", duration_seconds)
+
+
+def record_trace(emitter: MetricsEmitter, tracer: Tracer) -> None:
+    # One observation per span, so repeated phases (e.g. one validate per resume candidate) each count.
+    for s in tracer.spans:
+        emitter.histogram(
+            "checkpoint_phase_duration_seconds", s.duration, labels={"phase": s.name}, buckets=PHASE_BUCKETS
         )
-    emitter.counter("checkpoint_last_duration_seconds_bucket", 1.0, labels={"le": "+Inf"})
-    emitter.counter("checkpoint_last_duration_seconds_count", 1.0)
-    emitter.counter("checkpoint_last_duration_seconds_sum", duration_seconds)
+        if s.bytes:
+            emitter.counter("checkpoint_phase_bytes_total", float(s.bytes), labels={"phase": s.name})
 
 
 def record_disk_free(emitter: MetricsEmitter, path: Path) -> None:
     emitter.gauge("checkpoint_directory_free_bytes", float(disk_free_bytes(path)))
+
+
+def record_catalog(emitter: MetricsEmitter, catalog: Catalog) -> None:
+    entries = catalog.entries()
+    emitter.gauge("checkpoint_retained_count", float(len(entries)))
+    emitter.gauge("checkpoint_retained_bytes", float(sum(e.total_bytes for e in entries)))
+    if entries:
+        emitter.gauge("checkpoint_latest_step", float(entries[-1].step))
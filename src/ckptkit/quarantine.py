@@ -3,11 +3,13 @@ from __future__ import annotations
 import datetime
 import uuid
 from pathlib import Path
+from typing import Optional
 
+from .catalog import Catalog
 from .fs import ensure_dir, fsync_dir
 
 
-def quarantine(checkpoint: Path, *, root: Path, reason: str) -> Path:
+def quarantine(checkpoint: Path, *, root: Path, reason: str, catalog: Optional[Catalog] = None) -> Path:
     corrupt_dir = root / "corrupt"
     ensure_dir(corrupt_dir)
     target = corrupt_dir / f"{checkpoint.name}-{uuid.uuid4().hex}"
@@ -17,4 +19,6 @@ def quarantine(checkpoint: Path, *, root: Path, reason: str) -> Path:
         f.write(f"{datetime.datetime.utcnow().isoformat()}Z {reason}\n")
         f.flush()
     fsync_dir(corrupt_dir)
+    if catalog is not None:
+        catalog.move(checkpoint, target, status="quarantined")
     return target
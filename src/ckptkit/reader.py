@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from . import hashing
+from .chunkstore import ChunkStore
+from .compression import decompressed
+from .fs import find_checkpoint
+from .manifest import FileEntry
+from .throttle import IOBudget, throttled
+
+# Resolves where the bytes of a manifest entry live: a plain file in the
+# checkpoint directory, a plain file in the ancestor named by ``entry.origin``
+# (delta checkpoints), or chunks in the root's content-addressed store. Any of
+# these may hold framed-compressed bytes (``entry.compression``), which are
+# decompressed on the fly. ``base`` is the directory that holds the entry's plain file.
+
+
+def entry_base(checkpoint: Path, entry: FileEntry) -> Optional[Path]:
+    if entry.origin is None:
+        return checkpoint
+    return find_checkpoint(checkpoint.parent, entry.origin)
+
+
+def missing_parts(base: Path, entry: FileEntry, store: Optional[ChunkStore]) -> List[str]:
+    if entry.chunks is None:
+        return [] if (base / entry.path).exists() else [entry.path]
+    if store is None:
+        return [f"chunk store for {entry.path}"]
+    return [digest for digest, _ in entry.chunks if not store.has(digest)]
+
+
+def expected_stored_size(entry: FileEntry) -> int:
+    return int(entry.compression["stored_size"]) if entry.compression else entry.size
+
+
+def stored_size(base: Path, entry: FileEntry, store: Optional[ChunkStore]) -> int:
+    if entry.chunks is None:
+        return (base / entry.path).stat().st_size
+    assert store is not None
+    return sum(store.chunk_path(digest).stat().st_size for digest, _ in entry.chunks)
+
+
+def open_entry(checkpoint: Path, entry: FileEntry, store: Optional[ChunkStore] = None) -> BinaryIO:
+    if entry.chunks is None:
+        base = entry_base(checkpoint, entry)
+        if base is None:
+            raise FileNotFoundError(f"ancestor step {entry.origin} holding {entry.path} not found")
+        return decompressed(open(base / entry.path, "rb"), entry.compression)
+    store = store or ChunkStore.for_checkpoint(checkpoint)
+    if store is None:
+        raise FileNotFoundError(f"no chunk store found for {checkpoint}")
+    return decompressed(store.open(entry), entry.compression)  # type: ignore[arg-type]
+
+
+def _stored_opener(base: Path, entry: FileEntry, store: Optional[ChunkStore]) -> Callable[[], BinaryIO]:
+    if entry.chunks is None:
+        return lambda: open(base / entry.path, "rb")
+    assert store is not None
+    return lambda: store.open(entry)  # type: ignore[return-value]
+
+
+def _opener(base: Path, entry: FileEntry, store: Optional[ChunkStore]) -> Callable[[], BinaryIO]:
+    stored = _stored_opener(base, entry, store)
+    if entry.compression is None:
+        return stored
+    return lambda: decompressed(stored(), entry.compression)
+
+
+def verify_merkle(
+    entries: List[Tuple[Path, FileEntry]],
+    *,
+    store: Optional[ChunkStore] = None,
+    sampled: bool = False,
+    threads: int = 4,
+    algorithm: str = hashing.DEFAULT_ALGORITHM,
+    budget: Optional[IOBudget] = None,
+) -> Dict[str, List[int]]:
+    # Returns the indices of chunks whose digest differs from the manifest. In
+    # sampled mode only the first and last chunk of each file are read. A chunk
+    # list that does not hash to the file's recorded root (or does not cover the
+    # file) cannot vouch for any chunk, so every chunk of that file is reported.
+    tasks: List[hashing.RangeTask] = []
+    owners: List[Tuple[str, int, str]] = []
+    bad: Dict[str, List[int]] = {entry.path: [] for _, entry in entries}
+    for base, entry in entries:
+        assert entry.merkle is not None
+        expected = entry.merkle["chunks"]
+        ranges = hashing.chunk_ranges(entry.size, int(entry.merkle["chunk_size"]))
+        if len(expected) != len(ranges) or hashing.merkle_root(expected, algorithm=algorithm) != entry.sha256:
+            bad[entry.path] = list(range(len(ranges)))
+            continue
+        indices = range(len(ranges))
+        if sampled and len(ranges) > 2:
+            indices = range(0, len(ranges), len(ranges) - 1)
+        opener = _opener(base, entry, store)
+        for index in indices:
+            tasks.append((opener, *ranges[index]))
+            owners.append((entry.path, index, expected[index]))
+    digests = hashing.hash_ranges(tasks, threads=threads, algorithm=algorithm, budget=budget)
+    for (path, index, expected_digest), digest in zip(owners, digests):
+        if digest != expected_digest:
+            bad[path].append(index)
+    return bad
+
+
+def entry_stripe_ranges(entry: FileEntry) -> List[Tuple[int, int]]:
+    assert entry.stripes is not None
+    return hashing.stripe_ranges(
+        entry.size,
+        int(entry.stripes["count"]),
+        int(entry.stripes["size"]),
+        seed=entry.stripes.get("seed"),
+        key=entry.path,
+    )
+
+
+def verify_stripes(
+    entries: List[Tuple[Path, FileEntry]],
+    *,
+    store: Optional[ChunkStore] = None,
+    threads: int = 4,
+    algorithm: str = hashing.DEFAULT_ALGORITHM,
+    budget: Optional[IOBudget] = None,
+) -> Dict[str, List[int]]:
+    # Returns the indices of stripes whose digest differs from the manifest.
+    files: List[Tuple[hashing.StripeSource, List[Tuple[int, int]]]] = []
+    for base, entry in entries:
+        plain = entry.chunks is None and entry.compression is None
+        files.append((base / entry.path if plain else _opener(base, entry, store), entry_stripe_ranges(entry)))
+    digests = hashing.hash_stripes(files, threads=threads, algorithm=algorithm, budget=budget)
+    bad: Dict[str, List[int]] = {}
+    for (_, entry), got in zip(entries, digests):
+        assert entry.stripes is not None
+        bad[entry.path] = [i for i, (a, b) in enumerate(zip(got, entry.stripes["digests"])) if a != b]
+    return bad
+
+
+def _hash_streamed(
+    base: Path,
+    entry: FileEntry,
+    store: Optional[ChunkStore],
+    sample_bytes: Optional[int],
+    algorithm: str,
+    budget: Optional[IOBudget],
+) -> str:
+    # The budget is charged for stored bytes, before decompression.
+    raw = throttled(_stored_opener(base, entry, store)(), budget)
+    try:
+        f = decompressed(raw, entry.compression)
+    except Exception as exc:
+        raw.close()
+        return f"unreadable ({exc})"
+    with f:
+        try:
+            return hashing.hash_stream(f, entry.size, algorithm=algorithm, sample_bytes=sample_bytes)
+        except Exception as exc:
+            # Corrupt compressed frames fail to decode; report them as a digest mismatch.
+            if entry.compression is None:
+                raise
+            return f"unreadable ({exc})"
+
+
+def hash_entries(
+    entries: List[Tuple[Path, FileEntry]],
+    *,
+    store: Optional[ChunkStore] = None,
+    sample_bytes: Optional[int] = None,
+    threads: int = 4,
+    algorithm: str = hashing.DEFAULT_ALGORITHM,
+    budget: Optional[IOBudget] = None,
+) -> Dict[str, str]:
+    results: Dict[str, str] = {}
+    plain = {base / e.path: e.path for base, e in entries if e.chunks is None and e.compression is None}
+    if plain:
+        hashes = hashing.hash_paths(
+            list(plain), sample_bytes=sample_bytes, threads=threads, algorithm=algorithm, budget=budget
+        )
+        for path, digest in hashes.items():
+            results[plain[path]] = digest
+    streamed = [(base, e) for base, e in entries if e.chunks is not None or e.compression is not None]
+    if streamed:
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            digests = executor.map(
+                lambda item: _hash_streamed(item[0], item[1], store, sample_bytes, algorithm, budget), streamed
+            )
+            for (_, entry), digest in zip(streamed, digests):
+                results[entry.path] = digest
+    return results
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from .chunkstore import CHUNKS_DIR, ChunkStore
+from .fs import ensure_dir, fsync_dir
+from .throttle import IOBudget
+
+# Retention with ``deferred`` set renames victims in here instead of deleting
+# them; ``Reaper`` unlinks them later. Names without a manifest at the top
+# level are ignored by listings, the catalog and the chunk store.
+TRASH_DIR = ".trash"
+
+
+def move_to_trash(root: Path, checkpoint: Path) -> Path:
+    trash = root / TRASH_DIR
+    ensure_dir(trash)
+    target = trash / f"{checkpoint.name}-{uuid.uuid4().hex[:8]}"
+    checkpoint.replace(target)
+    return target
+
+
+def trashed(root: Path) -> List[Path]:
+    trash = root / TRASH_DIR
+    if not trash.is_dir():
+        return []
+    return sorted(child for child in trash.iterdir() if not child.is_symlink())
+
+
+class Reaper:
+    """Deletes trashed checkpoints under ``root`` in the background.
+
+    Files are unlinked in batches of ``batch_size`` by ``threads`` workers, at
+    most ``files_per_second`` of them per second, then the emptied directories
+    are removed. Everything it works on lives in ``<root>/.trash``, so a reaper
+    started after a crash simply carries on where the last one stopped. Chunk
+    garbage collection runs after each pass that found trash, since
+    deferred retention skips it.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        threads: int = 4,
+        files_per_second: Optional[float] = None,
+        batch_size: int = 256,
+        poll_interval: float = 30.0,
+    ):
+        self.root = root
+        self.threads = max(1, threads)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.budget = IOBudget(max_inflight=self.threads, iops=files_per_second)
+        self.files_removed = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._drain = True
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "Reaper":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ckptkit-reaper", daemon=True)
+            self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, *, drain: bool = True, timeout: Optional[float] = None) -> None:
+        # With ``drain`` the current trash is emptied before the thread exits.
+        self._drain = drain
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.reap()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        if self._drain:
+            self.reap()
+
+    def _unlink(self, path: Path) -> None:
+        with self.budget.slot():
+            self.budget.consume(0)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def reap(self) -> int:
+        """Delete everything currently in the trash; returns the number of files removed."""
+        removed = 0
+        victims = trashed(self.root)
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for victim in victims:
+                batch: List[Path] = []
+                dirs: List[Path] = []
+                if victim.is_dir():
+                    for root, subdirs, names in os.walk(victim, topdown=False):
+                        dirs.append(Path(root))
+                        # Symlinked directories are not descended into; they are unlinked like files.
+                        for name in names + [d for d in subdirs if (Path(root) / d).is_symlink()]:
+                            batch.append(Path(root) / name)
+                            if len(batch) >= self.batch_size:
+                                list(executor.map(self._unlink, batch))
+                                removed += len(batch)
+                                batch = []
+                else:
+                    batch.append(victim)
+                list(executor.map(self._unlink, batch))
+                removed += len(batch)
+                # Bottom-up, so every directory is empty by the time it is removed.
+                for directory in dirs:
+                    try:
+                        directory.rmdir()
+                    except FileNotFoundError:
+                        pass
+        if victims:
+            fsync_dir(self.root / TRASH_DIR)
+        if victims and (self.root / CHUNKS_DIR).is_dir():
+            ChunkStore(self.root).collect_garbage()
+        self.files_removed += removed
+        return removed
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import collections
+import contextvars
 import json
 import enum
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, Deque, Iterator, List, Optional, Sequence
 
+from .catalog import Catalog
 from .fs import list_checkpoints, read_step, update_latest_pointer
+from .tracing import span
 from .validate import ValidationResult, validate_checkpoint
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .cache import ValidationCache
+
 
 class Policy(str, enum.Enum):
     LATEST_VALID = "latest-valid"
@@ -47,11 +55,61 @@ def _latest_pointer(root: Path) -> Optional[Path]:
     return None
 
 
-def _validate_candidates(candidates: List[Path], *, full_hash: bool = False) -> List[ValidationResult]:
-    results: List[ValidationResult] = []
-    for ckpt in candidates:
-        results.append(validate_checkpoint(ckpt, full_hash=full_hash))
-    return results
+def _ordered_candidates(
+    candidates: List[Path],
+    step_of: Callable[[Path], int],
+    policy: Policy,
+    *,
+    before_step: Optional[int],
+    latest_path: Optional[Path],
+) -> List[Path]:
+    steps = {ckpt: step_of(ckpt) for ckpt in candidates}
+    ordered = sorted(candidates, key=lambda c: steps[c], reverse=True)
+    if policy == Policy.NEWEST_BEFORE:
+        if before_step is None:
+            raise ValueError("before_step required for newest-before policy")
+        ordered = [c for c in ordered if steps[c] <= before_step]
+    elif policy == Policy.LAST_KNOWN_GOOD and latest_path is not None:
+        # The latest pointer is checked first; the rest is the newest-valid fallback.
+        pointed = [c for c in ordered if c.resolve() == latest_path]
+        ordered = pointed + [c for c in ordered if c not in pointed]
+    return ordered
+
+
+def _iter_validations(
+    candidates: List[Path],
+    *,
+    full_hash: bool = False,
+    cache: Optional["ValidationCache"] = None,
+    speculate: int = 0,
+) -> Iterator[ValidationResult]:
+    # Validates lazily in candidate order. With ``speculate`` > 0 the next
+    # candidates are validated in the background while the current one is
+    # checked; work that is no longer needed is cancelled on early exit.
+    if speculate <= 0:
+        for ckpt in candidates:
+            yield validate_checkpoint(ckpt, full_hash=full_hash, cache=cache)
+        return
+    executor = ThreadPoolExecutor(max_workers=speculate + 1)
+    pending: Deque[Future] = collections.deque()
+    remaining = iter(candidates)
+    try:
+        while True:
+            while len(pending) <= speculate:
+                ckpt = next(remaining, None)
+                if ckpt is None:
+                    break
+                # Run in a copy of this context so an active tracer sees the background validations.
+                pending.append(
+                    executor.submit(
+                        contextvars.copy_context().run, validate_checkpoint, ckpt, full_hash=full_hash, cache=cache
+                    )
+                )
+            if not pending:
+                return
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
 def select_checkpoint(
@@ -61,44 +119,91 @@ def select_checkpoint(
     before_step: Optional[int] = None,
     full_hash: bool = False,
     repair_latest: bool = True,
+    cache: Optional["ValidationCache"] = None,
+    catalog: Optional[Catalog] = None,
+    speculate: int = 0,
+    tiers: Sequence[Path] = (),
 ) -> ResumePlan:
-    candidates = list_checkpoints(root)
-    validations = _validate_candidates(candidates, full_hash=full_hash)
-    validations.sort(key=lambda r: read_step(r.checkpoint), reverse=True)
-    latest_path = _latest_pointer(root)
+    # ``tiers`` are slower roots holding copies of the same run (see tiering.TieredStorage).
+    # Their checkpoints are candidates too; for equal steps the copy under ``root``,
+    # then the earlier tier, is validated first.
+    with span("resume", policy=Policy(policy).value) as s:
+        plan = _select_checkpoint(
+            root,
+            policy,
+            before_step=before_step,
+            full_hash=full_hash,
+            repair_latest=repair_latest,
+            cache=cache,
+            catalog=catalog,
+            speculate=speculate,
+            tiers=tiers,
+        )
+        s.set(checkpoint=plan.checkpoint.name, step=plan.step)
+        return plan
+
+
+def _select_checkpoint(
+    root: Path,
+    policy: Policy,
+    *,
+    before_step: Optional[int],
+    full_hash: bool,
+    repair_latest: bool,
+    cache: Optional["ValidationCache"],
+    catalog: Optional[Catalog],
+    speculate: int,
+    tiers: Sequence[Path],
+) -> ResumePlan:
+    with span("resume.list") as s:
+        if catalog is not None:
+            catalog.refresh()
+            candidates = catalog.checkpoints()
+            step_of = catalog.step
+        else:
+            candidates = list_checkpoints(root)
+            step_of = read_step
+        if tiers:
+            root_step_of = step_of
+            for tier in tiers:
+                candidates = candidates + list_checkpoints(tier)
+            step_of = lambda c: root_step_of(c) if c.parent == root else read_step(c)  # noqa: E731
+        latest_path = _latest_pointer(root)
+        if latest_path is not None:
+            latest_path = latest_path.resolve()
+        ordered = _ordered_candidates(candidates, step_of, policy, before_step=before_step, latest_path=latest_path)
+        s.set(candidates=len(ordered))
 
-    def pick_first(predicate) -> Optional[ValidationResult]:
+    chosen: Optional[ValidationResult] = None
+    newest: Optional[ValidationResult] = None
+    validations = _iter_validations(ordered, full_hash=full_hash, cache=cache, speculate=speculate)
+    try:
         for v in validations:
-            if predicate(v):
-                return v
-        return None
+            if catalog is not None and v.checkpoint.parent == root:
+                catalog.set_status(v.checkpoint, "valid" if v.valid else "invalid")
+            if newest is None:
+                newest = v
+            if v.valid:
+                chosen = v
+                break
+    finally:
+        validations.close()
 
-    chosen: Optional[ValidationResult] = None
     reason = ""
     if policy == Policy.LATEST_VALID:
-        chosen = pick_first(lambda v: v.valid)
         reason = "latest valid checkpoint"
     elif policy == Policy.LAST_KNOWN_GOOD:
-        if latest_path:
-            for v in validations:
-                if v.checkpoint == latest_path and v.valid:
-                    chosen = v
-                    reason = "latest pointer valid"
-                    break
-        if chosen is None:
-            chosen = pick_first(lambda v: v.valid)
+        if chosen is not None and latest_path is not None and chosen.checkpoint.resolve() == latest_path:
+            reason = "latest pointer valid"
+        else:
             reason = "fallback to newest valid"
     elif policy == Policy.NEWEST_BEFORE:
-        if before_step is None:
-            raise ValueError("before_step required for newest-before policy")
-        chosen = pick_first(lambda v: v.valid and v.manifest and v.manifest.step <= before_step)
         reason = f"newest valid checkpoint before {before_step}"
     elif policy == Policy.BEST:
-        chosen = pick_first(lambda v: v.valid)
         if chosen:
             reason = "best valid checkpoint"
         else:
-            chosen = validations[0] if validations else None
+            chosen = newest
             reason = "no valid checkpoints; using newest even if invalid"
 
     if not chosen:
@@ -106,7 +211,7 @@ def select_checkpoint(
 
     if repair_latest and chosen.valid:
         try:
-            update_latest_pointer(root, chosen.checkpoint)
+            update_latest_pointer(chosen.checkpoint.parent, chosen.checkpoint)
         except Exception:
             pass
 
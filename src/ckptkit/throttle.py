@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import contextlib
+import ctypes
+import logging
+import os
+import platform
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from .libc import load_libc
+
+logger = logging.getLogger(__name__)
+
+IOPRIO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+# Level 7 is the lowest priority within best-effort; 0 would raise it above the default of 4.
+_IOPRIO_LEVELS = {"best-effort": 7}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+_SYS_IOPRIO_SET = {"x86_64": 251, "aarch64": 30, "arm64": 30, "ppc64le": 273}
+_SYS_IOPRIO_GET = {"x86_64": 252, "aarch64": 31, "arm64": 31, "ppc64le": 274}
+
+
+def _ioprio(numbers: Dict[str, int], *args: int) -> Optional[int]:
+    # ``who`` 0 with IOPRIO_WHO_PROCESS is the calling thread; returns None when unsupported or refused.
+    number = numbers.get(platform.machine())
+    libc = load_libc()
+    if number is None or libc is None:
+        return None
+    result = libc.syscall(ctypes.c_long(number), _IOPRIO_WHO_PROCESS, 0, *args)
+    return None if result < 0 else int(result)
+
+
+_nice_skipped = threading.Event()
+
+
+def _can_restore_nice(value: int) -> bool:
+    # Lowering the nice value again needs root or an RLIMIT_NICE ceiling of at least ``20 - value``.
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        return True
+    try:
+        import resource
+
+        soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+    except (ImportError, AttributeError, OSError, ValueError):
+        return False
+    return soft == resource.RLIM_INFINITY or 20 - value <= soft
+
+
+@contextlib.contextmanager
+def lowered_priority(*, io_class: Optional[str] = None, nice: Optional[int] = None) -> Iterator[None]:
+    """Lower the I/O class and nice value of the calling thread for the duration of the block.
+
+    Linux applies both per thread; elsewhere this is a no-op. The previous
+    values are restored on exit, so caller and pool threads are not left
+    throttled. ``nice`` is only applied where it can be undone (root or a
+    sufficient ``RLIMIT_NICE``).
+    """
+    previous_io = None
+    if io_class is not None:
+        previous_io = _ioprio(_SYS_IOPRIO_GET)
+        value = IOPRIO_CLASSES[io_class] << _IOPRIO_CLASS_SHIFT | _IOPRIO_LEVELS.get(io_class, 0)
+        if previous_io is not None and _ioprio(_SYS_IOPRIO_SET, value) is None:
+            previous_io = None
+    tid = threading.get_native_id()
+    previous_nice = None
+    if nice is not None and hasattr(os, "setpriority"):
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, tid)
+            if nice > current and _can_restore_nice(current):
+                os.setpriority(os.PRIO_PROCESS, tid, nice)
+                previous_nice = current
+            elif nice > current and not _nice_skipped.is_set():
+                _nice_skipped.set()
+                logger.warning(
+                    "not applying nice %d: restoring nice %d afterwards needs root or RLIMIT_NICE >= %d",
+                    nice,
+                    current,
+                    20 - current,
+                )
+        except OSError:
+            pass
+    try:
+        yield
+    finally:
+        if previous_nice is not None:
+            with contextlib.suppress(OSError):
+                os.setpriority(os.PRIO_PROCESS, tid, previous_nice)
+        if previous_io is not None:
+            _ioprio(_SYS_IOPRIO_SET, previous_io)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self, amount: float, now: float) -> float:
+        # Goes into debt rather than refusing requests larger than the one
+        # second burst; returns how long the caller must sleep to repay it.
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class IOBudget:
+    """Process-wide cap on checkpoint reads shared by every hashing call.
+
+    ``max_inflight`` bounds the number of concurrent ``read`` calls across all
+    threads; ``bytes_per_second`` and ``iops`` (token buckets with a one second
+    burst) bound their combined throughput. With ``latency_target`` set, reads
+    slower than the target double an extra per-read delay and faster reads let
+    it decay, so validation backs off while the disk is busy serving someone
+    else. ``io_class``/``nice`` lower the priority of each thread while it
+    reads through the budget. Threads that are waiting do not hold an in-flight slot.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_inflight: int = 16,
+        bytes_per_second: Optional[float] = None,
+        iops: Optional[float] = None,
+        latency_target: Optional[float] = None,
+        max_backoff: float = 1.0,
+        io_class: Optional[str] = None,
+        nice: Optional[int] = None,
+    ):
+        if io_class is not None and io_class not in IOPRIO_CLASSES:
+            raise ValueError(f"unknown io class {io_class!r}; expected one of {sorted(IOPRIO_CLASSES)}")
+        self.max_inflight = max(1, max_inflight)
+        self.bytes_per_second = bytes_per_second if bytes_per_second and bytes_per_second > 0 else None
+        self.iops = iops if iops and iops > 0 else None
+        self.latency_target = latency_target if latency_target and latency_target > 0 else None
+        self.max_backoff = max_backoff
+        self.io_class = io_class
+        self.nice = nice
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._lock = threading.Lock()
+        self._bytes = _TokenBucket(self.bytes_per_second) if self.bytes_per_second else None
+        self._ops = _TokenBucket(self.iops) if self.iops else None
+        self.backoff = 0.0
+        self.bytes_read = 0
+        self.reads = 0
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[None]:
+        self._slots.acquire()
+        try:
+            if self.io_class is None and self.nice is None:
+                yield
+            else:
+                with lowered_priority(io_class=self.io_class, nice=self.nice):
+                    yield
+        finally:
+            self._slots.release()
+
+    def _adapt(self, latency: float) -> None:
+        assert self.latency_target is not None
+        if latency > self.latency_target:
+            self.backoff = min(self.max_backoff, max(self.backoff * 2, 0.001))
+        elif self.backoff:
+            self.backoff = self.backoff * 0.9 if self.backoff > 0.0001 else 0.0
+
+    def consume(self, nbytes: int, latency: Optional[float] = None) -> None:
+        with self._lock:
+            self.bytes_read += nbytes
+            self.reads += 1
+            if latency is not None and self.latency_target is not None:
+                self._adapt(latency)
+            now = time.monotonic()
+            wait = self.backoff
+            if self._bytes is not None:
+                wait = max(wait, self._bytes.take(nbytes, now))
+            if self._ops is not None:
+                wait = max(wait, self._ops.take(1, now))
+        if wait > 0:
+            time.sleep(wait)
+
+    def wrap(self, f: BinaryIO) -> "ThrottledReader":
+        return ThrottledReader(f, self)
+
+
+class ThrottledReader:
+    """Read-only file wrapper that charges every read against an ``IOBudget``."""
+
+    def __init__(self, raw: BinaryIO, budget: IOBudget):
+        self._raw = raw
+        self._budget = budget
+
+    def __enter__(self) -> "ThrottledReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._raw.seekable()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def read(self, n: int = -1) -> bytes:
+        with self._budget.slot():
+            start = time.perf_counter()
+            data = self._raw.read(n)
+            latency = time.perf_counter() - start
+        self._budget.consume(len(data), latency)
+        return data
+
+    def readinto(self, buffer) -> int:
+        with self._budget.slot():
+            start = time.perf_counter()
+            count = self._raw.readinto(buffer)
+            latency = time.perf_counter() - start
+        self._budget.consume(count or 0, latency)
+        return count
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+def throttled(f: BinaryIO, budget: Optional[IOBudget]) -> BinaryIO:
+    return budget.wrap(f) if budget is not None else f  # type: ignore[return-value]
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import collections
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .atomic import apply_retention, atomic_checkpoint_write
+from .catalog import Catalog
+from .chunkstore import ChunkStore
+from .config import DeltaConfig, RetentionConfig
+from .durability import DurabilityEngine
+from .fs import ensure_dir, fsync_dir, list_checkpoints, read_step, safe_remove_checkpoint, update_latest_pointer
+from .hashing import hash_paths, new_hasher
+from .manifest import MANIFEST_NAME, Manifest, iter_manifest_entries, manifest_path, read_manifest
+from .validate import validate_checkpoint
+
+# ``<hot_root>/.migrated/<name>`` holds the step of a hot checkpoint whose cold
+# copy was verified; only checkpoints with a marker may be evicted. Like the
+# trash, the directory has no manifest and is ignored by listings.
+MIGRATED_DIR = ".migrated"
+
+
+class TieredStorage:
+    """Commit checkpoints to a fast ``hot_root`` and migrate them to ``cold_root`` in the background.
+
+    ``write`` returns as soon as the checkpoint is committed on the hot tier. A
+    worker thread copies checkpoints to the cold tier in commit order (through
+    ``atomic_checkpoint_write``, so a copy is never visible half-written), fully
+    validates the copy, and only then applies ``cold_retention`` to the cold tier
+    and ``hot_retention`` to the hot tier. A checkpoint is never evicted from the
+    hot tier before its cold copy has been verified.
+
+    ``sample_bytes`` must match how the manifests were hashed (``None`` for full
+    digests); the copy is validated in that mode, and every copied file is also
+    compared in full against the digest of the bytes read from the hot tier.
+    """
+
+    def __init__(
+        self,
+        hot_root: Path,
+        cold_root: Path,
+        *,
+        hot_retention: Optional[RetentionConfig] = None,
+        cold_retention: Optional[RetentionConfig] = None,
+        durability: Optional[DurabilityEngine] = None,
+        threads: int = 4,
+        update_latest: bool = True,
+        hot_catalog: Optional[Catalog] = None,
+        cold_catalog: Optional[Catalog] = None,
+        sample_bytes: Optional[int] = 65536,
+    ):
+        self.hot_root = hot_root
+        self.cold_root = cold_root
+        self.hot_retention = hot_retention
+        self.cold_retention = cold_retention
+        self.durability = durability or DurabilityEngine()
+        self.threads = threads
+        self.update_latest = update_latest
+        self.hot_catalog = hot_catalog
+        self.cold_catalog = cold_catalog
+        self.sample_bytes = sample_bytes
+        ensure_dir(hot_root)
+        ensure_dir(cold_root)
+        self._queue: Deque[Tuple[Path, "Future[Path]"]] = collections.deque()
+        self._cond = threading.Condition()
+        # Held while committing on and evicting from the hot tier, so eviction
+        # never races a checkpoint that is being renamed into place.
+        self._hot_lock = threading.Lock()
+        self._in_flight: Optional[Path] = None
+        self._errors: List[BaseException] = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ckptkit-tiering", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "TieredStorage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def tiers(self) -> List[Path]:
+        # Fastest first, as ``select_checkpoint(root, tiers=...)`` expects.
+        return [self.hot_root, self.cold_root]
+
+    def write(
+        self,
+        name: str,
+        write_fn: Callable[[Path], Manifest],
+        *,
+        chunk_store: Optional[ChunkStore] = None,
+        delta: Optional[DeltaConfig] = None,
+    ) -> Manifest:
+        """Commit ``name`` on the hot tier and queue its migration to the cold tier."""
+        dest_dir = self.hot_root / name
+        with self._hot_lock:
+            manifest = atomic_checkpoint_write(
+                dest_dir,
+                write_fn,
+                update_latest=self.update_latest,
+                chunk_store=chunk_store,
+                delta=delta,
+                durability=self.durability,
+                catalog=self.hot_catalog,
+                sample_bytes=self.sample_bytes,
+            )
+        self.enqueue(dest_dir)
+        return manifest
+
+    def enqueue(self, checkpoint: Path) -> "Future[Path]":
+        future: "Future[Path]" = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("TieredStorage is closed")
+            self._queue.append((checkpoint, future))
+            self._cond.notify_all()
+        return future
+
+    def cold_copy(self, checkpoint: Path) -> Optional[Path]:
+        target = self.cold_root / checkpoint.name
+        if (target / MANIFEST_NAME).exists() and read_step(target) == read_step(checkpoint):
+            return target
+        return None
+
+    def _marker(self, checkpoint: Path) -> Path:
+        return self.hot_root / MIGRATED_DIR / checkpoint.name
+
+    def verified(self, checkpoint: Path) -> bool:
+        """Whether the cold copy of this hot checkpoint has been verified (by any process)."""
+        try:
+            return self._marker(checkpoint).read_text(encoding="utf-8") == str(read_step(checkpoint))
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def _mark_verified(self, checkpoint: Path) -> None:
+        marker = self._marker(checkpoint)
+        ensure_dir(marker.parent)
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(str(read_step(checkpoint)))
+            f.flush()
+            os.fsync(f.fileno())
+        fsync_dir(marker.parent)
+
+    def pending(self) -> List[Path]:
+        """Hot checkpoints whose cold copy has not been verified yet."""
+        return [ckpt for ckpt in list_checkpoints(self.hot_root) if not self.verified(ckpt)]
+
+    def resume(self) -> List["Future[Path]"]:
+        """Queue the migrations a previous process left unfinished."""
+        with self._cond:
+            queued = {ckpt for ckpt, _ in self._queue} | ({self._in_flight} if self._in_flight else set())
+        todo = sorted((c for c in self.pending() if c not in queued), key=read_step)
+        return [self.enqueue(ckpt) for ckpt in todo]
+
+    def migrate(self, checkpoint: Path) -> Path:
+        """Copy ``checkpoint`` to the cold tier, verify the copy and apply both tiers' retention."""
+        target = self.cold_copy(checkpoint)
+        if target is None:
+            target = self._copy(checkpoint)
+        else:
+            # Left by a process that stopped before recording the verification.
+            self._verify(checkpoint, target, {})
+            self._mark_verified(checkpoint)
+        self.evict()
+        return target
+
+    def _verify(self, checkpoint: Path, target: Path, copied: Dict[str, str]) -> None:
+        # ``copied`` maps the files copied by this process to the full digest of the hot bytes.
+        if self.sample_bytes is None:
+            result = validate_checkpoint(target, full_hash=True)
+        else:
+            result = validate_checkpoint(target, sample_bytes=self.sample_bytes)
+        issues = result.summary() if not result.valid else ""
+        if result.valid and copied:
+            assert result.manifest is not None
+            digests = hash_paths(
+                [target / rel for rel in copied], threads=self.threads, algorithm=result.manifest.hash_algorithm
+            )
+            differ = sorted(rel for rel, digest in copied.items() if digests[target / rel] != digest)
+            if differ:
+                issues = f"copied bytes differ from the hot tier: {', '.join(differ)}"
+        if issues:
+            raise ValueError(f"cold copy of {checkpoint} failed verification: {issues}")
+
+    def _copy(self, checkpoint: Path) -> Path:
+        entries = list(iter_manifest_entries(checkpoint / MANIFEST_NAME))
+        algorithm = read_manifest(checkpoint / MANIFEST_NAME).hash_algorithm
+        digests = [digest for e in entries if e.chunks is not None for digest, _ in e.chunks]
+        if digests:
+            source = ChunkStore.for_checkpoint(checkpoint)
+            if source is None:
+                raise FileNotFoundError(f"no chunk store found for {checkpoint}")
+            # Chunks land before the manifest that references them; GC's grace period covers the gap.
+            # Imported chunks are checked against their content address.
+            ChunkStore(self.cold_root).import_chunks(source, digests, threads=self.threads)
+        # Delta entries (``origin``) live in an ancestor that was migrated before this checkpoint.
+        files = [e.path for e in entries if e.chunks is None and e.origin is None]
+        copied: Dict[str, str] = {}
+
+        def copy_file(tmp: Path, rel: str) -> None:
+            dst = tmp / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            h = new_hasher(algorithm)
+            with open(checkpoint / rel, "rb") as src, open(dst, "wb") as out:
+                for block in iter(lambda: src.read(1 << 20), b""):
+                    h.update(block)
+                    out.write(block)
+            copied[rel] = h.hexdigest()
+
+        def writer(tmp: Path) -> Manifest:
+            with ThreadPoolExecutor(max_workers=max(1, self.threads)) as executor:
+                list(executor.map(lambda rel: copy_file(tmp, rel), files))
+            # Copied verbatim so the manifest keeps its encoding.
+            shutil.copyfile(checkpoint / MANIFEST_NAME, tmp / MANIFEST_NAME)
+            return read_manifest(manifest_path(tmp))
+
+        target = self.cold_root / checkpoint.name
+        manifest = atomic_checkpoint_write(target, writer, update_latest=False, durability=self.durability)
+        try:
+            self._verify(checkpoint, target, copied)
+        except ValueError:
+            safe_remove_checkpoint(target)
+            raise
+        self._mark_verified(checkpoint)
+        if self.cold_catalog is not None:
+            self.cold_catalog.add(target, manifest, status="valid")
+        if self.update_latest:
+            update_latest_pointer(self.cold_root, target)
+        if self.cold_retention:
+            apply_retention(self.cold_root, self.cold_retention, keep_paths={target}, catalog=self.cold_catalog)
+        return target
+
+    def evict(self) -> None:
+        """Apply ``hot_retention`` to the hot tier, keeping every checkpoint without a verified cold copy."""
+        if not self.hot_retention:
+            return
+        with self._hot_lock:
+            # The checkpoint being migrated stays pending until its marker is written.
+            with self._cond:
+                keep = {ckpt for ckpt, _ in self._queue}
+            keep.update(self.pending())
+            apply_retention(self.hot_root, self.hot_retention, keep_paths=keep, catalog=self.hot_catalog)
+            markers = self.hot_root / MIGRATED_DIR
+            if markers.is_dir():
+                for marker in markers.iterdir():
+                    if not (self.hot_root / marker.name).exists():
+                        marker.unlink(missing_ok=True)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        if not self.flush(timeout):
+            raise TimeoutError("timed out waiting for pending migrations")
+        with self._cond:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self, *, wait: bool = True, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            if not wait:
+                # Unfinished migrations are picked up again by ``resume``.
+                while self._queue:
+                    self._queue.popleft()[1].cancel()
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                checkpoint, future = self._queue.popleft()
+                self._in_flight = checkpoint
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        target = self.migrate(checkpoint)
+                    except BaseException as exc:
+                        with self._cond:
+                            self._errors.append(exc)
+                        future.set_exception(exc)
+                    else:
+                        future.set_result(target)
+            finally:
+                with self._cond:
+                    self._in_flight = None
+                    self._cond.notify_all()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .logging import log_event
+
+# Spans are recorded only while a Tracer is active in the current context
+# (``with tracing(tracer):``); otherwise ``span`` hands back a shared no-op and
+# costs one ContextVar lookup. Worker threads of a pool do not inherit the
+# context: spans wrap pooled work from the submitting thread, or the task is
+# submitted through ``contextvars.copy_context().run``.
+_ACTIVE: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("ckptkit_tracer", default=None)
+_CURRENT: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("ckptkit_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    parent: Optional[str] = None
+    duration: float = 0.0
+    bytes: int = 0
+    thread: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    enabled = True
+
+    def add_bytes(self, nbytes: int) -> None:
+        self.bytes += nbytes
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    enabled = False
+
+    def add_bytes(self, nbytes: int) -> None:
+        pass
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """Collects the spans of one or more checkpoint operations.
+
+    ``phases()`` sums duration and bytes per span name; the same data can go
+    to a ``MetricsEmitter`` (``metrics.record_trace``), a structured log event
+    (``log``) or a Chrome trace file (``write_chrome_trace``, viewable in
+    chrome://tracing or Perfetto).
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self.epoch = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def phases(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            spans = list(self.spans)
+        summary: Dict[str, Dict[str, float]] = {}
+        for s in spans:
+            phase = summary.setdefault(s.name, {"seconds": 0.0, "bytes": 0, "count": 0})
+            phase["seconds"] += s.duration
+            phase["bytes"] += s.bytes
+            phase["count"] += 1
+        return summary
+
+    def log(self, logger: logging.Logger, *, event: str = "checkpoint_phases", **fields: Any) -> None:
+        phases = {name: {**p, "seconds": round(p["seconds"], 6)} for name, p in self.phases().items()}
+        log_event(logger, event=event, phases=phases, **fields)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name,
+                "ph": "X",
+                "ts": round((s.start - self.epoch) * 1e6, 3),
+                "dur": round(s.duration * 1e6, 3),
+                "pid": pid,
+                "tid": s.thread,
+                "args": {"bytes": s.bytes, **s.attrs},
+            }
+            for s in sorted(spans, key=lambda s: s.start)
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+
+@contextlib.contextmanager
+def tracing(tracer: Tracer) -> Iterator[Tracer]:
+    """Record spans of everything called inside the block into ``tracer``."""
+    token = _ACTIVE.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _ACTIVE.reset(token)
+
+
+@contextlib.contextmanager
+def _record(tracer: Tracer, name: str, attrs: Dict[str, Any]) -> Iterator[Span]:
+    parent = _CURRENT.get()
+    s = Span(
+        name=name,
+        start=time.perf_counter(),
+        parent=parent.name if parent is not None else None,
+        thread=threading.get_native_id(),
+        attrs=attrs,
+    )
+    token = _CURRENT.set(s)
+    try:
+        yield s
+    finally:
+        s.duration = time.perf_counter() - s.start
+        _CURRENT.reset(token)
+        tracer._finish(s)
+
+
+def span(name: str, **attrs: Any):
+    """Context manager timing ``name``; yields an object with ``add_bytes``/``set`` and ``enabled``."""
+    tracer = _ACTIVE.get()
+    if tracer is None:
+        return contextlib.nullcontext(_NOOP)
+    return _record(tracer, name, attrs)
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
+import contextvars
 import enum
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
 
-from . import hashing
-from .manifest import MANIFEST_NAME, Manifest, read_manifest
+from .chunkstore import ChunkStore
+from .fs import find_checkpoint
+from .manifest import MANIFEST_NAME, FileEntry, Manifest, iter_manifest_entries, read_manifest
+from .reader import (
+    entry_stripe_ranges,
+    expected_stored_size,
+    hash_entries,
+    missing_parts,
+    stored_size,
+    verify_merkle,
+    verify_stripes,
+)
+from .throttle import IOBudget
+from .tracing import span
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .cache import ValidationCache
 
 
 class Reason(str, enum.Enum):
@@ -18,6 +35,10 @@ class Reason(str, enum.Enum):
     HASH_MISMATCH = "hash_mismatch"
     ZERO_SIZED = "zero_sized_file"
     SPLIT_BRAIN = "split_brain_step_mismatch"
+    PARENT_MISSING = "parent_missing"
+    PARENT_INVALID = "parent_invalid"
+    CHUNK_MISMATCH = "chunk_hash_mismatch"
+    STRIPE_MISMATCH = "stripe_hash_mismatch"
 
 
 @dataclass
@@ -25,6 +46,20 @@ class Issue:
     reason: Reason
     detail: str
     path: Optional[str] = None
+    # [start, end) of the corrupt bytes when a Merkle chunk or stripe digest localizes the damage.
+    byte_range: Optional[List[int]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"reason": self.reason.value, "detail": self.detail, "path": self.path, "byte_range": self.byte_range}
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "Issue":
+        return Issue(
+            reason=Reason(data["reason"]),
+            detail=str(data["detail"]),
+            path=data.get("path"),
+            byte_range=data.get("byte_range"),
+        )
 
 
 @dataclass
@@ -41,11 +76,65 @@ class ValidationResult:
         return f"{self.checkpoint} invalid [{reasons}]"
 
 
+def _chunk_issues(entry: FileEntry, bad: List[int]) -> List[Issue]:
+    assert entry.merkle is not None
+    chunk_size = int(entry.merkle["chunk_size"])
+    issues: List[Issue] = []
+    # Coalesce adjacent corrupt chunks into one byte range.
+    for index in bad:
+        start, end = index * chunk_size, min((index + 1) * chunk_size, entry.size)
+        if issues and issues[-1].byte_range and issues[-1].byte_range[1] == start:
+            start = issues.pop().byte_range[0]  # type: ignore[index]
+        issues.append(
+            Issue(Reason.CHUNK_MISMATCH, f"bytes {start}-{end} corrupt", path=entry.path, byte_range=[start, end])
+        )
+    return issues
+
+
+def _stripe_issues(entry: FileEntry, bad: List[int]) -> List[Issue]:
+    ranges = entry_stripe_ranges(entry)
+    return [
+        Issue(
+            Reason.STRIPE_MISMATCH,
+            f"bytes {ranges[i][0]}-{ranges[i][0] + ranges[i][1]} corrupt",
+            path=entry.path,
+            byte_range=[ranges[i][0], ranges[i][0] + ranges[i][1]],
+        )
+        for i in bad
+    ]
+
+
+def hash_mode(full_hash: bool, sample_bytes: Optional[int]) -> str:
+    if full_hash:
+        return "full"
+    if sample_bytes is not None:
+        return f"sample:{sample_bytes}"
+    return "none"
+
+
 def validate_checkpoint(
     checkpoint: Path,
     *,
     full_hash: bool = False,
     sample_bytes: Optional[int] = 65536,
+    cache: Optional["ValidationCache"] = None,
+    budget: Optional[IOBudget] = None,
+) -> ValidationResult:
+    with span("validate", checkpoint=checkpoint.name, full_hash=full_hash) as s:
+        result = _validate_checkpoint(
+            checkpoint, full_hash=full_hash, sample_bytes=sample_bytes, cache=cache, budget=budget
+        )
+        s.set(valid=result.valid, issues=len(result.issues))
+        return result
+
+
+def _validate_checkpoint(
+    checkpoint: Path,
+    *,
+    full_hash: bool,
+    sample_bytes: Optional[int],
+    cache: Optional["ValidationCache"],
+    budget: Optional[IOBudget],
 ) -> ValidationResult:
     issues: List[Issue] = []
     manifest_path = checkpoint / MANIFEST_NAME
@@ -53,10 +142,33 @@ def validate_checkpoint(
         issues.append(Issue(Reason.MANIFEST_MISSING, "manifest missing"))
         return ValidationResult(checkpoint=checkpoint, valid=False, issues=issues)
     try:
-        manifest = read_manifest(manifest_path)
+        with span("validate.manifest"):
+            manifest = read_manifest(manifest_path)
     except Exception as exc:  # pragma: no cover - defensive
         issues.append(Issue(Reason.MANIFEST_SCHEMA, f"manifest load failed: {exc}"))
         return ValidationResult(checkpoint=checkpoint, valid=False, issues=issues)
+    # A delta checkpoint is only as good as its ancestors; validate the chain first.
+    parent_ok = True
+    if manifest.parent is not None:
+        parent_dir = find_checkpoint(checkpoint.parent, manifest.parent)
+        if parent_dir is None:
+            parent_ok = False
+            issues.append(Issue(Reason.PARENT_MISSING, f"parent step {manifest.parent} not found"))
+        else:
+            parent_res = validate_checkpoint(
+                parent_dir, full_hash=full_hash, sample_bytes=sample_bytes, cache=cache, budget=budget
+            )
+            if not parent_res.valid:
+                parent_ok = False
+                issues.append(Issue(Reason.PARENT_INVALID, parent_res.summary(), path=str(parent_dir)))
+    cache_key: Optional[str] = None
+    if cache is not None and parent_ok:
+        mode = hash_mode(full_hash, sample_bytes)
+        cache_key = cache.fingerprint(checkpoint, mode)
+        cached = cache.get(checkpoint, mode, cache_key)
+        if cached is not None:
+            cached.manifest = manifest
+            return cached
     # Split brain detection based on directory naming convention step-<n> if present.
     m = re.search(r"(\d+)", checkpoint.name)
     if m:
@@ -69,38 +181,125 @@ def validate_checkpoint(
                     path=str(checkpoint),
                 )
             )
+    store = ChunkStore.for_checkpoint(checkpoint) if any(f.chunks is not None for f in manifest.files) else None
+    holders: Dict[int, Optional[Path]] = {}
+    for origin in {f.origin for f in manifest.files if f.origin is not None}:
+        holders[origin] = find_checkpoint(checkpoint.parent, origin)
+    inherited: Dict[str, str] = {}
+    if parent_ok:
+        # Files held by an ancestor were hashed when that ancestor validated; only
+        # check that this manifest still agrees with the holder's digest.
+        for holder in {h for h in holders.values() if h is not None}:
+            for held in iter_manifest_entries(holder / MANIFEST_NAME):
+                if held.origin is None:
+                    inherited[f"{holder.name}/{held.path}"] = held.sha256
+    present = []
     for entry in manifest.files:
-        file_path = checkpoint / entry.path
-        if not file_path.exists():
-            issues.append(Issue(Reason.FILE_MISSING, "missing file", path=entry.path))
+        base = checkpoint if entry.origin is None else holders[entry.origin]
+        if base is None:
+            issues.append(Issue(Reason.FILE_MISSING, f"ancestor step {entry.origin} missing", path=entry.path))
+            continue
+        missing = missing_parts(base, entry, store)
+        if missing:
+            detail = "missing file" if entry.chunks is None else f"missing {len(missing)} chunk(s)"
+            issues.append(Issue(Reason.FILE_MISSING, detail, path=entry.path))
             continue
-        size = file_path.stat().st_size
-        if size == 0:
+        size = stored_size(base, entry, store)
+        # A compressed empty file still has a frame header on disk; judge it by its logical size.
+        if (entry.size if entry.compression is not None else size) == 0:
             issues.append(Issue(Reason.ZERO_SIZED, "zero-sized file", path=entry.path))
-        if size != entry.size:
+        expected_size = expected_stored_size(entry)
+        if size != expected_size:
             issues.append(
                 Issue(
                     Reason.SIZE_MISMATCH,
-                    f"expected {entry.size} got {size}",
+                    f"expected {expected_size} got {size}",
                     path=entry.path,
                 )
             )
+        held_digest = inherited.get(f"{base.name}/{entry.path}") if entry.origin is not None else None
+        if held_digest is None:
+            present.append((base, entry))
+        elif held_digest != entry.sha256:
+            issues.append(
+                Issue(Reason.HASH_MISMATCH, f"expected {entry.sha256} ancestor has {held_digest}", path=entry.path)
+            )
     if full_hash or sample_bytes is not None:
-        # Hash only files that exist.
-        existing_paths = [checkpoint / f.path for f in manifest.files if (checkpoint / f.path).exists()]
-        hashes = hashing.hash_paths(existing_paths, sample_bytes=None if full_hash else sample_bytes)
-        for entry in manifest.files:
-            file_path = checkpoint / entry.path
-            if not file_path.exists():
-                continue
-            digest = hashes[file_path]
-            if digest != entry.sha256:
-                issues.append(
-                    Issue(
-                        Reason.HASH_MISMATCH,
-                        f"expected {entry.sha256} got {digest}",
-                        path=entry.path,
-                    )
+        with span("validate.hash", files=len(present)):
+            # With a shared budget its in-flight cap, not the pool size, bounds concurrent reads.
+            threads = budget.max_inflight if budget is not None else 4
+            merkle = [(base, e) for base, e in present if e.merkle is not None]
+            present = [(base, e) for base, e in present if e.merkle is None]
+            bad_chunks = verify_merkle(
+                merkle,
+                store=store,
+                sampled=not full_hash,
+                threads=threads,
+                algorithm=manifest.hash_algorithm,
+                budget=budget,
+            )
+            for _, entry in merkle:
+                issues.extend(_chunk_issues(entry, bad_chunks[entry.path]))
+            # Sampled mode reads the recorded stripes of a file instead of its head and tail.
+            striped = [(base, e) for base, e in present if e.stripes is not None and not full_hash]
+            present = [(base, e) for base, e in present if e.stripes is None or full_hash]
+            if striped:
+                bad_stripes = verify_stripes(
+                    striped, store=store, threads=threads, algorithm=manifest.hash_algorithm, budget=budget
                 )
+                for _, entry in striped:
+                    issues.extend(_stripe_issues(entry, bad_stripes[entry.path]))
+            # Hash only files that exist.
+            hashes = hash_entries(
+                present,
+                store=store,
+                sample_bytes=None if full_hash else sample_bytes,
+                threads=threads,
+                algorithm=manifest.hash_algorithm,
+                budget=budget,
+            )
+            for _, entry in present:
+                digest = hashes[entry.path]
+                if digest != entry.sha256:
+                    issues.append(
+                        Issue(
+                            Reason.HASH_MISMATCH,
+                            f"expected {entry.sha256} got {digest}",
+                            path=entry.path,
+                        )
+                    )
     valid = not issues
-    return ValidationResult(checkpoint=checkpoint, valid=valid, issues=issues, manifest=manifest)
+    result = ValidationResult(checkpoint=checkpoint, valid=valid, issues=issues, manifest=manifest)
+    if cache is not None and cache_key is not None:
+        cache.put(result, hash_mode(full_hash, sample_bytes), cache_key)
+    return result
+
+
+def validate_checkpoints(
+    checkpoints: Iterable[Path],
+    *,
+    full_hash: bool = False,
+    sample_bytes: Optional[int] = 65536,
+    cache: Optional["ValidationCache"] = None,
+    workers: int = 4,
+    budget: Optional[IOBudget] = None,
+) -> List[ValidationResult]:
+    """Validate several checkpoints concurrently; results keep the input order."""
+    checkpoints = list(checkpoints)
+    if workers <= 1 or len(checkpoints) <= 1:
+        return [
+            validate_checkpoint(c, full_hash=full_hash, sample_bytes=sample_bytes, cache=cache, budget=budget)
+            for c in checkpoints
+        ]
+    # Each task runs in its own copy of this context so an active tracer records it.
+    contexts = [contextvars.copy_context() for _ in checkpoints]
+    with ThreadPoolExecutor(max_workers=min(workers, len(checkpoints))) as executor:
+        return list(
+            executor.map(
+                lambda c, ctx: ctx.run(
+                    validate_checkpoint, c, full_hash=full_hash, sample_bytes=sample_bytes, cache=cache, budget=budget
+                ),
+                checkpoints,
+                contexts,
+            )
+        )
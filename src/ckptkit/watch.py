@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import ctypes
+import heapq
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from .libc import load_libc
+from .logging import log_event
+from .manifest import MANIFEST_NAME
+from .metrics import MetricsEmitter, record_disk_free, record_validation_metrics
+from .throttle import IOBudget
+from .validate import ValidationResult, hash_mode, validate_checkpoint
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .cache import ValidationCache
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+# (name, present): a directory entry of the root appeared or went away. A
+# ``None`` batch means events were lost and the root must be re-listed.
+Events = Optional[List[Tuple[str, bool]]]
+
+
+class InotifySource:
+    """Directory events for ``root`` from Linux inotify, read through ctypes."""
+
+    def __init__(self, root: Path):
+        libc = load_libc()
+        init = getattr(libc, "inotify_init1", None)
+        if init is None:
+            raise OSError("inotify is not available")
+        fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        mask = IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(root), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, os.strerror(err), str(root))
+        self.fd = fd
+
+    def read(self, timeout: float) -> Events:
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events: List[Tuple[str, bool]] = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            raw = data[offset + _EVENT.size : offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_ISDIR:
+                events.append((os.fsdecode(raw.rstrip(b"\0")), bool(mask & (IN_MOVED_TO | IN_CREATE))))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Fallback for filesystems without inotify (e.g. NFS): re-list the root every interval."""
+
+    def read(self, timeout: float) -> Events:
+        time.sleep(max(0.0, timeout))
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+def _is_candidate(name: str) -> bool:
+    # Hidden entries (chunk store, trash), staging dirs and quarantine are never watched.
+    return not name.startswith(".") and ".tmp-" not in name and name != "corrupt"
+
+
+class CheckpointWatcher:
+    """Validates each checkpoint that appears under ``root`` once, then rechecks on a schedule.
+
+    New checkpoints are picked up from inotify events (or a periodic listing
+    when ``use_inotify`` is false or unavailable); retained checkpoints are only
+    revalidated every ``recheck_interval`` seconds, staggered so rechecks do
+    not arrive in bursts. Results go to ``log_event`` and ``emitter``.
+
+    ``cache`` only serves the first validation of a checkpoint that appears
+    while watching. Bit rot leaves the cache fingerprint (inode, size, mtime)
+    unchanged, so rechecks always re-read the data and refresh the cache
+    with their result.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        full_hash: bool = False,
+        sample_bytes: Optional[int] = 65536,
+        recheck_interval: float = 3600.0,
+        poll_interval: float = 5.0,
+        use_inotify: bool = True,
+        cache: Optional["ValidationCache"] = None,
+        budget: Optional[IOBudget] = None,
+        logger: Optional[logging.Logger] = None,
+        emitter: Optional[MetricsEmitter] = None,
+        textfile: Optional[Path] = None,
+    ):
+        self.root = root
+        self.full_hash = full_hash
+        self.sample_bytes = sample_bytes
+        self.recheck_interval = recheck_interval
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.cache = cache
+        self.budget = budget
+        self.logger = logger or logging.getLogger("ckptkit")
+        self.emitter = emitter or MetricsEmitter()
+        self.textfile = textfile
+        self.validations = 0
+        self._source: Optional[object] = None
+        self._due: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._waiting: Set[str] = set()
+        self._invalid: Set[str] = set()
+
+    def start(self) -> None:
+        if self.use_inotify:
+            try:
+                self._source = InotifySource(self.root)
+            except OSError:
+                self._source = PollingSource()
+        else:
+            self._source = PollingSource()
+        existing = sorted(n for n in self._listdir() if (self.root / n / MANIFEST_NAME).exists())
+        now = time.time()
+        for index, name in enumerate(existing):
+            self._schedule(name, now + self.recheck_interval * (index + 1) / len(existing))
+
+    def close(self) -> None:
+        if self._source is not None:
+            self._source.close()  # type: ignore[attr-defined]
+            self._source = None
+
+    def __enter__(self) -> "CheckpointWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _listdir(self) -> Set[str]:
+        try:
+            entries = os.scandir(self.root)
+        except FileNotFoundError:
+            return set()
+        with entries:
+            return {e.name for e in entries if _is_candidate(e.name) and e.is_dir(follow_symlinks=False)}
+
+    def _schedule(self, name: str, when: float) -> None:
+        self._due[name] = when
+        heapq.heappush(self._heap, (when, name))
+
+    def _forget(self, name: str) -> None:
+        self._due.pop(name, None)
+        self._waiting.discard(name)
+        self._invalid.discard(name)
+        self.emitter.remove("checkpoint_corrupt_detected", {"checkpoint": name})
+
+    def _apply_events(self, events: Events) -> None:
+        if events is None:
+            # Lost events (or polling): reconcile against one listing of the root.
+            present = self._listdir()
+            known = set(self._due) | self._waiting
+            events = [(n, True) for n in present - known] + [(n, False) for n in known - present]
+        for name, appeared in events:
+            if not _is_candidate(name):
+                continue
+            if appeared:
+                if name not in self._due:
+                    self._waiting.add(name)
+            else:
+                self._forget(name)
+
+    def _timeout(self, now: float) -> float:
+        timeout = self.poll_interval
+        if self._heap:
+            timeout = min(timeout, self._heap[0][0] - now)
+        return max(0.0, timeout)
+
+    def poll(self, timeout: Optional[float] = None) -> List[ValidationResult]:
+        """Wait for events up to ``timeout`` seconds and validate what is new or due."""
+        assert self._source is not None, "call start() first"
+        now = time.time()
+        events = self._source.read(self._timeout(now) if timeout is None else timeout)  # type: ignore[attr-defined]
+        self._apply_events(events)
+        now = time.time()
+        # (name, recheck): new checkpoints may be answered from the cache, rechecks may not.
+        names: List[Tuple[str, bool]] = []
+        for name in sorted(self._waiting):
+            # A directory created in place (not renamed) is picked up once its manifest exists.
+            if (self.root / name / MANIFEST_NAME).exists():
+                self._waiting.discard(name)
+                names.append((name, False))
+            elif not (self.root / name).is_dir():
+                self._waiting.discard(name)
+        while self._heap and self._heap[0][0] <= now:
+            when, name = heapq.heappop(self._heap)
+            if self._due.get(name) == when:
+                names.append((name, True))
+        results: List[ValidationResult] = []
+        for name, recheck in names:
+            checkpoint = self.root / name
+            if not checkpoint.is_dir():
+                self._forget(name)
+                continue
+            if recheck and self.cache is not None:
+                mode = hash_mode(self.full_hash, self.sample_bytes)
+                fingerprint = self.cache.fingerprint(checkpoint, mode)
+                res = validate_checkpoint(
+                    checkpoint, full_hash=self.full_hash, sample_bytes=self.sample_bytes, budget=self.budget
+                )
+                self.cache.put(res, mode, fingerprint)
+            else:
+                res = validate_checkpoint(
+                    checkpoint,
+                    full_hash=self.full_hash,
+                    sample_bytes=self.sample_bytes,
+                    cache=self.cache,
+                    budget=self.budget,
+                )
+            self._schedule(name, time.time() + self.recheck_interval)
+            self._report(res)
+            results.append(res)
+        if results:
+            record_disk_free(self.emitter, self.root)
+            if self.textfile is not None:
+                self.emitter.write_textfile(self.textfile)
+        return results
+
+    def _report(self, res: ValidationResult) -> None:
+        name = res.checkpoint.name
+        step = res.manifest.step if res.manifest else None
+        self.validations += 1
+        record_validation_metrics(self.emitter, [res])
+        self.emitter.gauge("checkpoint_corrupt_detected", 0.0 if res.valid else 1.0, labels={"checkpoint": name})
+        if res.valid:
+            self._invalid.discard(name)
+            log_event(self.logger, event="checkpoint_validated", checkpoint_path=str(res.checkpoint), step=step)
+            return
+        if name in self._invalid:
+            return
+        # Only the transition to corrupt is logged; rechecks of a known-bad checkpoint stay quiet.
+        self._invalid.add(name)
+        log_event(
+            self.logger,
+            event="checkpoint_corrupt_detected",
+            severity="ERROR",
+            reason=res.issues[0].reason.value if res.issues else None,
+            checkpoint_path=str(res.checkpoint),
+            step=step,
+        )
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        stop = stop or threading.Event()
+        self.start()
+        try:
+            while not stop.is_set():
+                self.poll()
+        finally:
+            self.close()
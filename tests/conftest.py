@@ -0,0 +1,41 @@
+from pathlib import Path
+from typing import Callable, Mapping, Optional
+
+from ckptkit.hashing import HashingSink
+from ckptkit.manifest import Manifest, compute_manifest, manifest_path, write_manifest
+
+
+def checkpoint_writer(
+    step: int,
+    files: Mapping[str, bytes],
+    *,
+    run_id: str = "run",
+    world_size: int = 1,
+    write_behind_bytes: Optional[int] = None,
+) -> Callable[[Path], Manifest]:
+    """A ``write_fn`` for ``atomic_checkpoint_write`` that writes ``files`` (relative path -> bytes) and a manifest.
+
+    With ``write_behind_bytes`` the files go through a ``HashingSink`` and the
+    manifest reuses its digests.
+    """
+
+    def writer(temp: Path) -> Manifest:
+        sink = HashingSink(temp, write_behind_bytes=write_behind_bytes) if write_behind_bytes else None
+        for rel, data in files.items():
+            if sink is not None:
+                sink.write_bytes(rel, data)
+            else:
+                (temp / rel).parent.mkdir(parents=True, exist_ok=True)
+                (temp / rel).write_bytes(data)
+        manifest = compute_manifest(
+            temp,
+            job_id="job",
+            run_id=run_id,
+            step=step,
+            world_size=world_size,
+            recorded=sink.records() if sink is not None else None,
+        )
+        write_manifest(manifest_path(temp), manifest)
+        return manifest
+
+    return writer
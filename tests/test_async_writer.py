@@ -0,0 +1,56 @@
+import concurrent.futures
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ckptkit.async_writer import AsyncCheckpointWriter, Backpressure
+from ckptkit.manifest import compute_manifest, manifest_path, write_manifest
+
+
+def _make_writer(step: int, gate: threading.Event | None = None):
+    def writer(temp: Path):
+        if gate is not None:
+            gate.wait(5)
+        (temp / "weights.bin").write_bytes(bytes([step]) * 16)
+        manifest = compute_manifest(temp, job_id="job", run_id="run", step=step, world_size=1)
+        write_manifest(manifest_path(temp), manifest)
+        return manifest
+
+    return writer
+
+
+def test_async_writer_persists_in_background(tmp_path: Path) -> None:
+    gate = threading.Event()
+    with AsyncCheckpointWriter(max_pending=2) as writer:
+        fut = writer.submit(tmp_path / "step-1", _make_writer(1, gate))
+        assert not fut.done()
+        assert not (tmp_path / "step-1").exists()
+        gate.set()
+        writer.wait()
+        assert fut.result().step == 1
+    assert (tmp_path / "step-1" / "weights.bin").exists()
+    assert not list(tmp_path.glob("*.tmp-*"))
+
+
+@pytest.mark.parametrize("mode", [Backpressure.DROP_OLDEST, Backpressure.COALESCE])
+def test_async_writer_backpressure(tmp_path: Path, mode: Backpressure) -> None:
+    gate = threading.Event()
+    writer = AsyncCheckpointWriter(max_pending=1, backpressure=mode)
+    first = writer.submit(tmp_path / "step-1", _make_writer(1, gate))
+    while not first.running():
+        time.sleep(0.001)
+    second = writer.submit(tmp_path / "step-2", _make_writer(2))
+    third = writer.submit(tmp_path / "step-3", _make_writer(3))
+    gate.set()
+    writer.close()
+
+    assert first.result().step == 1
+    assert third.result().step == 3
+    if mode == Backpressure.DROP_OLDEST:
+        with pytest.raises(concurrent.futures.CancelledError):
+            second.result()
+    else:
+        assert second.result().step == 3
+    assert not (tmp_path / "step-2").exists()
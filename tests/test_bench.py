@@ -0,0 +1,43 @@
+import copy
+from pathlib import Path
+
+from ckptkit import bench
+from ckptkit.bench import PRESETS, compare, run
+from ckptkit.validate import Reason, validate_checkpoint
+
+
+def test_bench_smoke_report_and_regression_check(tmp_path: Path) -> None:
+    report = run(PRESETS["smoke"], workdir=tmp_path, repeats=1, threads=(2,))
+    names = {r["name"] for r in report["results"]}
+    assert {
+        "atomic_checkpoint_write",
+        "compute_manifest/full",
+        "hash_paths/threads=2/sample=65536",
+        "validate_checkpoint/full",
+        "validate_checkpoints/workers=2",
+        "select_checkpoint/walk",
+        "apply_retention/keep_last=1",
+    } <= names
+    assert all(r["seconds"] > 0 for r in report["results"])
+    assert list(tmp_path.iterdir()) == []
+
+    assert compare(report, report) == []
+    faster = copy.deepcopy(report)
+    for r in faster["results"]:
+        r["seconds"] /= 10
+    regressions = compare(report, faster, threshold=0.5)
+    assert len(regressions) == len(report["results"])
+    assert regressions[0]["slowdown"] > 1.5
+
+
+def test_bench_walk_corrupts_without_changing_sizes(tmp_path: Path, monkeypatch) -> None:
+    walked = []
+
+    def select(root: Path, **kwargs):
+        checkpoints = sorted(root.glob("step-*"), key=lambda p: int(p.name.split("-")[1]))
+        walked.extend(validate_checkpoint(c) for c in checkpoints[1:])
+
+    monkeypatch.setattr(bench, "select_checkpoint", select)
+    run(PRESETS["smoke"], workdir=tmp_path, repeats=1, threads=(2,))
+    assert walked
+    assert all({i.reason for i in res.issues} == {Reason.HASH_MISMATCH} for res in walked)
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from ckptkit import hashing
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.cache import CACHE_NAME, ValidationCache
+from ckptkit.chunkstore import CHUNKS_DIR, ChunkStore
+from ckptkit.manifest import compute_manifest, manifest_path, write_manifest
+from ckptkit.validate import Reason, validate_checkpoint
+
+
+def _make_checkpoint(root: Path, step: int) -> Path:
+    ckpt = root / f"step-{step}"
+    ckpt.mkdir()
+    (ckpt / "weights.bin").write_bytes(b"abc")
+    write_manifest(manifest_path(ckpt), compute_manifest(ckpt, job_id="job", run_id="run", step=step, world_size=1))
+    return ckpt
+
+
+def test_cache_hit_skips_hashing_until_files_change(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    ckpt = _make_checkpoint(tmp_path, 1)
+    cache = ValidationCache(tmp_path)
+    assert validate_checkpoint(ckpt, full_hash=True, cache=cache).valid
+    assert (tmp_path / CACHE_NAME).exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache miss")
+
+    monkeypatch.setattr(hashing, "hash_paths", fail)
+    reloaded = ValidationCache(tmp_path)
+    hit = validate_checkpoint(ckpt, full_hash=True, cache=reloaded)
+    assert hit.valid
+    assert hit.manifest is not None and hit.manifest.step == 1
+
+    monkeypatch.undo()
+    (ckpt / "weights.bin").write_bytes(b"bad")
+    res = validate_checkpoint(ckpt, full_hash=True, cache=reloaded)
+    assert Reason.HASH_MISMATCH in {i.reason for i in res.issues}
+
+
+def test_cache_eviction_and_invalidation(tmp_path: Path) -> None:
+    ckpts = [_make_checkpoint(tmp_path, step) for step in range(1, 4)]
+    cache = ValidationCache(tmp_path, max_entries=2)
+    for ckpt in ckpts:
+        validate_checkpoint(ckpt, cache=cache)
+    assert len(cache) == 2
+    cache.invalidate(ckpts[-1])
+    assert len(cache) == 1
+    cache.clear()
+    assert not (tmp_path / CACHE_NAME).exists()
+
+
+def test_cache_misses_when_deduplicated_chunks_disappear(tmp_path: Path) -> None:
+    def writer(temp: Path):
+        (temp / "weights.bin").write_bytes(b"abc" * 1000)
+        manifest = compute_manifest(temp, job_id="job", run_id="run", step=1, world_size=1)
+        write_manifest(manifest_path(temp), manifest)
+        return manifest
+
+    ckpt = tmp_path / "step-1"
+    atomic_checkpoint_write(ckpt, writer, chunk_store=ChunkStore(tmp_path, chunk_size=1024))
+    cache = ValidationCache(tmp_path)
+    assert validate_checkpoint(ckpt, cache=cache).valid
+    for chunk in (tmp_path / CHUNKS_DIR).rglob("*"):
+        if chunk.is_file():
+            chunk.unlink()
+    res = validate_checkpoint(ckpt, cache=cache)
+    assert Reason.FILE_MISSING in {i.reason for i in res.issues}
@@ -0,0 +1,60 @@
+import shutil
+from pathlib import Path
+
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.catalog import CATALOG_NAME, Catalog
+from ckptkit.config import RetentionConfig
+from ckptkit.quarantine import quarantine
+
+from conftest import checkpoint_writer
+
+
+def _writer(step: int):
+    return checkpoint_writer(step, {"model.bin": bytes([step]) * 128})
+
+
+def test_catalog_tracks_writes_retention_and_quarantine(tmp_path: Path) -> None:
+    catalog = Catalog(tmp_path)
+    retention = RetentionConfig(keep_last=2)
+    for step in (1, 2, 3):
+        atomic_checkpoint_write(tmp_path / f"step-{step}", _writer(step), retention=retention, catalog=catalog)
+
+    assert [e.location for e in catalog.entries()] == ["step-2", "step-3"]
+    assert catalog.find(3) == tmp_path / "step-3"
+
+    target = quarantine(tmp_path / "step-2", root=tmp_path, reason="test", catalog=catalog)
+    assert [e.step for e in catalog.entries()] == [3]
+    moved = catalog.get(target)
+    assert moved is not None and moved.quarantined and moved.status == "quarantined"
+
+    # A fresh instance replays the log and sees the same state.
+    reloaded = Catalog(tmp_path)
+    assert [e.location for e in reloaded.entries(include_quarantined=True)] == [
+        e.location for e in catalog.entries(include_quarantined=True)
+    ]
+
+
+def test_catalog_refresh_reconciles_external_changes(tmp_path: Path) -> None:
+    for step in (1, 2):
+        atomic_checkpoint_write(tmp_path / f"step-{step}", _writer(step))
+    catalog = Catalog(tmp_path)
+    assert catalog.refresh()
+    assert [e.step for e in catalog.entries()] == [1, 2]
+    assert not catalog.refresh()
+    # Read-only refreshes leave the root untouched.
+    assert not (tmp_path / CATALOG_NAME).exists()
+    assert not (tmp_path / (CATALOG_NAME + ".lock")).exists()
+
+    # Mutations still see (and persist) entries found by a read-only refresh.
+    catalog.set_status(tmp_path / "step-2", "valid")
+    assert catalog.get(tmp_path / "step-2").status == "valid"
+    assert [e.step for e in catalog.entries()] == [1, 2]
+    assert [(e.step, e.status) for e in Catalog(tmp_path).entries()] == [(2, "valid")]
+    assert catalog.refresh(persist=True)
+    assert [e.step for e in Catalog(tmp_path).entries()] == [1, 2]
+
+    shutil.rmtree(tmp_path / "step-1")
+    (tmp_path / CATALOG_NAME).unlink()
+    rebuilt = Catalog(tmp_path)
+    rebuilt.refresh(persist=True)
+    assert [e.step for e in rebuilt.entries()] == [2]
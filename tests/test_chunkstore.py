@@ -0,0 +1,45 @@
+import os
+from pathlib import Path
+
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.chunkstore import CHUNKS_DIR, ChunkStore
+from ckptkit.config import RetentionConfig
+from ckptkit.reader import open_entry
+from ckptkit.validate import Reason, validate_checkpoint
+
+from conftest import checkpoint_writer
+
+
+def _writer(step: int, frozen: bytes):
+    return checkpoint_writer(step, {"frozen.bin": frozen, "trainable.bin": bytes([step]) * 100})
+
+
+def _chunk_count(root: Path) -> int:
+    return sum(1 for _ in (root / CHUNKS_DIR).glob("*/*"))
+
+
+def test_dedup_write_validate_and_gc(tmp_path: Path) -> None:
+    frozen = os.urandom(1000)
+    store = ChunkStore(tmp_path, chunk_size=256, gc_grace_seconds=0)
+    retention = RetentionConfig(keep_last=2)
+    for step in (1, 2):
+        atomic_checkpoint_write(tmp_path / f"step-{step}", _writer(step, frozen), retention=retention, chunk_store=store)
+
+    # frozen.bin is 4 chunks shared by both checkpoints; trainable.bin is one chunk each.
+    assert _chunk_count(tmp_path) == 6
+    assert not (tmp_path / "step-2" / "frozen.bin").exists()
+    res = validate_checkpoint(tmp_path / "step-2", full_hash=True)
+    assert res.valid, res.summary()
+    entry = next(e for e in res.manifest.files if e.path == "frozen.bin")
+    with open_entry(tmp_path / "step-2", entry) as f:
+        f.seek(300)
+        assert f.read(400) == frozen[300:700]
+
+    atomic_checkpoint_write(tmp_path / "step-3", _writer(3, frozen), retention=retention, chunk_store=store)
+    assert not (tmp_path / "step-1").exists()
+    assert _chunk_count(tmp_path) == 6
+
+    victim = store.chunk_path(entry.chunks[1][0])
+    victim.unlink()
+    res = validate_checkpoint(tmp_path / "step-3")
+    assert Reason.FILE_MISSING in {i.reason for i in res.issues}
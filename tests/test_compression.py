@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+
+from ckptkit.compression import FramedReader, measure_codecs
+from ckptkit.config import CompressionConfig
+from ckptkit.hashing import HashingSink
+from ckptkit.manifest import compute_manifest, manifest_path, read_manifest, write_manifest
+from ckptkit.reader import open_entry
+from ckptkit.validate import Reason, validate_checkpoint
+
+
+def _write(path: Path, data: bytes) -> None:
+    sink = HashingSink(path, compression=CompressionConfig(codec="zlib", frame_size=1024, threads=2))
+    sink.write_bytes("model.bin", data)
+    manifest = compute_manifest(
+        path, job_id="job", run_id="run", step=1, world_size=1, recorded=sink.records(), compression=sink.compression()
+    )
+    write_manifest(manifest_path(path), manifest)
+
+
+def test_compressed_roundtrip_and_validate(tmp_path: Path) -> None:
+    tmp_path = tmp_path / "step-1"
+    data = os.urandom(2048) + bytes(8192)
+    _write(tmp_path, data)
+    entry = read_manifest(manifest_path(tmp_path)).files[0]
+    assert entry.size == len(data)
+    assert entry.compression["codec"] == "zlib"
+    assert entry.compression["stored_size"] == (tmp_path / "model.bin").stat().st_size < len(data)
+
+    with open_entry(tmp_path, entry) as f:
+        assert f.read() == data
+    with FramedReader(open(tmp_path / "model.bin", "rb"), "zlib") as f:
+        f.seek(3000)
+        assert f.read(10) == data[3000:3010]
+    assert validate_checkpoint(tmp_path, full_hash=True).valid
+    assert validate_checkpoint(tmp_path, full_hash=False).valid
+
+    (report,) = measure_codecs(tmp_path, codecs=["zlib"], frame_size=1024)
+    assert report.raw_bytes == len(data) and report.ratio > 1
+    (report,) = measure_codecs(tmp_path, codecs=["zlib"], frame_size=1024, max_bytes=3000)
+    assert report.raw_bytes == 3072
+
+
+def test_compressed_empty_file_is_zero_sized(tmp_path: Path) -> None:
+    tmp_path = tmp_path / "step-1"
+    _write(tmp_path, b"")
+    res = validate_checkpoint(tmp_path, full_hash=True)
+    assert Reason.ZERO_SIZED in {i.reason for i in res.issues}
+
+
+def test_corrupt_compressed_frame_is_hash_mismatch(tmp_path: Path) -> None:
+    tmp_path = tmp_path / "step-1"
+    _write(tmp_path, bytes(8192))
+    target = tmp_path / "model.bin"
+    blob = bytearray(target.read_bytes())
+    blob[4] ^= 0xFF
+    target.write_bytes(bytes(blob))
+    res = validate_checkpoint(tmp_path, full_hash=True)
+    assert not res.valid
+    assert Reason.HASH_MISMATCH in {i.reason for i in res.issues}
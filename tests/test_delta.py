@@ -0,0 +1,87 @@
+import filecmp
+import os
+from pathlib import Path
+
+import pytest
+
+from ckptkit import delta as delta_module
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.config import DeltaConfig, RetentionConfig
+from ckptkit.manifest import manifest_path, read_manifest
+from ckptkit.validate import Reason, validate_checkpoint
+
+from conftest import checkpoint_writer
+
+
+def _writer(step: int, frozen: bytes, run_id: str = "run"):
+    return checkpoint_writer(step, {"embeddings.bin": frozen, "optimizer.bin": bytes([step]) * 64}, run_id=run_id)
+
+
+def test_delta_chain_write_validate_and_retention(tmp_path: Path) -> None:
+    frozen = os.urandom(4096)
+    delta = DeltaConfig(enabled=True, max_chain_length=1)
+    retention = RetentionConfig(keep_last=1)
+    for step in (1, 2):
+        atomic_checkpoint_write(tmp_path / f"step-{step}", _writer(step, frozen), retention=retention, delta=delta)
+
+    # step-2 is a delta on step-1, so retention must keep step-1 while step-2 survives.
+    assert (tmp_path / "step-1").exists()
+    step2 = read_manifest(manifest_path(tmp_path / "step-2"))
+    assert step2.parent == 1
+    assert {e.path: e.origin for e in step2.files} == {"embeddings.bin": 1, "optimizer.bin": None}
+    assert not (tmp_path / "step-2" / "embeddings.bin").exists()
+    assert validate_checkpoint(tmp_path / "step-2", full_hash=True).valid
+
+    atomic_checkpoint_write(tmp_path / "step-3", _writer(3, frozen), retention=retention, delta=delta)
+    # The chain limit forces step-3 to be a full checkpoint, which frees its predecessors.
+    step3 = read_manifest(manifest_path(tmp_path / "step-3"))
+    assert step3.parent is None
+    assert (tmp_path / "step-3" / "embeddings.bin").exists()
+    assert not (tmp_path / "step-1").exists() and not (tmp_path / "step-2").exists()
+
+
+def test_delta_invalid_when_ancestor_corrupt(tmp_path: Path) -> None:
+    frozen = os.urandom(4096)
+    delta = DeltaConfig(enabled=True)
+    for step in (1, 2):
+        atomic_checkpoint_write(tmp_path / f"step-{step}", _writer(step, frozen), delta=delta)
+    assert validate_checkpoint(tmp_path / "step-2", full_hash=True).valid
+
+    (tmp_path / "step-1" / "embeddings.bin").write_bytes(os.urandom(4096))
+    res = validate_checkpoint(tmp_path / "step-2", full_hash=True)
+    assert not res.valid
+    assert Reason.PARENT_INVALID in {i.reason for i in res.issues}
+
+
+def test_delta_parent_must_validate_and_share_the_run(tmp_path: Path) -> None:
+    frozen = os.urandom(4096)
+    delta = DeltaConfig(enabled=True)
+    atomic_checkpoint_write(tmp_path / "step-1", _writer(1, frozen), delta=delta)
+    (tmp_path / "step-1" / "optimizer.bin").write_bytes(bytes(64))
+    atomic_checkpoint_write(tmp_path / "step-2", _writer(2, frozen), delta=delta)
+    # A corrupt predecessor is not chained to; step-2 is written in full and validates.
+    assert read_manifest(manifest_path(tmp_path / "step-2")).parent is None
+    assert validate_checkpoint(tmp_path / "step-2", full_hash=True).valid
+
+    atomic_checkpoint_write(tmp_path / "step-3", _writer(3, frozen, run_id="other"), delta=delta)
+    assert read_manifest(manifest_path(tmp_path / "step-3")).parent is None
+    atomic_checkpoint_write(tmp_path / "step-4", _writer(4, frozen), delta=delta)
+    assert read_manifest(manifest_path(tmp_path / "step-4")).parent == 2
+
+
+def test_delta_byte_compares_only_sampled_digests(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    compared = []
+    original = filecmp.cmp
+
+    def cmp(a, b, shallow=True):
+        compared.append(Path(a).name)
+        return original(a, b, shallow=shallow)
+
+    monkeypatch.setattr(delta_module.filecmp, "cmp", cmp)
+    delta = DeltaConfig(enabled=True)
+    for root, frozen in ((tmp_path / "small", os.urandom(4096)), (tmp_path / "large", os.urandom(256 * 1024))):
+        for step in (1, 2):
+            atomic_checkpoint_write(root / f"step-{step}", _writer(step, frozen), delta=delta)
+        assert read_manifest(manifest_path(root / "step-2")).parent == 1
+    # Only the large file has a sampled digest; 4 KiB is hashed in full and 64 bytes differ anyway.
+    assert compared == ["embeddings.bin"]
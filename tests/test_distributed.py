@@ -0,0 +1,82 @@
+import functools
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from ckptkit.distributed import DistributedCommit
+from ckptkit.manifest import manifest_path, read_manifest
+from ckptkit.validate import validate_checkpoint
+
+WORLD_SIZE = 3
+
+
+def _commit(root: Path, world_size: int = WORLD_SIZE, token: str = "attempt-1") -> DistributedCommit:
+    return DistributedCommit(root / "step-5", world_size=world_size, step=5, job_id="job", run_id="run", token=token)
+
+
+def _rank_main(root: str, rank: int) -> None:
+    def write(sink):
+        sink.write_bytes(f"model/rank-{rank}.bin", bytes([rank]) * (1000 + rank))
+        sink.write_bytes(f"optim/rank-{rank}.bin", bytes([rank]) * 10)
+
+    _commit(Path(root)).write_shard(rank, write)
+
+
+def test_ranks_write_shards_and_coordinator_commits(tmp_path: Path) -> None:
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_rank_main, args=(str(tmp_path), rank)) for rank in range(WORLD_SIZE)]
+    for proc in procs:
+        proc.start()
+    manifest = _commit(tmp_path).commit(timeout=30, poll_interval=0.05)
+    for proc in procs:
+        proc.join()
+        assert proc.exitcode == 0
+
+    ckpt = tmp_path / "step-5"
+    assert manifest.world_size == WORLD_SIZE and len(manifest.files) == 2 * WORLD_SIZE
+    assert read_manifest(manifest_path(ckpt)).files == manifest.files
+    assert not any(p.name.startswith(".ckptkit-partials") for p in ckpt.iterdir())
+    assert validate_checkpoint(ckpt, full_hash=True).valid
+    assert (tmp_path / "latest").resolve() == ckpt.resolve()
+
+
+def test_commit_refuses_incomplete_world(tmp_path: Path) -> None:
+    _rank_main(str(tmp_path), 0)
+    with pytest.raises(TimeoutError):
+        _commit(tmp_path).commit(timeout=0.1, poll_interval=0.05)
+    assert not (tmp_path / "step-5").exists()
+
+    other = _commit(tmp_path, world_size=WORLD_SIZE + 1)
+    for rank in range(1, WORLD_SIZE + 1):
+        other.write_shard(rank, lambda sink: sink.write_bytes(f"extra-{rank}.bin", b"x"))
+    with pytest.raises(ValueError):
+        other.commit(timeout=1)
+
+
+def test_retry_does_not_reuse_a_failed_attempt(tmp_path: Path) -> None:
+    # The first attempt crashed after every rank published, before the commit.
+    failed = _commit(tmp_path, token="attempt-1")
+
+    def stale(rank: int, sink) -> None:
+        sink.write_bytes(f"model/rank-{rank}.bin", b"stale")
+        sink.write_bytes(f"stale-{rank}.bin", b"stale")
+
+    def fresh(rank: int, sink) -> None:
+        sink.write_bytes(f"model/rank-{rank}.bin", b"fresh")
+
+    for rank in range(WORLD_SIZE):
+        failed.write_shard(rank, functools.partial(stale, rank))
+
+    retry = _commit(tmp_path, token="attempt-2")
+    assert retry.pending_ranks() == list(range(WORLD_SIZE))
+    for rank in range(WORLD_SIZE):
+        retry.write_shard(rank, functools.partial(fresh, rank))
+    manifest = retry.commit(timeout=1)
+
+    ckpt = tmp_path / "step-5"
+    assert sorted(f.path for f in manifest.files) == [f"model/rank-{rank}.bin" for rank in range(WORLD_SIZE)]
+    assert (ckpt / "model" / "rank-0.bin").read_bytes() == b"fresh"
+    assert not (ckpt / "stale-0.bin").exists()
+    assert not failed.staging.exists()
+    assert validate_checkpoint(ckpt, full_hash=True).valid
@@ -0,0 +1,52 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from ckptkit import durability
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.durability import DurabilityEngine, DurabilityMode
+from ckptkit.hashing import HashingSink
+from ckptkit.validate import validate_checkpoint
+
+from conftest import checkpoint_writer
+
+
+_writer = checkpoint_writer(
+    1, {f"shards/rank-{i}.bin": bytes([i]) * 10000 for i in range(8)}, world_size=8, write_behind_bytes=4096
+)
+
+
+@pytest.mark.parametrize("mode", list(DurabilityMode))
+def test_durability_modes_commit_valid_checkpoint(tmp_path: Path, mode: DurabilityMode) -> None:
+    engine = DurabilityEngine(mode, threads=4)
+    atomic_checkpoint_write(tmp_path / "step-1", _writer, durability=engine)
+    assert validate_checkpoint(tmp_path / "step-1", full_hash=True).valid
+    assert "rename" in engine.last_stats.timings
+    if "syncfs" not in engine.last_stats.timings:
+        assert engine.last_stats.files == 9
+
+
+def test_directory_fsyncs_deduplicated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    synced = []
+    monkeypatch.setattr(durability, "fsync_dir", lambda path: synced.append(path))
+    atomic_checkpoint_write(tmp_path / "step-1", _writer, durability=DurabilityEngine("parallel"))
+    # Root before and after the rename, plus the staged checkpoint dir and its one subdirectory.
+    assert synced.count(tmp_path) == 2
+    assert len(synced) == 4
+
+
+def test_write_behind_ranges_are_flushed_to_the_kernel(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    ranges = []
+
+    def record(fd: int, offset: int, nbytes: int, flags: int) -> bool:
+        ranges.append((offset, nbytes, os.fstat(fd).st_size))
+        return True
+
+    monkeypatch.setattr(durability, "_sync_file_range", record)
+    sink = HashingSink(tmp_path, write_behind_bytes=4096)
+    with sink.open("model.bin") as f:
+        for _ in range(20):
+            f.write(bytes(1000))
+    assert [(offset, nbytes) for offset, nbytes, _ in ranges] == [(0, 5000), (5000, 5000), (10000, 5000), (15000, 5000)]
+    assert all(offset + nbytes <= on_disk for offset, nbytes, on_disk in ranges)
@@ -1,6 +1,18 @@
 from pathlib import Path
 
-from ckptkit.manifest import compute_manifest, manifest_path, read_manifest, write_manifest
+import pytest
+
+from ckptkit.hashing import HashingSink, available_algorithms
+from ckptkit.manifest import (
+    compute_manifest,
+    iter_manifest_entries,
+    manifest_format,
+    manifest_path,
+    read_manifest,
+    read_manifest_header,
+    write_manifest,
+)
+from ckptkit.validate import Reason, validate_checkpoint
 
 
 def test_manifest_roundtrip(tmp_path: Path) -> None:
@@ -26,3 +38,66 @@ def test_manifest_roundtrip(tmp_path: Path) -> None:
     assert loaded.job_id == "job"
     assert loaded.files[0].path == "tensor.bin"
     assert loaded.files[0].size == 2
+
+
+def test_hashing_sink_matches_rehash(tmp_path: Path) -> None:
+    ckpt = tmp_path / "ckpt"
+    ckpt.mkdir()
+    sink = HashingSink(ckpt, sample_bytes=1024)
+    payload = bytes(range(256)) * 64
+    with sink.open("shards/model.bin") as f:
+        for offset in range(0, len(payload), 1000):
+            f.write(payload[offset : offset + 1000])
+    sink.write_bytes("small.bin", b"xyz")
+    (ckpt / "meta.json").write_text("{}", encoding="utf-8")
+
+    recorded = compute_manifest(
+        ckpt, job_id="job", run_id="run", step=1, world_size=1, sample_bytes=1024, recorded=sink.records()
+    )
+    rehashed = compute_manifest(ckpt, job_id="job", run_id="run", step=1, world_size=1, sample_bytes=1024)
+
+    assert [f.path for f in recorded.files] == ["meta.json", "shards/model.bin", "small.bin"]
+    assert [(f.size, f.sha256) for f in recorded.files] == [(f.size, f.sha256) for f in rehashed.files]
+
+
+@pytest.mark.parametrize("algorithm", available_algorithms())
+def test_manifest_records_hash_algorithm(tmp_path: Path, algorithm: str) -> None:
+    ckpt = tmp_path / "step-1"
+    ckpt.mkdir()
+    (ckpt / "tensor.bin").write_bytes(bytes(range(256)) * 16)
+    manifest = compute_manifest(
+        ckpt, job_id="job", run_id="run", step=1, world_size=1, sample_bytes=512, algorithm=algorithm
+    )
+    write_manifest(manifest_path(ckpt), manifest)
+    loaded = read_manifest(manifest_path(ckpt))
+    assert loaded.hash_algorithm == algorithm
+    assert validate_checkpoint(ckpt, full_hash=False, sample_bytes=512).valid
+    (ckpt / "tensor.bin").write_bytes(bytes(4096))
+    res = validate_checkpoint(ckpt, full_hash=False, sample_bytes=512)
+    assert [(i.reason, i.path) for i in res.issues] == [(Reason.HASH_MISMATCH, "tensor.bin")]
+
+
+def test_ndjson_manifest_streams_and_is_detected(tmp_path: Path) -> None:
+    ckpt = tmp_path / "step-3"
+    ckpt.mkdir()
+    for i in range(5):
+        (ckpt / f"shard-{i}.bin").write_bytes(bytes([i]) * (i + 1))
+    manifest = compute_manifest(ckpt, job_id="job", run_id="run", step=3, world_size=5)
+    manifest.files[0].origin = 1
+    write_manifest(manifest_path(ckpt), manifest, fmt="ndjson")
+
+    assert manifest_format(manifest_path(ckpt)) == "ndjson"
+    header = read_manifest_header(manifest_path(ckpt))
+    assert (header["step"], header["file_count"], header["total_bytes"]) == (3, 5, 15)
+    assert [e.path for e in iter_manifest_entries(manifest_path(ckpt))] == [e.path for e in manifest.files]
+    loaded = read_manifest(manifest_path(ckpt))
+    assert loaded.files == manifest.files and loaded.files[0].origin == 1
+    assert not hasattr(loaded.files[0], "__dict__")
+
+    # Rewrites keep the encoding; a truncated file list is rejected.
+    write_manifest(manifest_path(ckpt), loaded)
+    assert manifest_format(manifest_path(ckpt)) == "ndjson"
+    lines = manifest_path(ckpt).read_text().splitlines()
+    manifest_path(ckpt).write_text("\n".join(lines[:-1]) + "\n")
+    with pytest.raises(ValueError):
+        read_manifest(manifest_path(ckpt))
@@ -1,6 +1,14 @@
+import urllib.request
 from pathlib import Path
 
-from ckptkit.metrics import MetricsEmitter, record_validation_metrics
+from ckptkit.exporter import MetricsServer
+from ckptkit.metrics import (
+    MetricsEmitter,
+    persisted_counters,
+    record_checkpoint_write,
+    record_validation_metrics,
+    state_path,
+)
 from ckptkit.validate import Issue, Reason, ValidationResult
 
 
@@ -20,3 +28,49 @@ def test_textfile_metrics_formatting(tmp_path: Path) -> None:
     out_path = tmp_path / "metrics.prom"
     emitter.write_textfile(out_path)
     assert out_path.read_text()
+
+
+def test_registry_accumulates_persists_and_serves(tmp_path: Path) -> None:
+    emitter = MetricsEmitter()
+    for duration in (0.2, 3.0):
+        record_checkpoint_write(
+            emitter, checkpoint_path=tmp_path, manifest_step=1, duration_seconds=duration, total_bytes=100.0
+        )
+    prom = emitter.text()
+    assert "# TYPE checkpoint_write_duration_seconds histogram" in prom
+    assert 'checkpoint_write_duration_seconds_bucket{le="0.5"} 1' in prom
+    assert 'checkpoint_write_duration_seconds_bucket{le="+Inf"} 2' in prom
+    assert "checkpoint_write_bytes_total 200.0" in prom
+
+    state = tmp_path / "state.json"
+    with MetricsServer(emitter, host="127.0.0.1", port=0, state_path=state) as server:
+        host, port = server.address
+        body = urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5).read().decode()
+    assert body == prom
+
+    restored = MetricsEmitter()
+    assert restored.load_state(state)
+    record_checkpoint_write(
+        restored, checkpoint_path=tmp_path, manifest_step=2, duration_seconds=1.0, total_bytes=100.0
+    )
+    assert "checkpoint_write_bytes_total 300.0" in restored.text()
+    assert "checkpoint_write_duration_seconds_count 3" in restored.text()
+
+
+def test_state_keeps_counters_only_and_merges_writers(tmp_path: Path) -> None:
+    state = state_path(tmp_path / "metrics.json", "write")
+    assert state.name == "metrics.write.json"
+    for step in (1, 2):
+        # Two short-lived writers sharing the state file add up.
+        with persisted_counters(MetricsEmitter(), state) as emitter:
+            record_checkpoint_write(
+                emitter, checkpoint_path=tmp_path, manifest_step=step, duration_seconds=1.0, total_bytes=10.0
+            )
+            emitter.gauge("checkpoint_corrupt_detected", 1.0, labels={"checkpoint": f"step-{step}"})
+    restored = MetricsEmitter()
+    assert restored.load_state(state)
+    prom = restored.text()
+    assert "checkpoint_writes_total 2.0" in prom
+    assert "checkpoint_write_duration_seconds_count 2" in prom
+    assert "checkpoint_corrupt_detected" not in prom
+    assert "checkpoint_last_success_step" not in prom
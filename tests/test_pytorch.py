@@ -0,0 +1,150 @@
+import json
+import pickle
+import sys
+import types
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.integrations.pytorch import (
+    LazyStateDict,
+    discover_shards,
+    load_checkpoint,
+    partition_state_dict,
+    save_state_dict,
+)
+from ckptkit.validate import validate_checkpoint
+
+
+class FakeTorch(types.ModuleType):
+    """Pickle-backed stand-in for the parts of ``torch`` the integration uses."""
+
+    def __init__(self) -> None:
+        super().__init__("torch")
+        self.loaded: List[str] = []
+
+    def save(self, obj, f) -> None:
+        pickle.dump(obj, f)
+
+    def load(self, f, map_location=None, mmap=False):
+        if isinstance(f, (str, Path)):
+            self.loaded.append(Path(f).name)
+            with open(f, "rb") as fh:
+                return pickle.load(fh)
+        self.loaded.append(getattr(f, "name", "<stream>"))
+        return pickle.load(f)
+
+
+class Tensor:
+    """Picklable value with the ``nbytes`` the partitioner sizes shards by."""
+
+    def __init__(self, nbytes: int) -> None:
+        self.nbytes = nbytes
+        self.data = bytes(range(256)) * (nbytes // 256) + bytes(nbytes % 256)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Tensor) and other.data == self.data
+
+
+@pytest.fixture
+def torch(monkeypatch: pytest.MonkeyPatch) -> FakeTorch:
+    fake = FakeTorch()
+    monkeypatch.setitem(sys.modules, "torch", fake)
+    return fake
+
+
+def _dump(path: Path, obj) -> None:
+    path.write_bytes(pickle.dumps(obj))
+
+
+def test_discover_prefers_index_over_file_names(tmp_path: Path) -> None:
+    weight_map = {"a": "pytorch_model-00002-of-00002.bin", "b": "pytorch_model-00001-of-00002.bin"}
+    (tmp_path / "pytorch_model.bin.index.json").write_text(json.dumps({"weight_map": weight_map}))
+    (tmp_path / "model.pt").write_bytes(b"")
+    shards, found = discover_shards(tmp_path)
+    assert shards == ["pytorch_model-00001-of-00002.bin", "pytorch_model-00002-of-00002.bin"]
+    assert found == weight_map
+
+
+def test_discover_numbered_shards_and_single_file_fallback(tmp_path: Path) -> None:
+    for name in ("model-00002-of-00002.pt", "model-00001-of-00002.pt", "notes.txt", "model-1.pt"):
+        (tmp_path / name).write_bytes(b"")
+    assert discover_shards(tmp_path) == (["model-00001-of-00002.pt", "model-00002-of-00002.pt"], None)
+    (tmp_path / "pytorch_model.bin").write_bytes(b"")
+    assert discover_shards(tmp_path) == (["pytorch_model.bin"], None)
+
+
+def test_load_checkpoint_merges_shards(tmp_path: Path, torch: FakeTorch) -> None:
+    _dump(tmp_path / "model-00001-of-00002.pt", {"a": 1, "b": 2})
+    _dump(tmp_path / "model-00002-of-00002.pt", {"c": 3})
+    assert load_checkpoint(tmp_path, threads=2) == {"a": 1, "b": 2, "c": 3}
+    assert sorted(torch.loaded) == ["model-00001-of-00002.pt", "model-00002-of-00002.pt"]
+
+
+def test_load_checkpoint_single_file(tmp_path: Path, torch: FakeTorch) -> None:
+    _dump(tmp_path / "model.pt", {"a": 1})
+    assert load_checkpoint(tmp_path) == {"a": 1}
+    with pytest.raises(FileNotFoundError):
+        load_checkpoint(tmp_path / "missing")
+
+
+def test_lazy_state_dict_loads_only_accessed_shards(tmp_path: Path, torch: FakeTorch) -> None:
+    _dump(tmp_path / "model-00001-of-00002.pt", {"a": 1, "b": 2})
+    _dump(tmp_path / "model-00002-of-00002.pt", {"c": 3})
+    weight_map = {"a": "model-00001-of-00002.pt", "b": "model-00001-of-00002.pt", "c": "model-00002-of-00002.pt"}
+    (tmp_path / "model.index.json").write_text(json.dumps({"weight_map": weight_map}))
+    state = LazyStateDict(tmp_path)
+    assert sorted(state) == ["a", "b", "c"] and len(state) == 3
+    assert torch.loaded == [] and state.loaded_shards() == []
+    assert state["c"] == 3
+    assert state.loaded_shards() == ["model-00002-of-00002.pt"]
+    assert state["c"] == 3
+    assert torch.loaded == ["model-00002-of-00002.pt"]
+
+
+def test_lazy_state_dict_without_index_reads_shards_for_keys(tmp_path: Path, torch: FakeTorch) -> None:
+    _dump(tmp_path / "model-00001-of-00002.pt", {"a": 1})
+    _dump(tmp_path / "model-00002-of-00002.pt", {"b": 2})
+    state = LazyStateDict(tmp_path)
+    assert dict(state) == {"a": 1, "b": 2}
+    assert sorted(torch.loaded) == ["model-00001-of-00002.pt", "model-00002-of-00002.pt"]
+
+
+def test_partition_balances_bytes_and_keeps_key_order() -> None:
+    state = {"a": Tensor(100), "b": Tensor(400), "c": Tensor(300), "d": Tensor(200)}
+    groups = partition_state_dict(state, 2)
+    assert sorted(sorted(g) for g in groups) == [["a", "b"], ["c", "d"]]
+    assert all(g == [k for k in state if k in g] for g in groups)
+    assert [sum(state[k].nbytes for k in g) for g in groups] == [500, 500]
+    assert sorted(partition_state_dict(state, 8)) == [["a"], ["b"], ["c"], ["d"]]
+    assert partition_state_dict(state, 1) == [["a", "b", "c", "d"]]
+
+
+def test_save_state_dict_shards_by_max_bytes_and_writes_index(tmp_path: Path, torch: FakeTorch) -> None:
+    state = {f"layer{i}": Tensor(1024) for i in range(6)}
+    dest = tmp_path / "step-1"
+
+    def writer(path: Path):
+        return save_state_dict(
+            state, path, job_id="job", run_id="run", step=1, max_shard_bytes=2048, threads=2, sample_bytes=512
+        )
+
+    manifest = atomic_checkpoint_write(dest, writer, update_latest=False)
+    shards = [f"model-{i:05d}-of-00003.pt" for i in (1, 2, 3)]
+    assert sorted(f.path for f in manifest.files) == sorted(["model.index.json", *shards])
+    index = json.loads((dest / "model.index.json").read_text())
+    assert index["metadata"] == {"total_size": 6 * 1024}
+    assert sorted(index["weight_map"]) == sorted(state)
+    assert sorted(set(index["weight_map"].values())) == shards
+    assert all(list(index["weight_map"].values()).count(s) == 2 for s in shards)
+    assert validate_checkpoint(dest, sample_bytes=512).valid
+    assert load_checkpoint(dest, threads=3) == state
+
+
+def test_save_state_dict_single_shard_is_model_pt(tmp_path: Path, torch: FakeTorch) -> None:
+    state = {"a": Tensor(64), "b": Tensor(64)}
+    manifest = save_state_dict(state, tmp_path, job_id="job", run_id="run", step=1, num_shards=1)
+    assert [f.path for f in manifest.files] == ["model.pt"]
+    assert load_checkpoint(tmp_path) == state
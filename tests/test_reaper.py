@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.config import RetentionConfig
+from ckptkit.fs import list_checkpoints
+from ckptkit.reaper import Reaper, trashed
+
+from conftest import checkpoint_writer
+
+
+def _writer(step: int):
+    return checkpoint_writer(step, {f"shards/{i}.bin": bytes([step]) * 32 for i in range(5)})
+
+
+def test_deferred_retention_trashes_then_reaper_deletes(tmp_path: Path) -> None:
+    retention = RetentionConfig(keep_last=1, deferred=True)
+    for step in (1, 2, 3):
+        atomic_checkpoint_write(tmp_path / f"step-{step}", _writer(step), retention=retention)
+
+    # Retention decided synchronously: only step-3 is still listed, the rest wait in the trash.
+    assert list_checkpoints(tmp_path) == [tmp_path / "step-3"]
+    assert len(trashed(tmp_path)) == 2
+
+    # A partially reaped victim (e.g. after a crash) is finished by the next reaper.
+    victim = trashed(tmp_path)[0]
+    (victim / "shards" / "0.bin").unlink()
+    reaper = Reaper(tmp_path, threads=2, batch_size=2)
+    assert reaper.reap() == 2 * 6 - 1
+    assert trashed(tmp_path) == []
+
+
+def test_background_reaper_is_woken_by_retention(tmp_path: Path) -> None:
+    retention = RetentionConfig(keep_last=1, deferred=True)
+    with Reaper(tmp_path, poll_interval=60) as reaper:
+        for step in (1, 2):
+            atomic_checkpoint_write(tmp_path / f"step-{step}", _writer(step), retention=retention, reaper=reaper)
+    assert trashed(tmp_path) == []
+    assert reaper.files_removed == 6
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from ckptkit.manifest import compute_manifest, manifest_path, write_manifest
+from ckptkit import resume
 from ckptkit.resume import Policy, select_checkpoint
 
 
@@ -25,3 +26,23 @@ def test_resume_fallback_to_last_valid(tmp_path: Path) -> None:
     plan = select_checkpoint(root, policy=Policy.LATEST_VALID)
     assert plan.step == 1
     assert plan.validation.valid
+
+
+def test_resume_stops_at_first_valid_candidate(tmp_path: Path, monkeypatch) -> None:
+    for step in (1, 2, 3, 4):
+        _write_checkpoint(tmp_path / f"step-{step}", step=step, corrupt=step == 4)
+
+    validated = []
+    original = resume.validate_checkpoint
+
+    def counting(ckpt, **kwargs):
+        validated.append(ckpt.name)
+        return original(ckpt, **kwargs)
+
+    monkeypatch.setattr(resume, "validate_checkpoint", counting)
+    plan = select_checkpoint(tmp_path, policy=Policy.LATEST_VALID, full_hash=True)
+    assert plan.step == 3
+    assert validated == ["step-4", "step-3"]
+
+    plan = select_checkpoint(tmp_path, policy=Policy.NEWEST_BEFORE, before_step=2, speculate=2)
+    assert plan.step == 2
@@ -0,0 +1,144 @@
+import os
+import threading
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from ckptkit.config import RetentionConfig
+from ckptkit.storage import ObjectStoreBackend, PosixBackend, write_checkpoint
+from ckptkit.validate import validate_checkpoint
+
+from conftest import checkpoint_writer
+
+
+class _FakeS3(BaseHTTPRequestHandler):
+    # Just enough of the S3 API (path-style, no auth) for ObjectStoreBackend.
+    protocol_version = "HTTP/1.1"
+    objects: Dict[str, bytes] = {}
+    uploads: Dict[str, Dict[int, bytes]] = {}
+    ranged_gets = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, body: bytes = b"", headers: Dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _parse(self):
+        url = urllib.parse.urlsplit(self.path)
+        key = urllib.parse.unquote(url.path).split("/", 2)[2] if url.path.count("/") > 1 else ""
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        return key, dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True)), body
+
+    def do_PUT(self) -> None:
+        key, query, body = self._parse()
+        with self.lock:
+            if "uploadId" in query:
+                self.uploads[query["uploadId"]][int(query["partNumber"])] = body
+            else:
+                self.objects[key] = body
+        self._reply(200, headers={"ETag": '"etag"'})
+
+    def do_POST(self) -> None:
+        key, query, _ = self._parse()
+        with self.lock:
+            if "uploads" in query:
+                upload_id = uuid.uuid4().hex
+                self.uploads[upload_id] = {}
+                return self._reply(200, f"<R><UploadId>{upload_id}</UploadId></R>".encode())
+            parts = self.uploads.pop(query["uploadId"])
+            self.objects[key] = b"".join(parts[n] for n in sorted(parts))
+        self._reply(200, b"<CompleteMultipartUploadResult/>")
+
+    def do_GET(self) -> None:
+        key, query, _ = self._parse()
+        if not key:
+            with self.lock:
+                keys = sorted(k for k in self.objects if k.startswith(query.get("prefix", "")))
+            body = "".join(f"<Contents><Key>{k}</Key></Contents>" for k in keys)
+            return self._reply(200, f"<ListBucketResult>{body}</ListBucketResult>".encode())
+        data = self.objects.get(key)
+        if data is None:
+            return self._reply(404)
+        if "Range" in self.headers:
+            start, _, end = self.headers["Range"][len("bytes=") :].partition("-")
+            with self.lock:
+                type(self).ranged_gets += 1
+            return self._reply(206, data[int(start) : int(end) + 1 if end else None])
+        self._reply(200, data)
+
+    def do_HEAD(self) -> None:
+        key, _, _ = self._parse()
+        data = self.objects.get(key)
+        if data is None:
+            return self._reply(404)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+    def do_DELETE(self) -> None:
+        key, query, _ = self._parse()
+        with self.lock:
+            if "uploadId" in query:
+                self.uploads.pop(query["uploadId"], None)
+            else:
+                self.objects.pop(key, None)
+        self._reply(204)
+
+
+@pytest.fixture
+def s3():
+    _FakeS3.objects, _FakeS3.uploads, _FakeS3.ranged_gets = {}, {}, 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeS3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    backend = ObjectStoreBackend(
+        f"http://127.0.0.1:{server.server_address[1]}", "ckpts", prefix="job", part_size=1024, threads=4
+    )
+    yield backend
+    backend.close()
+    server.shutdown()
+
+
+def _writer(step: int):
+    return checkpoint_writer(step, {"model.bin": os.urandom(5000), "meta.json": b"{}"})
+
+
+def test_object_store_commit_fetch_and_retention(s3: ObjectStoreBackend, tmp_path: Path) -> None:
+    for step in (1, 2, 3):
+        write_checkpoint(s3, f"step-{step}", _writer(step), retention=RetentionConfig(keep_last=2))
+    assert s3.list_checkpoints() == ["step-2", "step-3"]
+    assert s3.latest() == "step-3"
+    assert s3.read_manifest_header("step-3")["step"] == 3
+    # 5000 bytes with 1 KiB parts went up as a multipart upload and comes back with ranged GETs.
+    fetched = s3.fetch("step-3", tmp_path / "step-3")
+    assert _FakeS3.ranged_gets >= 5
+    assert validate_checkpoint(fetched, full_hash=True).valid
+
+
+def test_object_store_uncommitted_checkpoint_is_not_listed(s3: ObjectStoreBackend, tmp_path: Path) -> None:
+    data = tmp_path / "model.bin"
+    data.write_bytes(b"x" * 10)
+    s3.put("step-9/model.bin", data)
+    assert s3.list_checkpoints() == []
+    s3.delete("step-9")
+    assert s3.list() == []
+
+
+def test_posix_backend_commit(tmp_path: Path) -> None:
+    backend = PosixBackend(tmp_path / "root")
+    write_checkpoint(backend, "step-1", _writer(1), staging_root=tmp_path / "root")
+    assert backend.list_checkpoints() == ["step-1"]
+    assert validate_checkpoint(tmp_path / "root" / "step-1", full_hash=True).valid
+    assert (tmp_path / "root" / "latest").resolve() == (tmp_path / "root" / "step-1").resolve()
@@ -0,0 +1,115 @@
+import contextlib
+import io
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ckptkit.manifest import compute_manifest, manifest_path, write_manifest
+from ckptkit import throttle
+from ckptkit.throttle import IOBudget
+from ckptkit.validate import validate_checkpoints
+
+
+def test_scan_respects_inflight_cap_and_keeps_order(tmp_path: Path, monkeypatch) -> None:
+    checkpoints = []
+    for step in range(6):
+        ckpt = tmp_path / f"step-{step}"
+        ckpt.mkdir()
+        for i in range(3):
+            (ckpt / f"shard-{i}.bin").write_bytes(bytes([step, i]) * 4096)
+        write_manifest(manifest_path(ckpt), compute_manifest(ckpt, job_id="j", run_id="r", step=step, world_size=1))
+        checkpoints.append(ckpt)
+    (checkpoints[2] / "shard-1.bin").write_bytes(b"corrupt" * 1000)
+
+    budget = IOBudget(max_inflight=2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+    original = budget.slot
+
+    def tracking_slot():
+        nonlocal active, peak
+        with original():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            try:
+                time.sleep(0.001)
+                yield
+            finally:
+                with lock:
+                    active -= 1
+
+    monkeypatch.setattr(budget, "slot", contextlib.contextmanager(tracking_slot))
+    results = validate_checkpoints(checkpoints, full_hash=True, workers=4, budget=budget)
+    assert [r.checkpoint for r in results] == checkpoints
+    assert [r.valid for r in results] == [True, True, False, True, True, True]
+    assert 1 <= peak <= 2
+    assert budget.bytes_read > 0
+
+
+def test_budget_limits_throughput() -> None:
+    budget = IOBudget(bytes_per_second=200_000)
+    reader = budget.wrap(io.BytesIO(b"x" * 400_000))
+    start = time.monotonic()
+    while reader.read(50_000):
+        pass
+    # One second of burst is free; the remaining 200 KB take about a second.
+    assert time.monotonic() - start >= 0.8
+
+
+class _SlowFile(io.BytesIO):
+    def read(self, n: int = -1) -> bytes:
+        time.sleep(0.005)
+        return super().read(n)
+
+
+def test_budget_backs_off_on_slow_reads_and_limits_iops() -> None:
+    budget = IOBudget(latency_target=0.001, max_backoff=0.01)
+    reader = budget.wrap(_SlowFile(b"x" * 100))
+    for _ in range(5):
+        reader.read(10)
+    assert budget.backoff > 0
+
+    budget = IOBudget(iops=20)
+    reader = budget.wrap(io.BytesIO(b"x" * 100))
+    start = time.monotonic()
+    for _ in range(30):
+        reader.read(1)
+    assert time.monotonic() - start >= 0.4
+    assert budget.reads == 30
+
+
+def test_priority_is_lowered_only_while_reading() -> None:
+    if throttle._ioprio(throttle._SYS_IOPRIO_GET) is None or not hasattr(os, "getpriority"):
+        pytest.skip("per-thread I/O priority is not available")
+    tid = threading.get_native_id()
+    before = (throttle._ioprio(throttle._SYS_IOPRIO_GET), os.getpriority(os.PRIO_PROCESS, tid))
+    seen = []
+
+    class _Probe(io.BytesIO):
+        def read(self, n: int = -1) -> bytes:
+            seen.append((throttle._ioprio(throttle._SYS_IOPRIO_GET), os.getpriority(os.PRIO_PROCESS, tid)))
+            return super().read(n)
+
+    budget = IOBudget(io_class="best-effort", nice=before[1] + 1)
+    budget.wrap(_Probe(b"x" * 10)).read(10)
+    assert seen[0][0] == (2 << 13) | 7
+    if throttle._can_restore_nice(before[1]):
+        assert seen[0][1] == before[1] + 1
+    assert (throttle._ioprio(throttle._SYS_IOPRIO_GET), os.getpriority(os.PRIO_PROCESS, tid)) == before
+
+
+def test_skipped_nice_is_reported_once(monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture) -> None:
+    if not hasattr(os, "setpriority") or os.getpriority(os.PRIO_PROCESS, 0) >= 19:
+        pytest.skip("nice cannot be lowered further here")
+    monkeypatch.setattr(throttle, "_can_restore_nice", lambda value: False)
+    monkeypatch.setattr(throttle, "_nice_skipped", threading.Event())
+    budget = IOBudget(nice=19)
+    with caplog.at_level("WARNING", logger="ckptkit.throttle"):
+        for _ in range(3):
+            budget.wrap(io.BytesIO(b"x")).read(1)
+    assert len([r for r in caplog.records if "not applying nice" in r.getMessage()]) == 1
@@ -0,0 +1,85 @@
+import os
+from pathlib import Path
+
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.chunkstore import ChunkStore
+from ckptkit.config import RetentionConfig
+from ckptkit.manifest import compute_manifest, manifest_path, write_manifest
+from ckptkit.resume import select_checkpoint
+from ckptkit.tiering import TieredStorage
+from ckptkit.validate import validate_checkpoint
+
+from conftest import checkpoint_writer
+
+
+def _writer(step: int):
+    return checkpoint_writer(step, {"weights.bin": bytes([step]) * 256 + os.urandom(64)})
+
+
+def test_tiered_migrates_verifies_and_evicts_hot(tmp_path: Path) -> None:
+    hot, cold = tmp_path / "hot", tmp_path / "cold"
+    with TieredStorage(
+        hot, cold, hot_retention=RetentionConfig(keep_last=1), cold_retention=RetentionConfig(keep_last=3)
+    ) as tiered:
+        for step in (1, 2, 3):
+            tiered.write(f"step-{step}", _writer(step))
+        tiered.wait()
+        assert tiered.pending() == []
+
+    assert [p.name for p in sorted(hot.glob("step-*"))] == ["step-3"]
+    assert [p.name for p in sorted(cold.glob("step-*"))] == ["step-1", "step-2", "step-3"]
+    for step in (1, 2, 3):
+        assert validate_checkpoint(cold / f"step-{step}", full_hash=True).valid
+
+    # The hot copy wins while it is valid; a corrupt one falls back to the cold copy.
+    plan = select_checkpoint(hot, tiers=[cold])
+    assert plan.checkpoint == hot / "step-3"
+    (hot / "step-3" / "weights.bin").write_bytes(b"corrupt")
+    plan = select_checkpoint(hot, tiers=[cold], repair_latest=False)
+    assert plan.checkpoint == cold / "step-3"
+
+
+def test_tiered_copies_chunks_and_resumes_pending(tmp_path: Path) -> None:
+    hot, cold = tmp_path / "hot", tmp_path / "cold"
+    # Committed on the hot tier by a process that exited before migrating it.
+    atomic_checkpoint_write(hot / "step-1", _writer(1), chunk_store=ChunkStore(hot))
+    with TieredStorage(hot, cold) as tiered:
+        assert tiered.pending() == [hot / "step-1"]
+        (future,) = tiered.resume()
+        assert future.result(timeout=10) == cold / "step-1"
+    assert ChunkStore(cold).path.is_dir()
+    assert validate_checkpoint(cold / "step-1", full_hash=True).valid
+
+
+def test_tiered_verifies_files_larger_than_the_sample(tmp_path: Path) -> None:
+    hot, cold = tmp_path / "hot", tmp_path / "cold"
+
+    def writer(temp: Path):
+        (temp / "model.bin").write_bytes(os.urandom(1 << 20))
+        manifest = compute_manifest(temp, job_id="job", run_id="run", step=1, world_size=1, sample_bytes=65536)
+        write_manifest(manifest_path(temp), manifest)
+        return manifest
+
+    with TieredStorage(hot, cold, sample_bytes=65536) as tiered:
+        tiered.write("step-1", writer)
+        tiered.wait()
+        assert tiered.verified(hot / "step-1")
+    assert validate_checkpoint(cold / "step-1", sample_bytes=65536).valid
+
+
+def test_tiered_keeps_hot_checkpoint_whose_migration_never_succeeded(tmp_path: Path) -> None:
+    hot, cold = tmp_path / "hot", tmp_path / "cold"
+    # step-1 failed to migrate in an earlier process; step-2 was migrated afterwards.
+    for step in (1, 2):
+        atomic_checkpoint_write(hot / f"step-{step}", _writer(step))
+    with TieredStorage(hot, cold, hot_retention=RetentionConfig(keep_last=1)) as tiered:
+        tiered.enqueue(hot / "step-2").result(timeout=10)
+        assert tiered.pending() == [hot / "step-1"]
+    assert (hot / "step-1").is_dir()
+    # A restarted process still knows step-1 has no verified cold copy.
+    with TieredStorage(hot, cold, hot_retention=RetentionConfig(keep_last=1)) as tiered:
+        assert tiered.pending() == [hot / "step-1"]
+        (future,) = tiered.resume()
+        future.result(timeout=10)
+    assert [p.name for p in sorted(hot.glob("step-*"))] == ["step-2"]
+    assert (cold / "step-1").is_dir()
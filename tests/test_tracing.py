@@ -0,0 +1,58 @@
+import json
+import logging
+from pathlib import Path
+
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.metrics import MetricsEmitter, record_trace
+from ckptkit.resume import select_checkpoint
+from ckptkit.tracing import Tracer, span, tracing
+
+from conftest import checkpoint_writer
+
+
+def _writer(step: int):
+    return checkpoint_writer(step, {"model.bin": bytes([step]) * 4096})
+
+
+def test_write_and_resume_phases_are_traced(tmp_path: Path, caplog) -> None:
+    tracer = Tracer()
+    with tracing(tracer):
+        atomic_checkpoint_write(tmp_path / "step-1", _writer(1))
+        select_checkpoint(tmp_path, speculate=1)
+    phases = tracer.phases()
+    for name in ("write", "write.write_fn", "write.persist", "write.rename", "manifest.hash", "resume", "validate"):
+        assert phases[name]["count"] >= 1, name
+    assert phases["manifest.hash"]["bytes"] == 4096
+    assert {s.parent for s in tracer.spans if s.name == "write.rename"} == {"write"}
+
+    emitter = MetricsEmitter()
+    record_trace(emitter, tracer)
+    text = emitter.text()
+    assert 'checkpoint_phase_duration_seconds_count{phase="write.persist"} 1' in text
+    assert 'checkpoint_phase_bytes_total{phase="manifest.hash"} 4096' in text
+
+    with caplog.at_level(logging.INFO):
+        tracer.log(logging.getLogger("ckptkit.test"), step=1)
+    assert caplog.records[-1].phases["write"]["count"] == 1
+
+    trace = tmp_path / "trace.json"
+    tracer.write_chrome_trace(trace)
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert {e["ph"] for e in events} == {"X"}
+    assert len(events) == len(tracer.spans)
+
+
+def test_spans_are_noops_without_a_tracer(tmp_path: Path) -> None:
+    with span("write") as s:
+        s.add_bytes(10)
+    assert not s.enabled
+
+    tracer = Tracer()
+    with tracing(tracer):
+        atomic_checkpoint_write(tmp_path / "step-1", _writer(1))
+    recorded = list(tracer.spans)
+    assert recorded
+    # Once the block exits the tracer is no longer active, so later calls add nothing to it.
+    atomic_checkpoint_write(tmp_path / "step-2", _writer(2))
+    select_checkpoint(tmp_path, speculate=1)
+    assert tracer.spans == recorded
@@ -1,6 +1,9 @@
+import os
 from pathlib import Path
 
+from ckptkit import hashing
 from ckptkit.manifest import compute_manifest, manifest_path, write_manifest
+from ckptkit.reader import entry_stripe_ranges
 from ckptkit.validate import Reason, validate_checkpoint
 
 
@@ -31,3 +34,65 @@ def test_missing_file_detected(tmp_path: Path) -> None:
     assert not res.valid
     reasons = {issue.reason for issue in res.issues}
     assert Reason.FILE_MISSING in reasons
+
+
+def test_merkle_chunks_localize_corruption(tmp_path: Path) -> None:
+    ckpt = tmp_path / "step-3"
+    ckpt.mkdir()
+    payload = bytearray(os.urandom(10 * 1024))
+    (ckpt / "shard.bin").write_bytes(payload)
+    manifest = compute_manifest(ckpt, job_id="job", run_id="run", step=3, world_size=1, merkle_chunk_size=1024)
+    write_manifest(manifest_path(ckpt), manifest)
+    assert len(manifest.files[0].merkle["chunks"]) == 10
+    assert validate_checkpoint(ckpt, full_hash=True).valid
+
+    payload[2100] ^= 0xFF
+    payload[3100] ^= 0xFF
+    payload[9000] ^= 0xFF
+    (ckpt / "shard.bin").write_bytes(payload)
+    res = validate_checkpoint(ckpt, full_hash=True)
+    assert [(i.reason, i.byte_range) for i in res.issues] == [
+        (Reason.CHUNK_MISMATCH, [2048, 4096]),
+        (Reason.CHUNK_MISMATCH, [8192, 9216]),
+    ]
+    # Sampled validation only reads the first and last chunk.
+    assert validate_checkpoint(ckpt, sample_bytes=65536).valid
+
+
+def test_tampered_chunk_list_fails_merkle_root(tmp_path: Path) -> None:
+    ckpt = tmp_path / "step-4"
+    ckpt.mkdir()
+    payload = bytearray(os.urandom(4 * 1024))
+    (ckpt / "shard.bin").write_bytes(payload)
+    manifest = compute_manifest(ckpt, job_id="job", run_id="run", step=4, world_size=1, merkle_chunk_size=1024)
+    payload[1500] ^= 0xFF
+    (ckpt / "shard.bin").write_bytes(payload)
+    # Rewrite the chunk digest so the list matches the corrupted file but not the recorded root.
+    digest = hashing.new_hasher(manifest.hash_algorithm)
+    digest.update(payload[1024:2048])
+    manifest.files[0].merkle["chunks"][1] = digest.hexdigest()
+    write_manifest(manifest_path(ckpt), manifest)
+    res = validate_checkpoint(ckpt, full_hash=True)
+    assert [(i.reason, i.byte_range) for i in res.issues] == [(Reason.CHUNK_MISMATCH, [0, 4096])]
+
+
+def test_stripes_cover_the_middle_of_large_files(tmp_path: Path) -> None:
+    ckpt = tmp_path / "step-4"
+    ckpt.mkdir()
+    payload = bytearray(os.urandom(1 << 20))
+    (ckpt / "shard.bin").write_bytes(payload)
+    (ckpt / "small.bin").write_bytes(b"x" * 100)
+    manifest = compute_manifest(ckpt, job_id="job", run_id="run", step=4, world_size=1, stripes=16, stripe_seed=7)
+    write_manifest(manifest_path(ckpt), manifest, fmt="ndjson")
+    shard = next(e for e in manifest.files if e.path == "shard.bin")
+    assert len(shard.stripes["digests"]) == 16 and shard.stripes["size"] == 4096
+    assert next(e for e in manifest.files if e.path == "small.bin").stripes is None
+    assert validate_checkpoint(ckpt, sample_bytes=65536).valid
+
+    # A flipped byte in a middle stripe is invisible to a head/tail sample but not to the stripes.
+    start = entry_stripe_ranges(shard)[8][0]
+    assert 65536 < start < len(payload) - 65536
+    payload[start + 10] ^= 0xFF
+    (ckpt / "shard.bin").write_bytes(payload)
+    res = validate_checkpoint(ckpt, sample_bytes=65536)
+    assert [(i.reason, i.byte_range) for i in res.issues] == [(Reason.STRIPE_MISMATCH, [start, start + 4096])]
@@ -0,0 +1,97 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from ckptkit import cli
+from ckptkit.atomic import atomic_checkpoint_write
+from ckptkit.cache import ValidationCache
+from ckptkit.watch import CheckpointWatcher, PollingSource
+
+from conftest import checkpoint_writer
+
+
+def _writer(step: int):
+    return checkpoint_writer(step, {"model.bin": bytes([step]) * 256})
+
+
+def _poll_until(watcher: CheckpointWatcher, count: int, deadline: float = 5.0):
+    results = []
+    end = time.monotonic() + deadline
+    while len(results) < count and time.monotonic() < end:
+        results.extend(watcher.poll(timeout=0.05))
+    return results
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watch_validates_new_checkpoints_once(tmp_path: Path, use_inotify: bool) -> None:
+    atomic_checkpoint_write(tmp_path / "step-1", _writer(1))
+    watcher = CheckpointWatcher(tmp_path, recheck_interval=3600, use_inotify=use_inotify)
+    with watcher:
+        assert watcher.poll(timeout=0) == []
+        atomic_checkpoint_write(tmp_path / "step-2", _writer(2))
+        results = _poll_until(watcher, 1)
+        assert [r.checkpoint.name for r in results] == ["step-2"]
+        assert results[0].valid
+        # The retained step-1 is not revalidated before its recheck is due.
+        assert _poll_until(watcher, 1, deadline=0.3) == []
+        assert watcher.validations == 1
+        if not use_inotify:
+            assert isinstance(watcher._source, PollingSource)
+
+
+def test_watch_reports_corruption_on_recheck(tmp_path: Path) -> None:
+    atomic_checkpoint_write(tmp_path / "step-1", _writer(1))
+    (tmp_path / "step-1" / "model.bin").write_bytes(b"corrupt!" * 32)
+    watcher = CheckpointWatcher(tmp_path, recheck_interval=0.1)
+    with watcher:
+        results = _poll_until(watcher, 2)
+    assert [r.valid for r in results] == [False, False]
+    prom = watcher.emitter.text()
+    assert 'checkpoint_corrupt_detected{checkpoint="step-1"} 1.0' in prom
+    assert 'checkpoint_validation_failures_total{reason="all"} 2' in prom
+    assert "# TYPE checkpoint_validations_total counter" in prom
+
+
+def test_watch_rechecks_bypass_the_cache(tmp_path: Path) -> None:
+    cache = ValidationCache(tmp_path)
+    watcher = CheckpointWatcher(tmp_path, recheck_interval=0.1, cache=cache, use_inotify=False)
+    with watcher:
+        atomic_checkpoint_write(tmp_path / "step-1", _writer(1))
+        (first,) = _poll_until(watcher, 1)
+        assert first.valid and len(cache) == 1
+        # Bit rot: same inode, size and mtime, so the cache fingerprint does not change.
+        data = tmp_path / "step-1" / "model.bin"
+        st = data.stat()
+        with open(data, "r+b") as f:
+            f.seek(100)
+            f.write(b"\xff")
+        os.utime(data, ns=(st.st_atime_ns, st.st_mtime_ns))
+        (recheck,) = _poll_until(watcher, 1)
+    assert not recheck.valid
+    fingerprint = cache.fingerprint(tmp_path / "step-1", "sample:65536")
+    assert not cache.get(tmp_path / "step-1", "sample:65536", fingerprint).valid
+
+
+def test_watch_textfile_counters_survive_restart_without_port(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = tmp_path / "root"
+    root.mkdir()
+    atomic_checkpoint_write(root / "step-1", _writer(1))
+
+    def run_once(self) -> None:
+        self.start()
+        try:
+            # Existing checkpoints are due for a recheck within --recheck-interval.
+            time.sleep(0.05)
+            self.poll(timeout=0)
+        finally:
+            self.close()
+
+    monkeypatch.setattr(cli.CheckpointWatcher, "run", run_once)
+    textfile = tmp_path / "ckptkit.prom"
+    argv = ["watch", str(root), "--no-inotify", "--no-cache", "--recheck-interval", "0.01"]
+    argv += ["--textfile", str(textfile)]
+    for _ in range(2):
+        assert cli.main(argv + ["--metrics-state", str(tmp_path / "state.json")]) == 0
+    assert 'checkpoint_validations_total{result="valid"} 2.0' in textfile.read_text()